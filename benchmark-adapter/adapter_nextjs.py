@@ -7,26 +7,17 @@ from typing import Dict, List, Optional
 
 import requests
 
+# Share the bench's indexed JSONL store, so outputs written here are indexed for the bench stages
+BENCH_DIR = Path(__file__).resolve().parent.parent / "deep_research_bench_reference"
+sys.path.insert(0, str(BENCH_DIR))
+from utils.jsonl_store import JsonlStore, iter_jsonl  # noqa: E402
+
 
 STREAM_READ_TIMEOUT = 60  # seconds without data before considering stream stalled
 
 
 def load_jsonl(path: Path) -> List[Dict[str, object]]:
-  items: List[Dict[str, object]] = []
-  with path.open("r", encoding="utf-8") as file:
-    for line in file:
-      line = line.strip()
-      if not line:
-        continue
-      items.append(json.loads(line))
-  return items
-
-
-def append_jsonl(path: Path, rows: List[Dict[str, object]]) -> None:
-  path.parent.mkdir(parents=True, exist_ok=True)
-  with path.open("a", encoding="utf-8") as file:
-    for row in rows:
-      file.write(json.dumps(row, ensure_ascii=False) + "\n")
+  return list(iter_jsonl(path))
 
 
 def check_api_health(base_url: str, timeout: int = 10) -> bool:
@@ -133,14 +124,13 @@ def stream_progress(
 
 
 def log_failed_task(
-  output_dir: Path,
+  failed_store: JsonlStore,
   task_id: str | int,
   prompt: str,
   error: str,
   attempts: int
 ) -> None:
   """Log a failed task to failed_tasks.jsonl."""
-  failed_path = output_dir / "failed_tasks.jsonl"
   failed_row = {
     "id": str(task_id),
     "prompt": prompt,
@@ -148,7 +138,7 @@ def log_failed_task(
     "attempts": attempts,
     "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
   }
-  append_jsonl(failed_path, [failed_row])
+  failed_store.append([failed_row])
 
 
 def main() -> None:
@@ -262,95 +252,98 @@ def main() -> None:
       )
     )
 
-  existing_ids = set()
-  if args.resume and output_path.exists():
-    for row in load_jsonl(output_path):
-      task_id = row.get("id")
-      if isinstance(task_id, (str, int)):
-        existing_ids.add(task_id)
-
-  if args.verbose:
-    print("Output path: {}".format(output_path))
-    print("Local output path: {}".format(local_output_path))
-    if output_path.exists():
-      print("Found {} existing rows".format(len(existing_ids)))
-
-  rows: List[Dict[str, object]] = []
-  processed = 0
-  failed = 0
-  total = len(tasks)
-
-  def flush_rows() -> None:
-    nonlocal rows
-    if rows:
-      append_jsonl(output_path, rows)
-      append_jsonl(local_output_path, rows)
-      rows = []
-
-  for task in tasks:
-    task_id = task.get("id")
-    prompt = task.get("prompt")
-
-    if not isinstance(task_id, (str, int)) or not isinstance(prompt, str):
-      continue
-
-    if args.resume and task_id in existing_ids:
-      continue
-
-    payload = {
-      "prompt": prompt,
-      "maxIterations": args.max_iterations,
-      "maxConcurrentResearchers": args.max_concurrent_researchers,
-      "enableWebScraping": args.enable_web_scraping,
-      "useOriginalPrompts": args.original_prompts
-    }
+  # The stores stay open for the whole run, so each append only indexes the new rows;
+  # their sidecar indexes are saved once, when the stores close
+  with JsonlStore(output_path) as output_store, \
+      JsonlStore(local_output_path) as local_store, \
+      JsonlStore(output_dir / "failed_tasks.jsonl") as failed_store:
+    # Rows are written with string IDs while query IDs are ints, so compare as strings
+    existing_ids = set()
+    if args.resume:
+      existing_ids = {str(task_id) for task_id in output_store.ids() if isinstance(task_id, (str, int))}
 
     if args.verbose:
-      print("Requesting {} at {}".format(task_id, args.base_url))
-
-    attempt = 0
-    last_error = ""
-    success = False
-
-    while attempt <= args.retries:
-      attempt += 1
-      try:
-        start_time = time.time()
-        if args.stream_progress:
-          report = stream_progress(
-            args.base_url,
-            payload,
-            args.timeout,
-            args.stream_read_timeout
-          )
-        else:
-          report = request_report(args.base_url, payload, args.timeout)
-        elapsed = time.time() - start_time
-        rows.append({
-          "id": str(task_id),
-          "prompt": prompt,
-          "article": report
-        })
-        processed += 1
-        print("[{}/{}] Completed {} ({:.1f}s)".format(processed, total, task_id, elapsed))
-        flush_rows()
-        success = True
-        break
-      except Exception as exc:
-        last_error = str(exc)
-        print("[error] {} (attempt {}/{}): {}".format(task_id, attempt, args.retries + 1, exc))
-        if attempt <= args.retries:
-          time.sleep(args.retry_delay)
-
-    if not success:
-      failed += 1
-      log_failed_task(output_dir, task_id, prompt, last_error, attempt)
-      print(f"[failed] {task_id} logged to failed_tasks.jsonl")
-
-    if args.stream_progress:
-      time.sleep(0.25)
-
-  flush_rows()
+      print("Output path: {}".format(output_path))
+      print("Local output path: {}".format(local_output_path))
+      if output_path.exists():
+        print("Found {} existing rows".format(len(existing_ids)))
+
+    rows: List[Dict[str, object]] = []
+    processed = 0
+    failed = 0
+    total = len(tasks)
+
+    def flush_rows() -> None:
+      nonlocal rows
+      if rows:
+        output_store.append(rows)
+        local_store.append(rows)
+        rows = []
+
+    for task in tasks:
+      task_id = task.get("id")
+      prompt = task.get("prompt")
+
+      if not isinstance(task_id, (str, int)) or not isinstance(prompt, str):
+        continue
+
+      if args.resume and str(task_id) in existing_ids:
+        continue
+
+      payload = {
+        "prompt": prompt,
+        "maxIterations": args.max_iterations,
+        "maxConcurrentResearchers": args.max_concurrent_researchers,
+        "enableWebScraping": args.enable_web_scraping,
+        "useOriginalPrompts": args.original_prompts
+      }
+
+      if args.verbose:
+        print("Requesting {} at {}".format(task_id, args.base_url))
+
+      attempt = 0
+      last_error = ""
+      success = False
+
+      while attempt <= args.retries:
+        attempt += 1
+        try:
+          start_time = time.time()
+          if args.stream_progress:
+            report = stream_progress(
+              args.base_url,
+              payload,
+              args.timeout,
+              args.stream_read_timeout
+            )
+          else:
+            report = request_report(args.base_url, payload, args.timeout)
+          elapsed = time.time() - start_time
+          rows.append({
+            "id": str(task_id),
+            "prompt": prompt,
+            "article": report
+          })
+          processed += 1
+          print("[{}/{}] Completed {} ({:.1f}s)".format(processed, total, task_id, elapsed))
+          flush_rows()
+          success = True
+          break
+        except Exception as exc:
+          last_error = str(exc)
+          print("[error] {} (attempt {}/{}): {}".format(task_id, attempt, args.retries + 1, exc))
+          if attempt <= args.retries:
+            time.sleep(args.retry_delay)
+
+      if not success:
+        failed += 1
+        log_failed_task(failed_store, task_id, prompt, last_error, attempt)
+        print(f"[failed] {task_id} logged to failed_tasks.jsonl")
+
+      if args.stream_progress:
+        time.sleep(0.25)
+
+    flush_rows()
 
   print("Done. Completed: {}, Failed: {}, Output: {}".format(processed, failed, output_path))
 
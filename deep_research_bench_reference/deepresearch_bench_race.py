@@ -1,3 +1,4 @@
+import asyncio
 import json
 import os
 import threading
@@ -8,14 +9,17 @@ import logging
 import time
 import re 
 from utils.api import AIClient
-from utils.io_utils import load_jsonl
+from utils.async_engine import AsyncLLMEngine
+from utils.io_utils import iter_jsonl, JsonlStore
+from utils.jsonl_store import JsonlAppender, compact_jsonl
 import glob
 
 # Import scoring prompts for Chinese and English
 from prompt.score_prompt_zh import generate_merged_score_prompt as zh_merged_score_prompt
 from prompt.score_prompt_en import generate_merged_score_prompt as en_merged_score_prompt
 from utils.score_calculator import calculate_weighted_scores
-from utils.json_extractor import extract_json_from_markdown
+from utils.race_stats import DIMENSIONS, DIMENSION_LABELS, RaceScores, load_query_languages, summarize_scores, format_summary
+from utils.json_extractor import extract_json, EXTRACTION_STATS
 from utils.clean_article import ArticleCleaner
 
 # Configure logging - 将级别从INFO改为WARNING
@@ -29,6 +33,7 @@ logger.setLevel(logging.INFO)
 CRITERIA_FILE = "data/criteria_data/criteria.jsonl"
 REFERENCE_FILE = "data/test_data/cleaned_data/reference.jsonl"
 MAX_RETRIES = 10
+LANGUAGE_NAMES = {"zh": "Chinese", "en": "English"}
 
 def format_criteria_list(criteria_data):
     """Format evaluation criteria list as JSON string, without weight information"""
@@ -55,27 +60,23 @@ def format_criteria_list(criteria_data):
     except TypeError as e:
         raise ValueError(f"Failed to serialize criteria to JSON: {e}")
 
-def process_single_item(task_data, target_articles_map, reference_articles_map, criteria_map, 
-                         llm_client, lock, pbar, max_retries, language):
-    """Process a single task: get data, call LLM, parse results, calculate scores"""
+def prepare_task_prompt(task_data, target_articles_map, reference_articles_map, criteria_map, language):
+    """Build the scoring prompt for a task, or an error result if its data is incomplete"""
     task_id = task_data.get('id')
     prompt = task_data.get('prompt')
 
     # Data retrieval and validation
     if prompt not in target_articles_map:
         logger.error(f"Target article not found for ID {task_id}")
-        with lock: pbar.update(1)
-        return {"id": task_id, "prompt": prompt, "error": "Target article not found"}
+        return None, {"id": task_id, "prompt": prompt, "error": "Target article not found"}
     
     if prompt not in reference_articles_map:
         logger.error(f"Reference article not found for ID {task_id}")
-        with lock: pbar.update(1)
-        return {"id": task_id, "prompt": prompt, "error": "Reference article not found"}
+        return None, {"id": task_id, "prompt": prompt, "error": "Reference article not found"}
     
     if prompt not in criteria_map:
         logger.error(f"Evaluation criteria not found for ID {task_id}")
-        with lock: pbar.update(1)
-        return {"id": task_id, "prompt": prompt, "error": "Evaluation criteria not found"}
+        return None, {"id": task_id, "prompt": prompt, "error": "Evaluation criteria not found"}
 
     target_article_data = target_articles_map[prompt]
     reference_article_data = reference_articles_map[prompt]
@@ -89,8 +90,7 @@ def process_single_item(task_data, target_articles_map, reference_articles_map,
         criteria_list_str = format_criteria_list(criteria_data)
     except ValueError as e:
         logger.error(f"ID {task_id}: {str(e)}")
-        with lock: pbar.update(1)
-        return {"id": task_id, "prompt": prompt, "error": f"Failed to format criteria: {str(e)}"}
+        return None, {"id": task_id, "prompt": prompt, "error": f"Failed to format criteria: {str(e)}"}
 
     # Choose scoring prompt based on language
     merged_score_prompt = zh_merged_score_prompt if language == "zh" else en_merged_score_prompt
@@ -102,52 +102,66 @@ def process_single_item(task_data, target_articles_map, reference_articles_map,
         article_2=reference_article,
         criteria_list=criteria_list_str 
     )
+    return user_prompt, None
+
+def drop_incomplete_score_items(llm_output_json):
+    """Remove score items missing the criterion or either article's score"""
+    required = ("criterion", "article_1_score", "article_2_score")
+    return {
+        dim: [item for item in items if isinstance(item, dict) and all(item.get(key) is not None for key in required)]
+        if isinstance(items, list) else items
+        for dim, items in llm_output_json.items()
+    }
 
-    llm_response_str = None
-    llm_output_json = None
-    success = False
-    retry_count = 0
-
-    while retry_count < max_retries and not success:
-        try:
-            llm_response_str = llm_client.generate(
-                user_prompt=user_prompt,
-                system_prompt=""
-            )
-
-            # Extract JSON from response
-            json_str_extracted = extract_json_from_markdown(llm_response_str)
-            if not json_str_extracted:
-                raise ValueError("Failed to extract JSON from LLM response")
-                
-            llm_output_json = json.loads(json_str_extracted)
-            
-            # Check if all required dimensions exist
-            expected_dims = ["comprehensiveness", "insight", "instruction_following", "readability"]
-            if not all(dim in llm_output_json for dim in expected_dims):
-                missing_dims = [dim for dim in expected_dims if dim not in llm_output_json]
-                raise ValueError(f"Missing expected dimensions: {missing_dims}")
-            
-            # All checks passed
-            success = True
-            
-        except Exception as e:
-            retry_count += 1
-            if retry_count < max_retries:
-                logger.warning(f"ID {task_id}: Retry {retry_count}/{max_retries} - {str(e)}")
-                time.sleep(1.5 ** retry_count)
-            else:
-                logger.error(f"ID {task_id}: Failed after {max_retries} retries - {str(e)}")
+def parse_judge_response(llm_response_str, criteria_data=None):
+    """Extract and validate the judge's JSON scores; raises ValueError if unusable
+
+    Malformed JSON (trailing commas, unescaped quotes, truncation) is repaired
+    locally instead of costing another judge call. A truncated response is
+    only accepted if every dimension still scores as many criteria as
+    criteria_data lists; otherwise the missing criteria would silently weigh
+    as zero, so it is rejected and the judge is asked again.
+    """
+    # Extract JSON from response
+    extraction = extract_json(llm_response_str)
+    if extraction is None:
+        raise ValueError("Failed to extract JSON from LLM response")
+        
+    llm_output_json = extraction.value
+    if not isinstance(llm_output_json, dict):
+        raise ValueError("LLM response JSON is not an object")
     
-    if not success:
-        with lock: pbar.update(1)
-        return {
-            "id": task_id,
-            "prompt": prompt,
-            "error": f"Failed to get valid response after {max_retries} retries",
-            "model_output": llm_response_str[:500] if llm_response_str else "No response"
-        }
+    # The item being written when the response was cut off may lack its scores
+    if "truncated" in extraction.repairs:
+        llm_output_json = drop_incomplete_score_items(llm_output_json)
+    
+    # Check if all required dimensions exist
+    expected_dims = ["comprehensiveness", "insight", "instruction_following", "readability"]
+    if not all(dim in llm_output_json for dim in expected_dims):
+        missing_dims = [dim for dim in expected_dims if dim not in llm_output_json]
+        raise ValueError(f"Missing expected dimensions: {missing_dims}")
+    
+    if extraction.method != "direct":
+        empty_dims = [dim for dim in expected_dims if not llm_output_json[dim]]
+        if empty_dims:
+            raise ValueError(f"No complete scores for dimensions {empty_dims} in repaired response ({extraction.repairs})")
+
+    if "truncated" in extraction.repairs and criteria_data is not None:
+        criterions = criteria_data.get("criterions", {})
+        short_dims = [dim for dim in expected_dims
+                      if len(llm_output_json[dim]) < len(criterions.get(dim, []))]
+        if short_dims:
+            raise ValueError(f"Truncated response scores too few criteria for dimensions {short_dims}")
+
+    if extraction.method == "repaired":
+        # Without the repair this response would have been sent back to the judge;
+        # rebuilt responses were already recovered by the previous regex fallback
+        EXTRACTION_STATS.record_retry_avoided()
+    
+    return llm_output_json
 
+def build_final_result(task_id, prompt, llm_output_json, criteria_data, language):
+    """Turn the judge's scores into the normalized result row"""
     # Calculate weighted scores
     try:
         scores = calculate_weighted_scores(llm_output_json, criteria_data, language)
@@ -176,7 +190,6 @@ def process_single_item(task_data, target_articles_map, reference_articles_map,
         
     except Exception as e:
         logger.error(f"ID {task_id}: Error calculating scores - {str(e)}")
-        with lock: pbar.update(1)
         return {
             "id": task_id,
             "prompt": prompt,
@@ -184,7 +197,7 @@ def process_single_item(task_data, target_articles_map, reference_articles_map,
         }
 
     # Prepare final result with simplified format
-    final_result = {
+    return {
         "id": task_id,
         "prompt": prompt,
         "comprehensiveness": normalized_dims.get("comprehensiveness", 0),
@@ -194,132 +207,368 @@ def process_single_item(task_data, target_articles_map, reference_articles_map,
         "overall_score": overall_score
     }
 
+def failed_result(task_id, prompt, max_retries, llm_response_str):
+    return {
+        "id": task_id,
+        "prompt": prompt,
+        "error": f"Failed to get valid response after {max_retries} retries",
+        "model_output": llm_response_str[:500] if llm_response_str else "No response"
+    }
+
+def process_single_item(task_data, target_articles_map, reference_articles_map, criteria_map, 
+                         llm_client, lock, pbar, max_retries, language):
+    """Process a single task: get data, call LLM, parse results, calculate scores"""
+    task_id = task_data.get('id')
+    prompt = task_data.get('prompt')
+
+    user_prompt, error_result = prepare_task_prompt(
+        task_data, target_articles_map, reference_articles_map, criteria_map, language
+    )
+    if error_result:
+        with lock: pbar.update(1)
+        return error_result
+
+    llm_response_str = None
+    llm_output_json = None
+    success = False
+    retry_count = 0
+
+    while retry_count < max_retries and not success:
+        try:
+            # A retry means the previous (possibly cached) response was unusable
+            llm_response_str = llm_client.generate(
+                user_prompt=user_prompt,
+                system_prompt="",
+                refresh_cache=retry_count > 0
+            )
+            llm_output_json = parse_judge_response(llm_response_str, criteria_map[prompt])
+            
+            # All checks passed
+            success = True
+            
+        except Exception as e:
+            retry_count += 1
+            if retry_count < max_retries:
+                logger.warning(f"ID {task_id}: Retry {retry_count}/{max_retries} - {str(e)}")
+                time.sleep(1.5 ** retry_count)
+            else:
+                logger.error(f"ID {task_id}: Failed after {max_retries} retries - {str(e)}")
+    
+    if not success:
+        with lock: pbar.update(1)
+        return failed_result(task_id, prompt, max_retries, llm_response_str)
+
+    final_result = build_final_result(task_id, prompt, llm_output_json, criteria_map[prompt], language)
+
     with lock:
         pbar.update(1)
 
     return final_result
 
-def process_language_data(language, target_model, llm_client, clean_agent, 
-                         raw_data_dir, cleaned_data_dir, max_workers, limit, query_file):
-    """Process data for a single language (Chinese or English)"""
-    
-    # Step 1: Clean target model articles if needed
-    logger.info(f"Checking if {target_model} articles need cleaning...")
-    try:
-        article_cleaner = ArticleCleaner(clean_agent)
-        default_language = language
+async def process_single_item_async(task_data, target_articles_map, reference_articles_map, criteria_map,
+                                    engine, pbar, max_retries, language):
+    """Async version of process_single_item; LLM calls go through the AsyncLLMEngine"""
+    task_id = task_data.get('id')
+    prompt = task_data.get('prompt')
 
-        article_cleaner.clean_articles(
-            target_model, 
-            raw_data_dir, 
-            cleaned_data_dir, 
-            max_workers,
-            MAX_RETRIES,
-            limit,
-            default_language
+    user_prompt, error_result = prepare_task_prompt(
+        task_data, target_articles_map, reference_articles_map, criteria_map, language
+    )
+    if error_result:
+        pbar.update(1)
+        return error_result
+
+    llm_response_str = None
+    llm_output_json = None
+
+    # Rate limiting is retried inside the engine; these retries cover bad or unparsable responses
+    for retry_count in range(1, max_retries + 1):
+        try:
+            llm_response_str = await engine.generate(
+                user_prompt=user_prompt, system_prompt="", tag=task_id, refresh_cache=retry_count > 1
             )
-        cleaning_success = True
-    except Exception as e:
-        logger.error(f"Article cleaning failed for {target_model}: {e}")
-        cleaning_success = False
+            llm_output_json = parse_judge_response(llm_response_str, criteria_map[prompt])
+            break
+        except Exception as e:
+            if retry_count < max_retries:
+                logger.warning(f"ID {task_id}: Retry {retry_count}/{max_retries} - {str(e)}")
+                await asyncio.sleep(1.5 ** retry_count)
+            else:
+                logger.error(f"ID {task_id}: Failed after {max_retries} retries - {str(e)}")
+
+    pbar.update(1)
+    if llm_output_json is None:
+        return failed_result(task_id, prompt, max_retries, llm_response_str)
+
+    return build_final_result(task_id, prompt, llm_output_json, criteria_map[prompt], language)
+
+async def score_tasks_async(tasks_to_process, target_articles_map, reference_articles_map, criteria_map,
+                            llm_client, engine_kwargs, target_model, on_result=None, total=None, max_pending=None):
+    """Score all tasks, of any language, concurrently; the engine decides how many requests are in flight
+
+    tasks_to_process may be a list or a blocking iterator of tasks. With
+    max_pending set, at most that many tasks are started but unfinished, so an
+    iterator is read only as fast as its tasks are scored.
+    """
+    engine = AsyncLLMEngine(llm_client, **engine_kwargs)
+    slots = asyncio.Semaphore(max_pending) if max_pending else None
 
+    async def score(task):
+        try:
+            result = await process_single_item_async(
+                task,
+                target_articles_map,
+                reference_articles_map,
+                criteria_map,
+                engine,
+                pbar,
+                MAX_RETRIES,
+                task.get('language')
+            )
+        finally:
+            if slots:
+                slots.release()
+        if on_result:
+            on_result(result)
+        return result
+
+    if total is None:
+        total = len(tasks_to_process)
+    tasks_iter = iter(tasks_to_process)
+    scoring = []
+    with tqdm(total=total, desc=f"Scoring {target_model}") as pbar:
+        while True:
+            if slots:
+                await slots.acquire()
+            # The iterator may block (e.g. waiting for article cleaning), so read it off the event loop
+            task = await asyncio.to_thread(next, tasks_iter, None)
+            if task is None:
+                break
+            scoring.append(asyncio.create_task(score(task)))
+        results = await asyncio.gather(*scoring)
+    return results, engine
+
+def write_latency_records(engine, latency_file, language_by_id):
+    """Append the engine's per-request latency records, tagged with task IDs, to latency_file"""
+    with open(latency_file, 'a', encoding='utf-8') as f:
+        for record in engine.records:
+            language = language_by_id.get(record["tag"])
+            f.write(json.dumps({"language": language, **record}, ensure_ascii=False) + '\n')
+
+def score_tasks_threaded(tasks_to_process, target_articles_map, reference_articles_map, criteria_map,
+                         llm_client, max_workers, target_model, on_result=None, total=None, max_pending=None):
+    """Score all tasks, of any language, on one fixed-size thread pool
+
+    tasks_to_process may be a list or a blocking iterator of tasks; max_pending
+    bounds the tasks submitted but unfinished, as in score_tasks_async.
+    """
+    lock = threading.Lock()
+    results_list = []
+    slots = threading.Semaphore(max_pending) if max_pending else None
+
+    def score(task):
+        try:
+            result = process_single_item(
+                task,
+                target_articles_map,
+                reference_articles_map,
+                criteria_map,
+                llm_client,
+                lock,
+                pbar,
+                MAX_RETRIES,
+                task.get('language')
+            )
+        finally:
+            if slots:
+                slots.release()
+        if result:
+            with lock:
+                results_list.append(result)
+            if on_result:
+                on_result(result)
     
-    if not cleaning_success:
-        logger.error(f"Article cleaning failed for {target_model}, cannot continue.")
-        return None
+    if total is None:
+        total = len(tasks_to_process)
+    with tqdm(total=total, desc=f"Scoring {target_model}") as pbar:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = []
+            for task in tasks_to_process:
+                if slots:
+                    slots.acquire()
+                futures.append(executor.submit(score, task))
+            
+            for future in concurrent.futures.as_completed(futures):
+                future.result()
+    return results_list
+
+def stream_cleaned_tasks(tasks, cleaned_articles, target_articles_map):
+    """Yield tasks as their cleaned articles arrive, adding each article to target_articles_map
+
+    Tasks whose article could not be cleaned are still yielded, so they fail
+    with "Target article not found" like any task without a cleaned article.
+    """
+    pending = {str(task.get('id')): task for task in tasks}
+    for article in cleaned_articles:
+        task = pending.pop(str(article.get('id')), None)
+        if task is None:
+            continue
+        if "error" not in article:
+            target_articles_map[task.get('prompt')] = article
+        yield task
+    # Tasks without a raw article never come out of the cleaner
+    yield from pending.values()
+
+def load_rows_by_prompt(file_path, prompts):
+    """Map each prompt to its row in an indexed JSONL file, skipping prompts without one"""
+    with JsonlStore(file_path) as store:
+        rows = {prompt: store.get_by_prompt(prompt) for prompt in prompts}
+    return {prompt: row for prompt, row in rows.items() if row is not None}
+
+def select_tasks(query_file, languages, limit, skip_ids):
+    """Pick the first `limit` tasks of each language, minus those whose IDs are in skip_ids"""
+    tasks_by_language = {language: [] for language in languages}
+    for task in iter_jsonl(query_file):
+        language_tasks = tasks_by_language.get(task.get('language'))
+        if language_tasks is not None and (limit is None or limit <= 0 or len(language_tasks) < limit):
+            language_tasks.append(task)
+
+    pending_tasks = []
+    for language, tasks in tasks_by_language.items():
+        pending = [task for task in tasks if task.get('id') not in skip_ids]
+        if pending:
+            logger.info(f"{len(tasks) - len(pending)} of {len(tasks)} {LANGUAGE_NAMES[language]} tasks already completed")
+        else:
+            logger.info(f"All {LANGUAGE_NAMES[language]} tasks have been processed already. Skipping.")
+        pending_tasks.extend(pending)
+    return pending_tasks
+
+def evaluate_tasks(tasks, target_model, llm_client, clean_agent,
+                   raw_data_dir, cleaned_data_dir, max_workers, limit, query_file,
+                   async_engine_kwargs=None, latency_file=None, on_result=None, skip_cleaning=False,
+                   pipeline_queue_size=None):
+    """Clean, load and score tasks of both languages through one scheduler
+
+    Chinese and English tasks share one work queue, so the tail of one language
+    overlaps with the other, and one concurrency and rate budget: an
+    AsyncLLMEngine built from async_engine_kwargs, or a thread pool of
+    max_workers. Criteria and reference files are read once for all tasks.
+    on_result is called with each result as soon as it is ready.
+
+    With pipeline_queue_size set, cleaning and scoring run as a pipeline: each
+    article is scored as soon as it is cleaned, with at most pipeline_queue_size
+    cleaned articles waiting on top of the tasks being scored.
+    """
+    language_by_id = {str(task.get('id')): task.get('language') for task in iter_jsonl(query_file)}
+    pipelined = pipeline_queue_size is not None and not skip_cleaning
+
+    # Step 1: Clean target model articles if needed, each with its own language's prompt
+    if skip_cleaning:
+        logger.info("Skipping article cleaning step.")
+    elif pipelined:
+        logger.info(f"Cleaning {target_model} articles in a pipeline with scoring (queue size {pipeline_queue_size})")
+    else:
+        logger.info(f"Checking if {target_model} articles need cleaning...")
+        try:
+            article_cleaner = ArticleCleaner(clean_agent)
+            article_cleaner.clean_articles(
+                target_model, 
+                raw_data_dir, 
+                cleaned_data_dir, 
+                max_workers,
+                MAX_RETRIES,
+                limit,
+                language_by_id=language_by_id
+                )
+        except Exception as e:
+            logger.error(f"Article cleaning failed for {target_model}, cannot continue: {e}")
+            return None
     
     # Step 2: Load data for scoring
-    logger.info(f"Loading {language} data from {query_file}...")
-    
     try:
-        all_tasks = load_jsonl(query_file)
-        all_tasks = [task for task in all_tasks if task.get('language') == language]
-            
-        # Apply limit if specified
-        if limit is not None and limit > 0:
-            all_tasks = all_tasks[:limit]
-            
-        # Get prompts from tasks
-        task_prompts = {task['prompt'] for task in all_tasks if 'prompt' in task}
+        task_prompts = {task['prompt'] for task in tasks if 'prompt' in task}
         
-        # Load criteria data
-        all_criteria = load_jsonl(CRITERIA_FILE)
-        criteria_list = [c for c in all_criteria if c.get('prompt') in task_prompts]
-            
-        # Load target model articles
+        # Look up only the pending tasks' rows through the prompt indexes
         target_file = os.path.join(cleaned_data_dir, f"{target_model}.jsonl")
-        all_target_articles = load_jsonl(target_file)
-        target_articles_list = [a for a in all_target_articles if a.get('prompt') in task_prompts]
-        if not target_articles_list:
-            logger.error(f"No target articles found for model {target_model} in {language}")
-            return None
-            
-        # Load reference articles
-        all_reference_articles = load_jsonl(REFERENCE_FILE)
-        reference_articles_list = [a for a in all_reference_articles if a.get('prompt') in task_prompts]
-            
-        # Build mappings
-        criteria_map = {item['prompt']: item for item in criteria_list}
-        target_articles_map = {item['prompt']: item for item in target_articles_list}
-        reference_articles_map = {item['prompt']: item for item in reference_articles_list}
+        criteria_map = load_rows_by_prompt(CRITERIA_FILE, task_prompts)
+        if pipelined:
+            # Filled in by stream_cleaned_tasks as articles are cleaned
+            target_articles_map = {}
+        else:
+            target_articles_map = load_rows_by_prompt(target_file, task_prompts)
+            if not target_articles_map:
+                logger.error(f"No target articles found for model {target_model}")
+                return None
+        reference_articles_map = load_rows_by_prompt(REFERENCE_FILE, task_prompts)
         
         # Check for missing data
-        for task in all_tasks:
+        for task in tasks:
             prompt = task.get('prompt')
             if prompt not in criteria_map:
                 logger.warning(f"No criteria found for task prompt: {prompt[:50]}...")
-            if prompt not in target_articles_map:
+            if not pipelined and prompt not in target_articles_map:
                 logger.warning(f"No target article found for task prompt: {prompt[:50]}...")
             if prompt not in reference_articles_map:
                 logger.warning(f"No reference article found for task prompt: {prompt[:50]}...")
                 
         # Filter out tasks with missing data
-        tasks_to_process = [task for task in all_tasks 
+        tasks_to_process = [task for task in tasks 
                            if task.get('prompt') in criteria_map
-                           and task.get('prompt') in target_articles_map
+                           and (pipelined or task.get('prompt') in target_articles_map)
                            and task.get('prompt') in reference_articles_map]
         
         if not tasks_to_process:
-            logger.error(f"No complete task data found for {language}")
+            logger.error("No complete task data found")
             return None
             
-        logger.info(f"Processing {len(tasks_to_process)} {language} tasks...")
+        logger.info(f"Processing {len(tasks_to_process)} tasks...")
         
     except Exception as e:
         logger.error(f"Error loading data: {str(e)}")
         return None
     
     # Step 3: Process each task and generate scores
-    lock = threading.Lock()
-    results_list = []
-    
-    with tqdm(total=len(tasks_to_process), desc=f"Scoring {language} {target_model}") as pbar:
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = [
-                executor.submit(
-                    process_single_item,
-                    task,
-                    target_articles_map,
-                    reference_articles_map,
-                    criteria_map,
-                    llm_client,
-                    lock,
-                    pbar,
-                    MAX_RETRIES,
-                    language
-                )
-                for task in tasks_to_process
-            ]
-            
-            for future in concurrent.futures.as_completed(futures):
-                result = future.result()
-                if result:
-                    results_list.append(result)
+    scoring_tasks = tasks_to_process
+    max_pending = None
+    if pipelined:
+        article_cleaner = ArticleCleaner(clean_agent)
+        cleaned_articles = article_cleaner.iter_cleaned_articles(
+            target_model,
+            raw_data_dir,
+            cleaned_data_dir,
+            [task.get('id') for task in tasks_to_process],
+            max_workers,
+            MAX_RETRIES,
+            language_by_id=language_by_id,
+            queue_size=pipeline_queue_size
+        )
+        scoring_tasks = stream_cleaned_tasks(tasks_to_process, cleaned_articles, target_articles_map)
+        scoring_concurrency = async_engine_kwargs["max_concurrency"] if async_engine_kwargs is not None else max_workers
+        max_pending = scoring_concurrency + pipeline_queue_size
+
+    if async_engine_kwargs is not None:
+        results_list, engine = asyncio.run(score_tasks_async(
+            scoring_tasks, target_articles_map, reference_articles_map, criteria_map,
+            llm_client, async_engine_kwargs, target_model, on_result,
+            total=len(tasks_to_process), max_pending=max_pending
+        ))
+        logger.info(f"Scoring requests: {engine.summary()}")
+        if latency_file:
+            write_latency_records(engine, latency_file, {task.get('id'): task.get('language') for task in tasks_to_process})
+    else:
+        results_list = score_tasks_threaded(
+            scoring_tasks, target_articles_map, reference_articles_map, criteria_map,
+            llm_client, max_workers, target_model, on_result,
+            total=len(tasks_to_process), max_pending=max_pending
+        )
     
     successful_results = [res for res in results_list if "error" not in res]
-    
-    logger.info(f"{language} evaluation complete. Successfully scored {len(successful_results)} "
-                 f"out of {len(tasks_to_process)} tasks.")
+    for language in LANGUAGE_NAMES:
+        language_ids = {task.get('id') for task in tasks_to_process if task.get('language') == language}
+        if language_ids:
+            scored = sum(1 for res in successful_results if res.get('id') in language_ids)
+            logger.info(f"{LANGUAGE_NAMES[language]} evaluation complete. Successfully scored {scored} "
+                        f"out of {len(language_ids)} tasks.")
     
     return successful_results
 
@@ -330,7 +579,7 @@ def main():
     parser.add_argument('--skip_cleaning', action='store_true', help='Skip article cleaning step.')
     parser.add_argument('--only_zh', action='store_true', help='Only process Chinese data.')
     parser.add_argument('--only_en', action='store_true', help='Only process English data.')
-    parser.add_argument('--force', action='store_true', help='Force re-evaluation even if results exist.')
+    parser.add_argument('--force', action='store_true', help='Force re-evaluation even if results exist; cached judge responses are ignored and overwritten.')
     
     # Add only the parameters that need to be configurable via command line
     parser.add_argument('--raw_data_dir', type=str, default="data/test_data/raw_data", help='Directory containing raw data.')
@@ -338,6 +587,14 @@ def main():
     parser.add_argument('--max_workers', type=int, default=5, help='Maximum number of worker threads.')
     parser.add_argument('--query_file', type=str, default="data/prompt_data/query.jsonl", help='Path to query file with language information.')
     parser.add_argument('--output_dir', type=str, default="results", help='Directory for output results.')
+    parser.add_argument('--no_llm_cache', action='store_true', help='Bypass the persistent LLM response cache.')
+    parser.add_argument('--async_scoring', action='store_true', help='Score with the asyncio engine (rate limits and adaptive concurrency) instead of a thread pool.')
+    parser.add_argument('--rpm', type=int, default=60, help='Requests per minute budget for async scoring.')
+    parser.add_argument('--tpm', type=int, default=1000000, help='Input tokens per minute budget for async scoring.')
+    parser.add_argument('--pipeline', action='store_true', help='Score each article as soon as it is cleaned instead of cleaning all articles first.')
+    parser.add_argument('--pipeline_queue_size', type=int, default=10, help='Cleaned articles that may wait for scoring in --pipeline mode.')
+    parser.add_argument('--n_boot', type=int, default=1000, help='Bootstrap resamples for the confidence intervals in the summary; 0 disables them.')
+    parser.add_argument('--max_concurrency', type=int, default=32, help='Upper bound on concurrent requests for async scoring; starts at --max_workers.')
 
     args = parser.parse_args()
 
@@ -353,168 +610,88 @@ def main():
     max_workers = args.max_workers
     query_file = args.query_file
     output_dir = args.output_dir
+    async_engine_kwargs = None
+    if args.async_scoring:
+        async_engine_kwargs = {
+            "requests_per_minute": args.rpm,
+            "tokens_per_minute": args.tpm,
+            "initial_concurrency": max_workers,
+            "max_concurrency": max(args.max_concurrency, max_workers),
+        }
     
     os.makedirs(output_dir, exist_ok=True)
     
-    # check if the results file exists
     output_file = os.path.join(output_dir, "raw_results.jsonl")
     result_file = os.path.join(output_dir, "race_result.txt")
-    existing_results = []
-    existing_ids = set()
-    
-    if os.path.exists(output_file) and not force:
-        try:
-            existing_results = load_jsonl(output_file)
-            existing_ids = {r.get('id') for r in existing_results if r.get('id')}
-            logger.info(f"Found existing results file with {len(existing_results)} entries")
-            
-            # if limit is specified and the number of existing results is greater than or equal to limit, return
-            if limit is not None and len(existing_results) >= limit:
-                logger.info(f"Existing results ({len(existing_results)}) meet or exceed limit ({limit}). Skipping evaluation.")
-                
-                # calculate and print the average scores of the existing results
-                successful_results = [r for r in existing_results if "error" not in r]
-                if successful_results:
-                    comprehensiveness_avg = sum(r.get("comprehensiveness", 0) for r in successful_results) / len(successful_results)
-                    insight_avg = sum(r.get("insight", 0) for r in successful_results) / len(successful_results)
-                    instruction_following_avg = sum(r.get("instruction_following", 0) for r in successful_results) / len(successful_results)
-                    readability_avg = sum(r.get("readability", 0) for r in successful_results) / len(successful_results)
-                    overall_avg = sum(r.get("overall_score", 0) for r in successful_results) / len(successful_results)
-                    
-                    logger.info("\n=== Existing Evaluation Results Summary ===")
-                    logger.info(f"Comprehensiveness:      {comprehensiveness_avg:.4f}")
-                    logger.info(f"Insight:                {insight_avg:.4f}")
-                    logger.info(f"Instruction Following:  {instruction_following_avg:.4f}")
-                    logger.info(f"Readability:            {readability_avg:.4f}")
-                    logger.info(f"Overall Score:          {overall_avg:.4f}")
-                    logger.info("================================")
-                
-                return
-        except Exception as e:
-            logger.warning(f"Error reading existing results file: {e}. Will create new results.")
-            existing_results = []
-            existing_ids = set()
+    latency_file = os.path.join(output_dir, "scoring_latency.jsonl")
+    summary_file = os.path.join(output_dir, "race_summary.json")
+
+    if force and os.path.exists(output_file):
+        logger.info(f"--force given, discarding existing results in {output_file}")
+        os.remove(output_file)
+
+    # Results are appended as tasks complete, so a rerun resumes from the completed task IDs
+    completed_ids = set()
+    if os.path.exists(output_file):
+        with JsonlStore(output_file) as store:
+            completed_ids = store.ids()
+        logger.info(f"Found existing results file with {len(completed_ids)} completed tasks, which will be skipped")
     
-    llm_client = AIClient()
+    # A forced rerun asks the judge again rather than replaying its cached verdicts
+    llm_client = AIClient(use_cache=not args.no_llm_cache, refresh_cache=force)
     clean_agent = llm_client
-    
-    all_results = list(existing_results)  # initialize with existing results
-    
-    # load all tasks, filter out the processed task IDs
-    all_tasks = load_jsonl(query_file)
-    if existing_ids:
-        logger.info(f"Will skip {len(existing_ids)} already processed task IDs")
-    
-    # chinese data processing
-    if not only_en:
-        logger.info("Starting Chinese data processing...")
-        if not skip_cleaning:
-            # filter out the processed chinese tasks
-            zh_tasks = [task for task in all_tasks if task.get('language') == 'zh' and task.get('id') not in existing_ids]
-            if not zh_tasks:
-                logger.info("All Chinese tasks have been processed already. Skipping.")
-            elif limit is not None:
-                # if limit is specified, consider the number of existing results and new tasks
-                existing_zh_count = len([r for r in existing_results if r.get('prompt', '').strip() and 
-                                       any(t.get('prompt') == r.get('prompt') and t.get('language') == 'zh' 
-                                           for t in all_tasks)])
-                remaining_limit = max(0, limit - existing_zh_count)
-                if remaining_limit > 0:
-                    logger.info(f"Processing up to {remaining_limit} more Chinese tasks (limit: {limit}, already processed: {existing_zh_count})")
-                    zh_results = process_language_data(
-                        "zh", target_model, llm_client, clean_agent,
-                        raw_data_dir, cleaned_data_dir, max_workers, remaining_limit, query_file
-                    )
-                    if zh_results:
-                        all_results.extend(zh_results)
-                else:
-                    logger.info(f"Already reached limit for Chinese tasks ({existing_zh_count}/{limit}). Skipping.")
-            else:
-                # if limit is not specified, process all unprocessed tasks
-                zh_results = process_language_data( 
-                    "zh", target_model, llm_client, clean_agent,
-                    raw_data_dir, cleaned_data_dir, max_workers, limit, query_file
-                )
-                if zh_results:
-                    all_results.extend(zh_results)
-        else:
-            logger.info("Skipping article cleaning step for Chinese data.")
 
-    # english data processing
+    languages = []
+    if not only_en:
+        languages.append("zh")
     if not only_zh:
-        logger.info("Starting English data processing...")
-        if not skip_cleaning:
-            # filter out the processed english tasks
-            en_tasks = [task for task in all_tasks if task.get('language') == 'en' and task.get('id') not in existing_ids]
-            if not en_tasks:
-                logger.info("All English tasks have been processed already. Skipping.")
-            elif limit is not None:
-                # if limit is specified, consider the number of existing results and new tasks
-                existing_en_count = len([r for r in existing_results if r.get('prompt', '').strip() and 
-                                       any(t.get('prompt') == r.get('prompt') and t.get('language') == 'en' 
-                                           for t in all_tasks)])
-                remaining_limit = max(0, limit - existing_en_count)
-                if remaining_limit > 0:
-                    logger.info(f"Processing up to {remaining_limit} more English tasks (limit: {limit}, already processed: {existing_en_count})")
-                    en_results = process_language_data(
-                        "en", target_model, llm_client, clean_agent,
-                        raw_data_dir, cleaned_data_dir, max_workers, remaining_limit, query_file
-                    )
-                    if en_results:
-                        all_results.extend(en_results)
-                else:
-                    logger.info(f"Already reached limit for English tasks ({existing_en_count}/{limit}). Skipping.")
-            else:
-                # if limit is not specified, process all unprocessed tasks
-                en_results = process_language_data(
-                    "en", target_model, llm_client, clean_agent,
-                    raw_data_dir, cleaned_data_dir, max_workers, limit, query_file
-                )
-                if en_results:
-                    all_results.extend(en_results)
-        else:
-            logger.info("Skipping article cleaning step for English data.")
+        languages.append("en")
+
+    pending_tasks = select_tasks(query_file, languages, limit, completed_ids)
+
+    with JsonlAppender(output_file) as appender:
+        def save_result(result):
+            if "error" not in result:
+                appender.append(result)
+
+        if pending_tasks:
+            logger.info(f"Starting evaluation of {len(pending_tasks)} tasks ({', '.join(LANGUAGE_NAMES[l] for l in languages)})...")
+            evaluate_tasks(
+                pending_tasks, target_model, llm_client, clean_agent,
+                raw_data_dir, cleaned_data_dir, max_workers, limit, query_file,
+                async_engine_kwargs, latency_file,
+                on_result=save_result, skip_cleaning=skip_cleaning,
+                pipeline_queue_size=args.pipeline_queue_size if args.pipeline else None
+            )
     
-    # output results to file
-    if all_results:
-        # sort by ID
-        all_results.sort(key=lambda x: x.get('id', float('inf')))
+    # Compact the append log into one row per task, sorted by ID
+    all_results = compact_jsonl(output_file, key="id", sort_key=lambda x: x.get('id', float('inf')))
+    logger.info(f"Saved {len(all_results)} results to {output_file}")
+
+    race_scores = RaceScores.from_rows(all_results, target_model, load_query_languages(query_file))
+    if len(race_scores):
+        summary = summarize_scores(race_scores, n_boot=args.n_boot)
         
-        logger.info(f"Saving {len(all_results)} results to {output_file}...")
+        logger.info("\n=== Evaluation Results Summary ===")
+        for line in format_summary(summary):
+            logger.info(line)
+        for language, language_summary in summary["by_language"].items():
+            logger.info(f"--- {LANGUAGE_NAMES.get(language, language)} ({language_summary['n']} tasks) ---")
+            for line in format_summary(language_summary):
+                logger.info(line)
+        if summary["ci"]:
+            logger.info(f"(brackets: {summary['confidence']:.0%} bootstrap confidence intervals, {summary['n_boot']} resamples)")
+        logger.info("================================")
+
+        # write the results to the result file
         try:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                for result in all_results:
-                    f.write(json.dumps(result, ensure_ascii=False) + '\n')
-            logger.info("Results saved successfully.")
-            
-            # calculate and print the average scores
-            successful_results = [r for r in all_results if "error" not in r]
-            if successful_results:
-
-                comprehensiveness_avg = sum(r.get("comprehensiveness", 0) for r in successful_results) / len(successful_results)
-                insight_avg = sum(r.get("insight", 0) for r in successful_results) / len(successful_results)
-                instruction_following_avg = sum(r.get("instruction_following", 0) for r in successful_results) / len(successful_results)
-                readability_avg = sum(r.get("readability", 0) for r in successful_results) / len(successful_results)
-                overall_avg = sum(r.get("overall_score", 0) for r in successful_results) / len(successful_results)
-                
-                logger.info("\n=== Evaluation Results Summary ===")
-                logger.info(f"Comprehensiveness:      {comprehensiveness_avg:.4f}")
-                logger.info(f"Insight:                {insight_avg:.4f}")
-                logger.info(f"Instruction Following:  {instruction_following_avg:.4f}")
-                logger.info(f"Readability:            {readability_avg:.4f}")
-                logger.info(f"Overall Score:          {overall_avg:.4f}")
-                logger.info("================================")
-
-                # write the results to the result file
-                with open(result_file, 'w', encoding='utf-8') as f:
-                    f.write(f"Comprehensiveness: {comprehensiveness_avg:.4f}\n")
-                    f.write(f"Insight: {insight_avg:.4f}\n")
-                    f.write(f"Instruction Following: {instruction_following_avg:.4f}\n")
-                    f.write(f"Readability: {readability_avg:.4f}\n")
-                    f.write(f"Overall Score: {overall_avg:.4f}\n")
-
+            with open(result_file, 'w', encoding='utf-8') as f:
+                for dim in DIMENSIONS:
+                    f.write(f"{DIMENSION_LABELS[dim]}: {summary['mean'][dim]:.4f}\n")
+            with open(summary_file, 'w', encoding='utf-8') as f:
+                json.dump(summary, f, ensure_ascii=False, indent=2)
         except IOError as e:
-            logger.error(f"Failed to write results to {output_file}: {e}")
+            logger.error(f"Failed to write results to {result_file}: {e}")
     else:
         logger.warning("No results to save.")
     
@@ -522,6 +699,12 @@ def main():
     logger.info(f"Target model: {target_model}")
     logger.info(f"Total tasks processed: {len(all_results)}")
     logger.info(f"Results file: {output_file}")
+    extraction_stats = EXTRACTION_STATS.summary()
+    if extraction_stats["responses"]:
+        repaired = extraction_stats["repaired"] + extraction_stats["rebuilt"]
+        logger.info(f"Judge responses: {extraction_stats['responses']}, repaired {repaired} "
+                    f"({extraction_stats['repair_rate']:.1%}) {extraction_stats['repairs']}, "
+                    f"unparsable {extraction_stats['failed']}, judge retries avoided {extraction_stats['retries_avoided']}")
     logger.info("-------------------")
 
 if __name__ == "__main__":
@@ -21,6 +21,12 @@ QUERY_DATA_PATH="data/prompt_data/query.jsonl"
 # Force re-evaluation even if results exist. Uncomment to enable
 # FORCE="--force"
 
+# Score with the asyncio engine under request/token per-minute budgets. Uncomment to enable
+# ASYNC_SCORING="--async_scoring --rpm 150 --tpm 2000000 --max_concurrency 32"
+
+# Score each article as soon as it is cleaned instead of after all cleaning. Uncomment to enable
+# PIPELINE="--pipeline --pipeline_queue_size 10"
+
 # Specify log output file
 OUTPUT_LOG_FILE="output.log"
 
@@ -61,6 +67,14 @@ for TARGET_MODEL in "${TARGET_MODELS[@]}"; do
     PYTHON_CMD="$PYTHON_CMD $FORCE"
   fi
 
+  if [[ -n "$ASYNC_SCORING" ]]; then
+    PYTHON_CMD="$PYTHON_CMD $ASYNC_SCORING"
+  fi
+
+  if [[ -n "$PIPELINE" ]]; then
+    PYTHON_CMD="$PYTHON_CMD $PIPELINE"
+  fi
+
   # Execute command and append stdout and stderr to single log file
   echo "Executing command: $PYTHON_CMD" | tee -a "$OUTPUT_LOG_FILE"
   eval $PYTHON_CMD >> "$OUTPUT_LOG_FILE" 2>&1
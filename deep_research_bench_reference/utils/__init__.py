@@ -1,9 +1,17 @@
-from .io_utils import load_jsonl
-from .api import AIClient, call_model, scrape_url
+from .io_utils import load_jsonl, iter_jsonl, JsonlStore
 
 __all__ = [
     'load_jsonl',
+    'iter_jsonl',
+    'JsonlStore',
     'AIClient',
     'call_model',
     'scrape_url',
 ]
+
+def __getattr__(name):
+    # Import the Gemini/Jina API lazily, so JSONL helpers work without API keys or google-genai
+    if name in ('AIClient', 'call_model', 'scrape_url'):
+        from . import api
+        return getattr(api, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
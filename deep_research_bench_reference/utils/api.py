@@ -1,10 +1,14 @@
+import json
 import os
+import threading
 from typing import Optional, Dict, Any
 from google import genai
 from google.genai import types
 import requests
 import logging
 
+from .response_cache import get_response_cache, response_cache_key
+
 
 logging.basicConfig(level=logging.WARNING)
 logger = logging.getLogger(__name__)
@@ -19,25 +23,49 @@ API_KEY = os.environ.get("GEMINI_API_KEY", "")
 READ_API_KEY = os.environ.get("JINA_API_KEY", "")
 FACT_Model = "gemini-2.5-flash"
 Model = "gemini-2.5-pro"
+DEFAULT_HTTP_OPTIONS = {'timeout': 600000}
+
+# Per-process pool of genai clients. Building a client costs tens of milliseconds and
+# each one holds its own HTTP connection pool, so clients are shared across calls and threads.
+_client_pool = {}
+_client_pool_lock = threading.Lock()
+
+def get_genai_client(api_key: str, http_options: Optional[Dict[str, Any]] = None):
+    """
+    Return a shared genai.Client for api_key and http_options, creating it on first use
+    """
+    http_options = http_options or DEFAULT_HTTP_OPTIONS
+    key = (api_key, json.dumps(http_options, sort_keys=True))
+    with _client_pool_lock:
+        # Connections must not be shared with a forked parent, so a child process starts a fresh pool
+        if _client_pool.get("pid") != os.getpid():
+            _client_pool.clear()
+            _client_pool["pid"] = os.getpid()
+        client = _client_pool.get(key)
+        if client is None:
+            client = genai.Client(api_key=api_key, http_options=http_options)
+            _client_pool[key] = client
+        return client
 
 class AIClient:
     
-    def __init__(self, api_key=API_KEY, model=Model):
+    def __init__(self, api_key=API_KEY, model=Model, use_cache=True, http_options=None, refresh_cache=False):
         self.api_key = api_key or os.environ.get("GEMINI_API_KEY")
         if not self.api_key:
             raise ValueError("Gemini API key not provided! Please set GEMINI_API_KEY environment variable.")
         
-        # Configure client
-        self.client = genai.Client(api_key=self.api_key, http_options={'timeout': 600000})
+        # Shared client from the per-process pool
+        self.client = get_genai_client(self.api_key, http_options)
         self.model = model
+        # Persistent response cache; None when bypassed here or with LLM_CACHE=0
+        self.cache = get_response_cache() if use_cache else None
+        # Ignore cached responses on every call but still store fresh ones, e.g. for a forced rerun
+        self.refresh_cache = refresh_cache
         
-    def generate(self, user_prompt: str, system_prompt: str = "", model: Optional[str] = None) -> str:
+    def _build_contents(self, user_prompt: str, system_prompt: str = ""):
         """
-        Generate text response
+        Build request content for a system and user prompt
         """
-        model_to_use = model or self.model
-        
-        # Build request content
         contents = []
         
         # Add system prompt
@@ -52,20 +80,89 @@ class AIClient:
             "role": "user", 
             "parts": [{"text": user_prompt}]
         })
+        return contents
+
+    def _generation_config(self):
+        return types.GenerateContentConfig(
+            thinking_config=types.ThinkingConfig(thinking_budget=16000)
+        )
+
+    def _cache_key(self, model, user_prompt, system_prompt, cache_variant):
+        config = self._generation_config().model_dump(mode="json", exclude_none=True)
+        return response_cache_key(model, system_prompt, user_prompt, config, cache_variant)
+
+    def cached_response(self, user_prompt: str, system_prompt: str = "", model: Optional[str] = None,
+                        cache_variant: Optional[Any] = None) -> Optional[str]:
+        """
+        Return the cached response for a request, or None, without calling the model
+        """
+        if self.cache is None or self.refresh_cache:
+            return None
+        return self.cache.get(self._cache_key(model or self.model, user_prompt, system_prompt, cache_variant))
+
+    def generate(self, user_prompt: str, system_prompt: str = "", model: Optional[str] = None,
+                 refresh_cache: bool = False, cache_variant: Optional[Any] = None) -> str:
+        """
+        Generate text response
+
+        Args:
+            user_prompt: User prompt
+            system_prompt: System prompt
+            model: Model overriding the client's default
+            refresh_cache: Skip the cached response and overwrite it, e.g. when retrying
+                after the cached response turned out to be unusable
+            cache_variant: Cache key suffix for deliberately sampling the same prompt several times
+        """
+        model_to_use = model or self.model
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self._cache_key(model_to_use, user_prompt, system_prompt, cache_variant)
+            cached = None if refresh_cache or self.refresh_cache else self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        contents = self._build_contents(user_prompt, system_prompt)
         
         try:
             response = self.client.models.generate_content(
                 model=model_to_use,
                 contents=contents,
-                config=types.GenerateContentConfig(
-                    thinking_config=types.ThinkingConfig(thinking_budget=16000)
-                )
+                config=self._generation_config()
             )
-            
-            return response.text
-            
         except Exception as e:
-            raise Exception(f"Failed to generate content: {str(e)}")
+            raise Exception(f"Failed to generate content: {str(e)}") from e
+
+        if cache_key is not None and response.text:
+            self.cache.put(cache_key, response.text, model_to_use)
+        return response.text
+
+    async def agenerate(self, user_prompt: str, system_prompt: str = "", model: Optional[str] = None,
+                        refresh_cache: bool = False, cache_variant: Optional[Any] = None) -> str:
+        """
+        Generate text response without blocking the event loop; arguments as in generate
+        """
+        model_to_use = model or self.model
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self._cache_key(model_to_use, user_prompt, system_prompt, cache_variant)
+            cached = None if refresh_cache or self.refresh_cache else self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        contents = self._build_contents(user_prompt, system_prompt)
+        
+        try:
+            response = await self.client.aio.models.generate_content(
+                model=model_to_use,
+                contents=contents,
+                config=self._generation_config()
+            )
+        except Exception as e:
+            raise Exception(f"Failed to generate content: {str(e)}") from e
+
+        if cache_key is not None and response.text:
+            self.cache.put(cache_key, response.text, model_to_use)
+        return response.text
 
 class WebScrapingJinaTool:
     def __init__(self, api_key: str = None):
@@ -110,9 +207,10 @@ jina_tool = WebScrapingJinaTool()
 def scrape_url(url: str) -> Dict[str, Any]:
     return jina_tool(url)
     
-def call_model(user_prompt: str) -> str:
+def call_model(user_prompt: str, refresh_cache: bool = False) -> str:
+    # Cheap: the underlying genai client comes from the per-process pool
     client = AIClient(model=FACT_Model)
-    return client.generate(user_prompt)
+    return client.generate(user_prompt, refresh_cache=refresh_cache)
 
 if __name__ == "__main__":
     url = ""
@@ -0,0 +1,206 @@
+import asyncio
+import logging
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text):
+    """Rough token estimate: ~4 ASCII characters per token, one token per CJK character"""
+    if not text:
+        return 0
+    ascii_chars = sum(1 for char in text if ord(char) < 128)
+    return ascii_chars // 4 + (len(text) - ascii_chars) + 1
+
+
+def is_rate_limit_error(error):
+    """Check if error (or the error it wraps) is a 429 / quota error"""
+    while error is not None:
+        if getattr(error, 'code', None) == 429 or getattr(error, 'status_code', None) == 429:
+            return True
+        error_str = str(error)
+        if "429" in error_str or "RESOURCE_EXHAUSTED" in error_str:
+            return True
+        error = error.__cause__
+    return False
+
+
+class TokenBucket:
+    """
+    Async token bucket refilled continuously at a per-minute rate
+
+    Args:
+        rate_per_minute: Units (requests or tokens) granted per minute
+        burst_seconds: Bucket capacity, in seconds of refill; bounds the initial burst
+    """
+    def __init__(self, rate_per_minute, burst_seconds=10):
+        self.refill_per_second = rate_per_minute / 60
+        self.capacity = max(1.0, self.refill_per_second * burst_seconds)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_second)
+        self.updated = now
+
+    async def acquire(self, amount=1):
+        """Wait until amount units are available, then take them. Waiters are served in order."""
+        # A single request larger than the bucket is admitted once the bucket is full
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            self._refill()
+            while self.tokens < amount:
+                await asyncio.sleep((amount - self.tokens) / self.refill_per_second)
+                self._refill()
+            self.tokens -= amount
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD concurrency limit: grows by one after a full window of successes, halves on 429
+
+    Args:
+        initial: Starting number of concurrent requests
+        maximum: Upper bound on concurrent requests
+        minimum: Lower bound on concurrent requests
+        cooldown: Seconds after a decrease during which further 429s don't shrink the limit,
+            so one burst of rejections halves the limit only once
+    """
+    def __init__(self, initial=4, maximum=32, minimum=1, cooldown=5.0):
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.minimum = minimum
+        self.maximum = maximum
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self, rate_limited=False):
+        async with self._condition:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if rate_limited:
+                if now - self._last_decrease >= self.cooldown:
+                    self.limit = max(self.minimum, self.limit / 2)
+                    self._last_decrease = now
+                    logger.info(f"Rate limited, concurrency reduced to {int(self.limit)}")
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+
+class RateLimitExhausted(Exception):
+    """Raised when a request is still rate limited after all rate-limit retries"""
+
+
+class AsyncLLMEngine:
+    """
+    Asyncio front end for AIClient that respects request and token quotas
+
+    Requests pass a requests-per-minute and a tokens-per-minute bucket, then an
+    adaptive concurrency limit. 429 responses shrink the concurrency limit and are
+    retried with backoff; they don't count as judge failures. Every attempt's
+    latency is recorded in self.records.
+
+    Args:
+        client: AIClient (anything with an async agenerate method)
+        requests_per_minute: Request quota
+        tokens_per_minute: Input token quota, using estimate_tokens
+        initial_concurrency: Starting concurrency limit
+        max_concurrency: Upper bound for the concurrency limit
+        max_rate_limit_retries: Retries for a single request that keeps getting 429s
+    """
+    def __init__(self, client, requests_per_minute=60, tokens_per_minute=1000000,
+                 initial_concurrency=4, max_concurrency=32, max_rate_limit_retries=8):
+        self.client = client
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.concurrency = AdaptiveConcurrency(initial_concurrency, max_concurrency)
+        self.max_rate_limit_retries = max_rate_limit_retries
+        self.records = []
+
+    async def generate(self, user_prompt, system_prompt="", tag=None, refresh_cache=False):
+        """
+        Generate a response under the engine's rate and concurrency limits
+
+        Args:
+            user_prompt: User prompt
+            system_prompt: System prompt
+            tag: Label stored with the latency records, e.g. the task ID
+            refresh_cache: Passed to the client; cached responses are otherwise
+                served without using any rate or concurrency budget
+
+        Returns:
+            Response text
+        """
+        if not refresh_cache and hasattr(self.client, "cached_response"):
+            cached = self.client.cached_response(user_prompt=user_prompt, system_prompt=system_prompt)
+            if cached is not None:
+                self.records.append({"tag": tag, "status": "cached", "latency": 0.0, "prompt_tokens": 0,
+                                     "concurrency_limit": int(self.concurrency.limit)})
+                return cached
+
+        prompt_tokens = estimate_tokens(system_prompt) + estimate_tokens(user_prompt)
+
+        for attempt in range(self.max_rate_limit_retries + 1):
+            await self.token_bucket.acquire(prompt_tokens)
+            await self.request_bucket.acquire(1)
+            await self.concurrency.acquire()
+            start = time.monotonic()
+            rate_limited = False
+            try:
+                response = await self.client.agenerate(
+                    user_prompt=user_prompt, system_prompt=system_prompt, refresh_cache=refresh_cache
+                )
+                self._record(tag, start, "ok", prompt_tokens)
+                return response
+            except Exception as e:
+                rate_limited = is_rate_limit_error(e)
+                self._record(tag, start, "rate_limited" if rate_limited else "error", prompt_tokens)
+                if not rate_limited:
+                    raise
+            finally:
+                await self.concurrency.release(rate_limited)
+
+            # Back off outside the concurrency slot, with jitter so retries don't realign
+            await asyncio.sleep(min(60, 2 ** attempt) * (0.5 + random.random()))
+
+        raise RateLimitExhausted(f"Still rate limited after {self.max_rate_limit_retries} retries")
+
+    def _record(self, tag, start, status, prompt_tokens):
+        self.records.append({
+            "tag": tag,
+            "status": status,
+            "latency": round(time.monotonic() - start, 3),
+            "prompt_tokens": prompt_tokens,
+            "concurrency_limit": int(self.concurrency.limit),
+        })
+
+    def summary(self):
+        """Latency percentiles and outcome counts over all recorded attempts"""
+        latencies = sorted(r["latency"] for r in self.records if r["status"] == "ok")
+
+        def percentile(p):
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+        return {
+            "requests": len(self.records),
+            "ok": len(latencies),
+            "cached": sum(1 for r in self.records if r["status"] == "cached"),
+            "rate_limited": sum(1 for r in self.records if r["status"] == "rate_limited"),
+            "errors": sum(1 for r in self.records if r["status"] == "error"),
+            "latency_p50": percentile(0.5),
+            "latency_p95": percentile(0.95),
+            "latency_max": latencies[-1] if latencies else 0.0,
+            "final_concurrency_limit": int(self.concurrency.limit),
+        }
@@ -1,15 +1,20 @@
 import json
 import os
+import queue
 import threading
 import concurrent.futures
 from tqdm import tqdm
 from prompt.clean_prompt import clean_article_prompt_zh, clean_article_prompt_en
+from utils.jsonl_store import JsonlStore, iter_jsonl
 import logging
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Marks a cleaning worker as finished in the streaming results queue
+_WORKER_DONE = object()
+
 
 class ArticleCleaner:
     def __init__(self, clean_agent):
@@ -42,7 +47,7 @@ class ArticleCleaner:
         
         for retry in range(max_retries):
             try:
-                result = self.clean_agent.generate(user_prompt=user_prompt, system_prompt="")
+                result = self.clean_agent.generate(user_prompt=user_prompt, system_prompt="", refresh_cache=retry > 0)
                 if self._is_valid_result(result):
                     return result
                 logger.warning(f"Invalid cleaning result, retry #{retry+1}")
@@ -174,7 +179,7 @@ class ArticleCleaner:
             processed_ids.add(item_id)
             
     def clean_articles(self, model, raw_data_dir, cleaned_data_dir, max_workers=5, max_retries=5, 
-                       limit=None, language="en"):
+                       limit=None, language="en", language_by_id=None):
         """
         Clean articles for a single model
         
@@ -186,6 +191,7 @@ class ArticleCleaner:
             max_retries: Maximum retry attempts
             limit: Limit on number of items to process
             language: Article language (zh or en)
+            language_by_id: Optional per-article language keyed by str(id); overrides language
         """
         # Ensure output directory exists
         os.makedirs(cleaned_data_dir, exist_ok=True)
@@ -231,7 +237,8 @@ class ArticleCleaner:
                 for item in to_process:
                     future = executor.submit(
                         self.clean_single, item, output_file, processed_ids, 
-                        file_lock, pbar_lock, pbar, max_retries=max_retries, language=language
+                        file_lock, pbar_lock, pbar, max_retries=max_retries,
+                        language=self._item_language(item, language, language_by_id)
                     )
                     futures.append(future)
                 
@@ -244,35 +251,126 @@ class ArticleCleaner:
         
         logger.info(f"=== {model} model cleaning complete, cleaned {processed_count} new articles, total of {len(processed_ids)} articles processed ===")
 
+    def iter_cleaned_articles(self, model, raw_data_dir, cleaned_data_dir, item_ids=None, max_workers=5,
+                              max_retries=5, language="en", language_by_id=None, queue_size=10):
+        """
+        Clean articles for a single model, yielding each one as soon as it is ready
+        
+        Articles already in the cleaned file are yielded first, without an API call.
+        The rest are cleaned by max_workers threads and appended to the cleaned file,
+        as clean_articles does. Finished articles wait in a queue of at most
+        queue_size, so cleaning blocks instead of running ahead when the consumer
+        falls behind.
+        
+        Args:
+            model: Model name
+            raw_data_dir: Raw data directory
+            cleaned_data_dir: Cleaned data directory
+            item_ids: IDs of the articles wanted; defaults to every raw article
+            max_workers: Maximum thread count
+            max_retries: Maximum retry attempts
+            language: Article language (zh or en)
+            language_by_id: Optional per-article language keyed by str(id); overrides language
+            queue_size: Cleaned articles that may wait for the consumer
+            
+        Yields:
+            Cleaned {"id", "prompt", "article"} rows, or {"id", "error"} for articles that could not be cleaned
+        """
+        os.makedirs(cleaned_data_dir, exist_ok=True)
+        
+        input_file = os.path.join(raw_data_dir, f"{model}.jsonl")
+        output_file = os.path.join(cleaned_data_dir, f"{model}.jsonl")
+        
+        if not os.path.exists(input_file):
+            logger.warning(f"Input file for model {model} not found: {input_file}")
+            return
+        
+        wanted_ids = None if item_ids is None else {str(item_id) for item_id in item_ids}
+        items = [item for item in iter_jsonl(input_file)
+                 if wanted_ids is None or str(item.get('id')) in wanted_ids]
+        processed_ids = self._load_processed_ids(output_file)
+        
+        # Hand over articles cleaned by earlier runs straight away
+        with JsonlStore(output_file) as store:
+            for item in items:
+                if item.get('id') in processed_ids:
+                    yield store.get_by_id(item.get('id'))
+        
+        to_process = [item for item in items if item.get('id') not in processed_ids]
+        logger.info(f"Streaming {model} articles: {len(items) - len(to_process)} already cleaned, {len(to_process)} to clean")
+        if not to_process:
+            return
+        
+        work = queue.Queue()
+        for item in to_process:
+            work.put(item)
+        results = queue.Queue(maxsize=queue_size)
+        file_lock = threading.Lock()
+        stop = threading.Event()
+        
+        def put_result(result):
+            # Block while the queue is full, but give up once the consumer has gone away
+            while not stop.is_set():
+                try:
+                    results.put(result, timeout=0.5)
+                    return
+                except queue.Full:
+                    continue
+        
+        def worker():
+            while not stop.is_set():
+                try:
+                    item = work.get_nowait()
+                except queue.Empty:
+                    break
+                result = self.clean_single(
+                    item, max_retries=max_retries,
+                    language=self._item_language(item, language, language_by_id)
+                )
+                if result and "error" not in result:
+                    self._write_result_to_file(result, output_file, file_lock, processed_ids, result["id"])
+                put_result(result or {"id": item.get('id'), "error": "Failed to clean article"})
+            put_result(_WORKER_DONE)
+        
+        workers = [threading.Thread(target=worker, daemon=True)
+                   for _ in range(min(max_workers, len(to_process)))]
+        for thread in workers:
+            thread.start()
+        
+        try:
+            with tqdm(total=len(to_process), desc=f"Cleaning {model} articles") as pbar:
+                finished_workers = 0
+                while finished_workers < len(workers):
+                    result = results.get()
+                    if result is _WORKER_DONE:
+                        finished_workers += 1
+                        continue
+                    pbar.update(1)
+                    yield result
+        finally:
+            stop.set()
+        
+        logger.info(f"=== {model} model streaming cleaning complete, total of {len(processed_ids)} articles processed ===")
+
+    def _item_language(self, item, language, language_by_id):
+        """Language of one article, falling back to the run's default language"""
+        if not language_by_id:
+            return language
+        return language_by_id.get(str(item.get('id')), language)
+
     def _load_items(self, input_file):
         """Load items from input file"""
-        all_items = []
-        with open(input_file, 'r', encoding='utf-8') as f:
-            for line in f:
-                if line.strip():
-                    try:
-                        item = json.loads(line)
-                        all_items.append(item)
-                    except json.JSONDecodeError:
-                        logger.warning(f"Error parsing JSON in input file, line: {line.strip()}")
-        return all_items
+        return list(iter_jsonl(input_file))
     
     def _load_processed_ids(self, output_file):
         """Load already processed IDs"""
         processed_ids = set()
         
-        # If output file exists, read already processed IDs
+        # If output file exists, read already processed IDs from its index
         if os.path.exists(output_file):
             logger.info(f"Found existing output file: {output_file}")
-            with open(output_file, 'r', encoding='utf-8') as f:
-                for line in f:
-                    if line.strip():
-                        try:
-                            data = json.loads(line)
-                            if 'id' in data:
-                                processed_ids.add(data['id'])
-                        except json.JSONDecodeError:
-                            logger.warning(f"Invalid JSON line in output file, skipped")
+            with JsonlStore(output_file) as store:
+                processed_ids = store.ids()
             logger.info(f"Read {len(processed_ids)} already processed records from output file")
         else:
             # Create empty file
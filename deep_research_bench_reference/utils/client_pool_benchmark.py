@@ -0,0 +1,92 @@
+"""
+Microbenchmark: per-call overhead of a fresh genai.Client vs the pooled client
+
+Calls go to a local stub of the generateContent endpoint, so the numbers show
+client construction and connection setup rather than model latency.
+
+Usage:
+    python -m utils.client_pool_benchmark --calls 200
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from google import genai
+
+from .api import FACT_Model, AIClient, DEFAULT_HTTP_OPTIONS
+
+STUB_RESPONSE = json.dumps({
+    "candidates": [{"content": {"role": "model", "parts": [{"text": "ok"}]}, "finishReason": "STOP"}]
+}).encode("utf-8")
+
+
+class StubGeminiHandler(BaseHTTPRequestHandler):
+    """Answers every POST with a minimal generateContent response, keeping connections alive"""
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(STUB_RESPONSE)))
+        self.end_headers()
+        self.wfile.write(STUB_RESPONSE)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _time_calls(call, calls):
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        call()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {
+        "mean_ms": round(statistics.mean(latencies), 2),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "max_ms": round(max(latencies), 2),
+    }
+
+
+def run_benchmark(calls=200):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubGeminiHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    http_options = {**DEFAULT_HTTP_OPTIONS, "base_url": f"http://127.0.0.1:{server.server_port}"}
+    contents = [{"role": "user", "parts": [{"text": "ping"}]}]
+
+    def fresh_client_call():
+        # Previous call_model behaviour: a new client, and connection, per call
+        client = genai.Client(api_key="benchmark", http_options=http_options)
+        client.models.generate_content(model=FACT_Model, contents=contents)
+
+    def pooled_client_call():
+        AIClient(api_key="benchmark", model=FACT_Model, use_cache=False, http_options=http_options).generate("ping")
+
+    try:
+        # Warm up imports and the pool so neither side pays one-off costs
+        fresh_client_call()
+        pooled_client_call()
+        results = {
+            "fresh_client": _time_calls(fresh_client_call, calls),
+            "pooled_client": _time_calls(pooled_client_call, calls),
+        }
+    finally:
+        server.shutdown()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure per-call genai client overhead with and without pooling")
+    parser.add_argument("--calls", type=int, default=200, help="Calls per variant")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.calls)
+    for name, stats in results.items():
+        print(f"{name:14s} mean {stats['mean_ms']:8.2f} ms   p50 {stats['p50_ms']:8.2f} ms   max {stats['max_ms']:8.2f} ms")
+    saved = results["fresh_client"]["mean_ms"] - results["pooled_client"]["mean_ms"]
+    print(f"Overhead saved per call: {saved:.2f} ms")
@@ -3,7 +3,7 @@ import json
 import os
 import argparse
 from functools import partial
-from .io_utils import load_jsonl
+from .io_utils import load_jsonl, iter_jsonl, JsonlStore
 from .api import call_model
 
 
@@ -93,7 +93,7 @@ def run(data, output_path, id_to_lang_map):
             while retries < 3:
                 retries += 1
                 try:
-                    response = call_model(user_prompt)
+                    response = call_model(user_prompt, refresh_cache=retries > 1)
                     deduped_idx = json.loads(response.replace("```json", "").replace("```", ""))
 
                     break
@@ -133,7 +133,7 @@ if __name__ == '__main__':
     raw_data = load_jsonl(args.raw_data_path)
     
     # Load the query data to get language information
-    query_data = load_jsonl(args.query_data_path)
+    query_data = iter_jsonl(args.query_data_path)
     
     # Create a mapping from ID to language
     id_to_lang_map = {item['id']: item.get('language') for item in query_data if 'id' in item and 'language' in item}
@@ -143,7 +143,8 @@ if __name__ == '__main__':
 
     # if the output file exists, load the processed ids and filter out the processed instances
     if os.path.exists(output_path):
-        processed = [d['id'] for d in load_jsonl(output_path)]
+        with JsonlStore(output_path) as store:
+            processed = store.ids()
         data_to_process = [d for d in raw_data if d['id'] not in processed]
     else:
         data_to_process = raw_data
@@ -4,7 +4,7 @@ import os
 import argparse
 import re
 from functools import partial
-from .io_utils import load_jsonl
+from .io_utils import load_jsonl, iter_jsonl, JsonlStore
 from .api import call_model
 
 
@@ -166,7 +166,7 @@ if __name__ == '__main__':
     output_path = args.output_path
     
     # Load the query data to get language information
-    query_data = load_jsonl(args.query_data_path)
+    query_data = iter_jsonl(args.query_data_path)
     
     # Create a mapping from ID to language
     id_to_lang_map = {item['id']: item.get('language') for item in query_data if 'id' in item and 'language' in item}
@@ -179,7 +179,8 @@ if __name__ == '__main__':
 
     # If the output file exists, load the processed ids and filter out the processed instances
     if os.path.exists(output_path):
-        processed = [d['id'] for d in load_jsonl(output_path)]
+        with JsonlStore(output_path) as store:
+            processed = store.ids()
         data_to_process = [d for d in raw_data if d['id'] not in processed]
     else:
         data_to_process = raw_data
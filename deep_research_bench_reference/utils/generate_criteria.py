@@ -137,9 +137,13 @@ def generate_weights_multiple_times(item_id, prompt, language, sample_count=DEFA
     user_prompt = weight_prompt_template.format(task_prompt=prompt)
     
     # Multiple sampling
-    for _ in range(sample_count):
+    for sample_index in range(sample_count):
         for attempt in range(RETRY_ATTEMPTS):
-            weights_output = ai_client.generate(user_prompt=user_prompt, system_prompt="")
+            # Each sample is cached separately so reruns still average distinct samples
+            weights_output = ai_client.generate(
+                user_prompt=user_prompt, system_prompt="",
+                refresh_cache=attempt > 0, cache_variant=sample_index
+            )
             
             try:
                 parsed_weights = parse_llm_output_as_json(weights_output, expected_type=dict)
@@ -199,7 +203,9 @@ def process_single_item_sequential(item):
         user_prompt_criteria = criteria_prompt_template.format(task_prompt=prompt)
         
         for attempt in range(RETRY_ATTEMPTS):
-            criteria_output = ai_client.generate(user_prompt=user_prompt_criteria, system_prompt="")
+            criteria_output = ai_client.generate(
+                user_prompt=user_prompt_criteria, system_prompt="", refresh_cache=attempt > 0
+            )
             
             try:
                 parsed_criteria = parse_llm_output_as_json(criteria_output, expected_type=list)
@@ -1,8 +1,5 @@
-import json
+from .jsonl_store import JsonlStore, iter_jsonl
 
 def load_jsonl(file_path):
-    data = []
-    with open(file_path, 'r') as f:
-        for line in f.readlines():
-            data.append(json.loads(line.strip()))
-    return data 
\ No newline at end of file
+    """Load all rows of a JSONL file; prefer iter_jsonl or JsonlStore for large files"""
+    return list(iter_jsonl(file_path))
@@ -1,155 +1,345 @@
 import json
 import re
+import threading
+
+_decoder = json.JSONDecoder()
+
+_FENCE_RE = re.compile(r"```json\s*")
+_BARE_TOKEN_RE = re.compile(r"[-+.\w]+$")
+# Next character inside a string that needs a decision; everything before it is copied as is
+_STRING_SPECIAL_RE = re.compile(r'["\\\x00-\x1f]')
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Characters that may follow a string that really ends where a quote appears
+_AFTER_VALUE = ",}]"
+# Characters that may start the token after a comma
+_TOKEN_STARTS = '"{[-0123456789tfn}]'
+
+
+class JsonExtraction:
+    """
+    Result of extract_json
+
+    Attributes:
+        value: Parsed JSON value
+        text: JSON text of value: the span found in the input, or the repaired JSON
+        method: "direct" (parsed as found), "repaired" (parsed after local repairs)
+            or "rebuilt" (reassembled from score fields)
+        repairs: Kinds of repair applied, e.g. ["trailing_comma", "truncated"]
+    """
+    def __init__(self, value, text, method="direct", repairs=()):
+        self.value = value
+        self.text = text
+        self.method = method
+        self.repairs = list(repairs)
+
+
+class ExtractionStats:
+    """Thread-safe counts of how judge responses were parsed"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.responses = 0
+            self.methods = {"direct": 0, "repaired": 0, "rebuilt": 0, "failed": 0}
+            self.repairs = {}
+            self.retries_avoided = 0
+
+    def record(self, extraction):
+        with self._lock:
+            self.responses += 1
+            self.methods[extraction.method if extraction else "failed"] += 1
+            for repair in (extraction.repairs if extraction else ()):
+                self.repairs[repair] = self.repairs.get(repair, 0) + 1
+
+    def record_retry_avoided(self):
+        """Count a response that was usable only thanks to repair, so no new judge call was needed"""
+        with self._lock:
+            self.retries_avoided += 1
+
+    def summary(self):
+        with self._lock:
+            fixed = self.methods["repaired"] + self.methods["rebuilt"]
+            return {
+                "responses": self.responses,
+                **self.methods,
+                "repair_rate": fixed / self.responses if self.responses else 0.0,
+                "repairs": dict(self.repairs),
+                "retries_avoided": self.retries_avoided,
+            }
+
+
+# Process-wide counts, reported at the end of a RACE run
+EXTRACTION_STATS = ExtractionStats()
+
+
+def _candidate_starts(text):
+    """Positions where the JSON value may start, most likely first"""
+    starts = []
+    fence = _FENCE_RE.search(text)
+    if fence and text.startswith(("{", "["), fence.end()):
+        starts.append(fence.end())
+    stripped_start = len(text) - len(text.lstrip())
+    if text.startswith(("{", "["), stripped_start):
+        starts.append(stripped_start)
+    first_brace = text.find('{')
+    if first_brace != -1:
+        starts.append(first_brace)
+    return list(dict.fromkeys(starts))
+
+
+def _next_significant(text, i):
+    while i < len(text) and text[i] in " \t\r\n":
+        i += 1
+    return text[i] if i < len(text) else ""
+
+
+def _closes_string(text, i, is_key):
+    """Whether the quote at text[i] ends the string, rather than being an unescaped quote inside it"""
+    following = _next_significant(text, i + 1)
+    if following in ("", "`"):
+        return True
+    if is_key:
+        return following == ":"
+    if following not in _AFTER_VALUE:
+        return False
+    if following == ",":
+        return _next_significant(text, text.index(",", i + 1) + 1) in _TOKEN_STARTS
+    return True
+
+
+def repair_json(text, start=0):
+    """
+    Repair the JSON value starting at text[start] in one pass
+
+    Scans the value with a string-aware stack, stopping where it closes, and
+    fixes trailing commas, unescaped quotes and raw control characters inside
+    strings, and truncation (closing open strings, arrays and objects).
 
-def extract_json_from_markdown(text):
-    """Extract JSON from a markdown text that may contain ```json ... ``` blocks
-    
-    Args:
-        text (str): The input text which might contain JSON blocks
-        
     Returns:
-        str or None: The extracted JSON string or None if not found/not valid
+        (repaired JSON text, list of repair kinds applied)
     """
-    if not isinstance(text, str):
-        return None
-    
-    # Method 0: Try to parse the complete text directly, if it's valid JSON return it
-    # This handles cases where LLM returns a direct JSON object
-    if text.strip().startswith('{') and text.strip().endswith('}'):
-        try:
-            # Only validate, no need to assign to variable
-            json.loads(text.strip())
-            return text.strip()
-        except json.JSONDecodeError:
-            # If not valid JSON, continue with other methods
-            pass
-    
-    # Method 1: Use string operations to extract JSON directly from code blocks
-    if "```json" in text and "```" in text[text.find("```json")+7:]:
-        start = text.find("```json") + 7
-        end = text.find("```", start)
-        if end > start:
-            json_str = text[start:end].strip()
+    out = []
+    repairs = set()
+    stack = []
+    in_string = False
+    is_key = False
+    expect_key = False
+    key_pending = False
+    last_significant = ""
+    i = start
+    n = len(text)
+
+    while i < n:
+        char = text[i]
+        if in_string:
+            special = _STRING_SPECIAL_RE.search(text, i)
+            if special is None:
+                out.append(text[i:])
+                break
+            if special.start() > i:
+                out.append(text[i:special.start()])
+                i = special.start()
+                continue
+            if char == "\\" and i + 1 < n:
+                out.append(text[i:i + 2])
+                i += 2
+                continue
+            if char == '"':
+                if _closes_string(text, i, is_key):
+                    in_string = False
+                    key_pending = is_key
+                    last_significant = char
+                    out.append(char)
+                else:
+                    out.append('\\"')
+                    repairs.add("unescaped_quote")
+            elif char < " ":
+                out.append(json.dumps(char)[1:-1])
+                repairs.add("control_character")
+            else:
+                out.append(char)
+            i += 1
+            continue
+
+        if char.isspace():
+            whitespace = _WHITESPACE_RE.match(text, i).group()
+            out.append(whitespace)
+            i += len(whitespace)
+            continue
+        if char == '"':
+            in_string = True
+            is_key = expect_key
+            expect_key = False
+        elif char in "{[":
+            stack.append(char)
+            expect_key = char == "{"
+        elif char in "}]":
+            if not stack:
+                break
+            if last_significant == ",":
+                _drop_trailing_comma(out)
+                repairs.add("trailing_comma")
+            stack.pop()
+            expect_key = False
+            last_significant = char
+            out.append(char)
+            i += 1
+            if not stack:
+                break
+            continue
+        elif char == ",":
+            expect_key = bool(stack) and stack[-1] == "{"
+        elif char == ":":
+            key_pending = False
+        elif char == "`" and text.startswith("```", i):
+            # End of a fenced block: the rest is not part of the value
+            break
+        last_significant = char
+        out.append(char)
+        i += 1
+
+    if in_string or stack:
+        repairs.add("truncated")
+        if in_string:
+            if out and out[-1] == "\\":
+                out.pop()
+            out.append('"')
+            key_pending = is_key
+        _close_truncated(out, stack, key_pending)
+
+    return "".join(out), sorted(repairs)
+
+
+def _drop_trailing_comma(out):
+    """Remove the last comma in out, along with whitespace after it"""
+    while out and out[-1].strip() == "":
+        out.pop()
+    if out and out[-1] == ",":
+        out.pop()
+
+
+def _close_truncated(out, stack, key_pending):
+    """Finish a value cut off mid-way: complete the dangling member, then close open containers"""
+    tail = "".join(out).rstrip()
+    out[:] = [tail]
+    if key_pending:
+        out.append(": null")
+    elif tail.endswith(":"):
+        out.append(" null")
+    elif tail.endswith(","):
+        out[:] = [tail[:-1]]
+    else:
+        bare = _BARE_TOKEN_RE.search(tail)
+        if bare and not tail.endswith('"'):
             try:
-                # Validate JSON
-                json.loads(json_str)
-                return json_str
+                json.loads(bare.group())
             except json.JSONDecodeError:
-                # If validation fails, continue with other methods
-                pass
-    
-    # Method 2: As backup, retain original regex matching
-    match = re.search(r"```json\s*([\s\S]*?)\s*```", text)
-    if match:
-        json_str = match.group(1).strip()
+                # Half-written number or literal
+                out[:] = [tail[:bare.start()] + "null"]
+    out.extend("}" if opener == "{" else "]" for opener in reversed(stack))
+
+
+def _rebuild_from_score_fields(text):
+    """Reassemble judge scores from "criterion" and score fields found by pattern matching"""
+    dimensions = ["comprehensiveness", "insight", "instruction_following", "readability"]
+    result = {}
+
+    for dim in dimensions:
+        if dim not in text:
+            continue
+        result[dim] = []
+
+        # First find the dimension starting position
+        dim_start = text.find(f'"{dim}"')
+        if dim_start == -1:
+            dim_start = text.find(f"'{dim}'")
+        if dim_start == -1:
+            dim_start = text.find(dim)
+
+        # Determine dimension end position (next dimension start or end of text)
+        next_dim_start = len(text)
+        for next_dim in dimensions:
+            if next_dim != dim:
+                pos = text.find(f'"{next_dim}"', dim_start)
+                if pos == -1:
+                    pos = text.find(f"'{next_dim}'", dim_start)
+                if pos == -1:
+                    pos = text.find(next_dim, dim_start + len(dim))
+                if pos != -1 and pos < next_dim_start:
+                    next_dim_start = pos
+
+        dim_content = text[dim_start:next_dim_start]
+        criteria = [m.group(1) for m in re.finditer(r'"criterion"\s*:\s*"([^"]+)"', dim_content)]
+        scores1 = [float(m.group(1)) for m in re.finditer(r'"article_1_score"\s*:\s*(\d+\.?\d*)', dim_content)]
+        scores2 = [float(m.group(1)) for m in re.finditer(r'"article_2_score"\s*:\s*(\d+\.?\d*)', dim_content)]
+
+        for i in range(min(len(criteria), len(scores1), len(scores2))):
+            result[dim].append({
+                "criterion": criteria[i],
+                "article_1_score": scores1[i],
+                "article_2_score": scores2[i]
+            })
+
+    if any(len(scores) > 0 for scores in result.values()):
+        return result
+    return None
+
+
+def extract_json(text):
+    """Find and parse the JSON value in an LLM response, repairing it if needed
+
+    The value is parsed in place at the most likely start (a ```json block,
+    the start of the text, or the first brace), so a well-formed response is
+    parsed once. If that fails, repair_json fixes the candidate span locally;
+    judge responses beyond repair are rebuilt from their score fields.
+    Every call is counted in EXTRACTION_STATS.
+
+    Args:
+        text (str): The input text which might contain JSON blocks
+
+    Returns:
+        JsonExtraction or None if no JSON value could be recovered
+    """
+    extraction = _extract(text) if isinstance(text, str) else None
+    EXTRACTION_STATS.record(extraction)
+    return extraction
+
+
+def _extract(text):
+    starts = _candidate_starts(text)
+    for start in starts:
         try:
-            json.loads(json_str)
-            return json_str
+            value, end = _decoder.raw_decode(text, start)
+            return JsonExtraction(value, text[start:end])
         except json.JSONDecodeError:
-            # If validation fails, continue with other methods
-            pass
-    
-    # Method 3: Check if the entire text is directly JSON
-    try:
-        json_obj = json.loads(text.strip())
-        return text.strip()
-    except json.JSONDecodeError:
-        # Not valid JSON, continue trying
-        pass
-    
-    # Method 4: Try to extract content within outermost curly braces
-    # Find the first left curly brace
-    start = text.find('{')
-    if start != -1:
-        # Calculate nesting level to find the matching closing brace
-        level = 0
-        for i, char in enumerate(text[start:]):
-            if char == '{':
-                level += 1
-            elif char == '}':
-                level -= 1
-                if level == 0:
-                    # Found matching closing brace
-                    end = start + i + 1
-                    potential_json = text[start:end]
-                    try:
-                        json.loads(potential_json)
-                        return potential_json
-                    except json.JSONDecodeError:
-                        # If validation fails, continue with other methods
-                        pass
-                    break
-    
-    # Method 5: Final fallback method, try simple start and end brace matching
-    start = text.find('{')
-    end = text.rfind('}')
-    if start != -1 and end != -1 and end > start:
-        potential_json = text[start:end+1]
+            continue
+
+    for start in starts:
+        repaired, repairs = repair_json(text, start)
         try:
-            json.loads(potential_json)
-            return potential_json
+            value = json.loads(repaired)
         except json.JSONDecodeError:
-            # All methods failed, try final fallback method
-            pass
-    
-    # Method 6: Special fallback method - build simplified JSON object by keyword pattern matching
+            continue
+        return JsonExtraction(value, repaired, "repaired", repairs)
+
     if "comprehensiveness" in text and "article_1_score" in text and "article_2_score" in text:
-        try:
-            dimensions = ["comprehensiveness", "insight", "instruction_following", "readability"]
-            result = {}
-            
-            for dim in dimensions:
-                if dim in text:
-                    result[dim] = []
-                    
-                    # Search for all scoring entries under this dimension
-                    # First find the dimension starting position
-                    dim_start = text.find(f'"{dim}"') 
-                    if dim_start == -1:
-                        dim_start = text.find(f"'{dim}'")
-                    if dim_start == -1:
-                        dim_start = text.find(dim)
-                    
-                    if dim_start != -1:
-                        # Determine dimension end position (next dimension start or end of text)
-                        next_dim_start = len(text)
-                        for next_dim in dimensions:
-                            if next_dim != dim:
-                                pos = text.find(f'"{next_dim}"', dim_start)
-                                if pos == -1:
-                                    pos = text.find(f"'{next_dim}'", dim_start)
-                                if pos == -1:
-                                    pos = text.find(next_dim, dim_start + len(dim))
-                                if pos != -1 and pos < next_dim_start:
-                                    next_dim_start = pos
-                        
-                        # Extract content for this dimension
-                        dim_content = text[dim_start:next_dim_start]
-                        
-                        # Use regex to find all "criterion", "article_1_score" and "article_2_score"
-                        criterion_matches = re.finditer(r'"criterion"\s*:\s*"([^"]+)"', dim_content)
-                        score1_matches = re.finditer(r'"article_1_score"\s*:\s*(\d+\.?\d*)', dim_content)
-                        score2_matches = re.finditer(r'"article_2_score"\s*:\s*(\d+\.?\d*)', dim_content)
-                        
-                        # Convert to lists for multiple access
-                        criteria = [m.group(1) for m in criterion_matches]
-                        scores1 = [float(m.group(1)) for m in score1_matches]
-                        scores2 = [float(m.group(1)) for m in score2_matches]
-                        
-                        # Combine into scoring entries
-                        for i in range(min(len(criteria), len(scores1), len(scores2))):
-                            result[dim].append({
-                                "criterion": criteria[i],
-                                "article_1_score": scores1[i],
-                                "article_2_score": scores2[i]
-                            })
-            
-            # Validate if we successfully extracted scoring data
-            if any(len(scores) > 0 for scores in result.values()):
-                return json.dumps(result)
-        except Exception as e:
-            # Fallback extraction method failed, log error but continue trying
-            pass
-    
-    # All methods failed, return None
-    return None 
\ No newline at end of file
+        value = _rebuild_from_score_fields(text)
+        if value is not None:
+            return JsonExtraction(value, json.dumps(value, ensure_ascii=False), "rebuilt")
+    return None
+
+
+def extract_json_from_markdown(text):
+    """Extract JSON from a markdown text that may contain ```json ... ``` blocks
+
+    Args:
+        text (str): The input text which might contain JSON blocks
+
+    Returns:
+        str or None: The extracted (possibly repaired) JSON string or None if not found/not valid
+    """
+    extraction = extract_json(text)
+    return extraction.text if extraction else None
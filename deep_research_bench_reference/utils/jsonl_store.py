@@ -0,0 +1,310 @@
+import hashlib
+import json
+import logging
+import mmap
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+INDEX_SUFFIX = ".idx.json"
+INDEX_VERSION = 1
+DEFAULT_INDEX_KEYS = ("id", "prompt")
+
+# Bytes before the indexed end of the file that are fingerprinted, to detect rewrites
+FINGERPRINT_BYTES = 4096
+
+
+def iter_jsonl(file_path):
+    """Stream rows from a JSONL file, skipping blank and malformed lines"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"Skipping malformed JSON on line {line_number} of {file_path}")
+
+
+def _index_key(value):
+    # JSON-encode so 1 and "1" stay distinct keys
+    return json.dumps(value, ensure_ascii=False)
+
+
+class JsonlStore:
+    """
+    JSONL file with a sidecar byte-offset index for random access by key
+
+    The index (<path>.idx.json) maps each indexed field value, by default "id"
+    and "prompt", to the offset and length of its last row. It is kept in step
+    with the file: rows appended by any writer are indexed incrementally on
+    open, and a file rewritten in place is reindexed from scratch. Lookups read
+    single rows through a memory map, so only the rows asked for are parsed.
+
+    Args:
+        path: JSONL file; need not exist yet
+        index_keys: Row fields to index
+    """
+    def __init__(self, path, index_keys=DEFAULT_INDEX_KEYS):
+        self.path = str(path)
+        self.index_path = self.path + INDEX_SUFFIX
+        self.index_keys = tuple(index_keys)
+        self._index = {key: {} for key in self.index_keys}
+        self._indexed_size = 0
+        self._row_count = 0
+        self._mmap = None
+        self._mmap_size = 0
+        self._dirty = False
+        self.refresh()
+
+    # ===== Index maintenance =====
+
+    def _fingerprint(self, f, size):
+        start = max(0, size - FINGERPRINT_BYTES)
+        f.seek(start)
+        return hashlib.sha1(f.read(size - start)).hexdigest()
+
+    def _load_index_file(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != INDEX_VERSION or tuple(data.get("index_keys", ())) != self.index_keys:
+            return None
+        return data
+
+    def refresh(self, save=True):
+        """Bring the index up to date with the file, saving the sidecar if it changed"""
+        if not os.path.exists(self.path):
+            self._index = {key: {} for key in self.index_keys}
+            self._indexed_size = self._row_count = 0
+            return
+
+        size = os.path.getsize(self.path)
+        with open(self.path, 'rb') as f:
+            if self._indexed_size == 0 and not any(self._index.values()):
+                saved = self._load_index_file()
+                if saved and saved["size"] <= size and self._fingerprint(f, saved["size"]) == saved["fingerprint"]:
+                    self._index = {key: {k: tuple(v) for k, v in saved["index"].get(key, {}).items()}
+                                   for key in self.index_keys}
+                    self._indexed_size = saved["size"]
+                    self._row_count = saved["rows"]
+            elif self._indexed_size > size:
+                # File was truncated or rewritten: start over
+                self._index = {key: {} for key in self.index_keys}
+                self._indexed_size = self._row_count = 0
+
+            if self._indexed_size < size:
+                self._scan(f, self._indexed_size, size)
+        if save and self._dirty:
+            self.save_index()
+
+    def _scan(self, f, start, end):
+        """Index complete lines between byte offsets start and end"""
+        f.seek(start)
+        offset = start
+        while offset < end:
+            line = f.readline()
+            if not line.endswith(b"\n") and offset + len(line) >= end:
+                # A writer may still be appending this line; index it on a later refresh
+                break
+            length = len(line)
+            if line.strip():
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping malformed JSON at byte {offset} of {self.path}")
+                    row = None
+                if isinstance(row, dict):
+                    self._row_count += 1
+                    for key in self.index_keys:
+                        if key in row:
+                            self._index[key][_index_key(row[key])] = (offset, length)
+            offset += length
+        self._indexed_size = offset
+        self._dirty = True
+
+    def save_index(self):
+        """Write the sidecar index atomically"""
+        with open(self.path, 'rb') as f:
+            fingerprint = self._fingerprint(f, self._indexed_size)
+        data = {
+            "version": INDEX_VERSION,
+            "index_keys": list(self.index_keys),
+            "size": self._indexed_size,
+            "rows": self._row_count,
+            "fingerprint": fingerprint,
+            "index": self._index,
+        }
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+        self._dirty = False
+
+    # ===== Reads =====
+
+    def _read_at(self, offset, length):
+        if self._mmap is None or self._mmap_size < offset + length:
+            self.close_map()
+            with open(self.path, 'rb') as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mmap_size = len(self._mmap)
+        return json.loads(self._mmap[offset:offset + length])
+
+    def get(self, key, value, default=None):
+        """Return the last row whose field key equals value"""
+        location = self._index[key].get(_index_key(value))
+        if location is None:
+            return default
+        return self._read_at(*location)
+
+    def get_by_id(self, item_id, default=None):
+        return self.get("id", item_id, default)
+
+    def get_by_prompt(self, prompt, default=None):
+        return self.get("prompt", prompt, default)
+
+    def keys(self, key="id"):
+        """Set of values of an indexed field"""
+        return {json.loads(k) for k in self._index[key]}
+
+    def ids(self):
+        return self.keys("id")
+
+    def has(self, key, value):
+        return _index_key(value) in self._index[key]
+
+    def __len__(self):
+        return self._row_count
+
+    def __iter__(self):
+        """Stream all rows in file order"""
+        if os.path.exists(self.path):
+            yield from iter_jsonl(self.path)
+
+    # ===== Writes =====
+
+    def append(self, rows):
+        """Append rows and index them; the sidecar index is saved on close()"""
+        if isinstance(rows, dict):
+            rows = [rows]
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, 'ab') as f:
+            for row in rows:
+                f.write((json.dumps(row, ensure_ascii=False) + "\n").encode("utf-8"))
+        self.refresh(save=False)
+
+    def close_map(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+            self._mmap_size = 0
+
+    def close(self):
+        self.close_map()
+        if self._dirty and os.path.exists(self.path):
+            self.save_index()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class JsonlAppender:
+    """
+    Append-on-completion JSONL writer with batched fsync
+
+    Each row is written and flushed as soon as it is appended, so a crash loses
+    at most the rows not yet synced to disk; fsync runs once per fsync_every
+    rows or fsync_interval seconds, and on close. Safe to share between threads.
+
+    Args:
+        path: JSONL file to append to
+        fsync_every: Rows between fsyncs
+        fsync_interval: Maximum seconds between fsyncs while rows are arriving
+    """
+    def __init__(self, path, fsync_every=20, fsync_interval=5.0):
+        self.path = str(path)
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def append(self, row):
+        with self._lock:
+            self._file.write(json.dumps(row, ensure_ascii=False) + "\n")
+            self._file.flush()
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+                self._sync()
+
+    def _sync(self):
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+                self._sync()
+                self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def compact_jsonl(path, key="id", prefer=None, sort_key=None):
+    """
+    Atomically rewrite a JSONL file with one row per key
+
+    Args:
+        path: JSONL file
+        key: Field identifying a row; rows without it are kept as they are
+        prefer: prefer(old, new) -> row to keep for a repeated key; defaults to the newest row
+        sort_key: Optional sort key for the rewritten rows
+
+    Returns:
+        Rows written
+    """
+    rows = {}
+    unkeyed = []
+    for row in iter_jsonl(path):
+        if not isinstance(row, dict) or key not in row:
+            unkeyed.append(row)
+            continue
+        row_key = _index_key(row[key])
+        old = rows.get(row_key)
+        rows[row_key] = row if old is None or prefer is None else prefer(old, row)
+    compacted = list(rows.values())
+    if sort_key is not None:
+        compacted.sort(key=sort_key)
+    compacted.extend(unkeyed)
+
+    tmp_path = f"{path}.{os.getpid()}.compact.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for row in compacted:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    # Persist the rename itself
+    dir_fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+    return compacted
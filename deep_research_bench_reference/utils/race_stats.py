@@ -0,0 +1,250 @@
+"""
+Score aggregation for RACE results, with bootstrap confidence intervals
+
+Loads raw_results.jsonl files into NumPy arrays and computes per-dimension
+means, per-language splits and percentile bootstrap CIs for one or many runs.
+
+Usage:
+    python -m utils.race_stats results/race --query_file data/prompt_data/query.jsonl
+    python -m utils.race_stats results/race/model_a/raw_results.jsonl results/race/model_b --n_boot 2000
+"""
+import argparse
+import glob
+import json
+import os
+
+import numpy as np
+
+from .jsonl_store import iter_jsonl
+
+DIMENSIONS = ("comprehensiveness", "insight", "instruction_following", "readability", "overall_score")
+DIMENSION_LABELS = {
+    "comprehensiveness": "Comprehensiveness",
+    "insight": "Insight",
+    "instruction_following": "Instruction Following",
+    "readability": "Readability",
+    "overall_score": "Overall Score",
+}
+RESULTS_FILENAME = "raw_results.jsonl"
+
+# Upper bound on resample-count matrix elements held at once, to bound memory
+BOOTSTRAP_CHUNK_ELEMENTS = 4_000_000
+
+
+class RaceScores:
+    """
+    Scores of one RACE run as arrays
+
+    Args:
+        model: Run label, usually the target model name
+        ids: Task IDs, shape (n,)
+        languages: Task languages, shape (n,)
+        scores: Scores, shape (n, len(DIMENSIONS)), columns in DIMENSIONS order
+    """
+    def __init__(self, model, ids, languages, scores):
+        self.model = model
+        self.ids = np.asarray(ids, dtype=object)
+        self.languages = np.asarray(languages, dtype=object)
+        self.scores = np.asarray(scores, dtype=np.float64).reshape(len(self.ids), len(DIMENSIONS))
+
+    @classmethod
+    def from_rows(cls, rows, model=None, language_by_id=None):
+        """Build from result rows, skipping error rows; missing dimensions count as 0"""
+        ids, languages, scores = [], [], []
+        for row in rows:
+            if "error" in row:
+                continue
+            ids.append(row.get("id"))
+            language = row.get("language")
+            if language_by_id:
+                language = language_by_id.get(str(row.get("id")), language)
+            languages.append(language or "unknown")
+            scores.append([row.get(dim, 0) or 0 for dim in DIMENSIONS])
+        return cls(model, ids, languages, np.array(scores, dtype=np.float64).reshape(-1, len(DIMENSIONS)))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def subset(self, mask):
+        return RaceScores(self.model, self.ids[mask], self.languages[mask], self.scores[mask])
+
+    def by_language(self):
+        return {language: self.subset(self.languages == language)
+                for language in sorted(set(self.languages.tolist()))}
+
+
+def load_query_languages(query_file):
+    """Map str(task ID) to its language from the query file"""
+    return {str(task.get("id")): task.get("language") for task in iter_jsonl(query_file)}
+
+
+def load_race_scores(path, model=None, language_by_id=None):
+    """Load a raw_results.jsonl file; the model defaults to the name of its directory"""
+    if model is None:
+        model = os.path.basename(os.path.dirname(os.path.abspath(path)))
+    return RaceScores.from_rows(iter_jsonl(path), model, language_by_id)
+
+
+def find_results_files(paths):
+    """Expand files, directories (searched recursively for raw_results.jsonl) and globs"""
+    files = []
+    for path in paths:
+        matches = sorted(glob.glob(path)) or [path]
+        for match in matches:
+            if os.path.isdir(match):
+                files.extend(sorted(glob.glob(os.path.join(match, "**", RESULTS_FILENAME), recursive=True)))
+            elif os.path.isfile(match):
+                files.append(match)
+    return list(dict.fromkeys(files))
+
+
+def bootstrap_means(scores, groups=None, n_boot=1000, seed=0):
+    """
+    Means of n_boot bootstrap resamples of the rows of scores, overall and per group
+
+    With groups, rows are resampled within their group (a stratified
+    bootstrap, as the benchmark's language mix is fixed), and the same
+    resamples give both the overall and the per-group means. A chunk of
+    resamples of a group is drawn as a matrix of row counts built with one
+    bincount, so its sums are one matrix product.
+
+    Returns:
+        {None: overall means, group: group means, ...}, each of shape (n_boot, scores.shape[1])
+    """
+    n, d = scores.shape
+    if groups is None:
+        members = {None: np.arange(n)}
+    else:
+        groups = np.asarray(groups, dtype=object)
+        members = {label: np.flatnonzero(groups == label) for label in sorted(set(groups.tolist()))}
+    if n == 0:
+        return {label: np.full((n_boot, d), np.nan) for label in [None, *members]}
+
+    rng = np.random.default_rng(seed)
+    totals = np.zeros((n_boot, d))
+    means = {}
+    for label, rows in members.items():
+        group_scores = scores[rows]
+        k = len(rows)
+        group_means = np.empty((n_boot, d))
+        chunk = max(1, BOOTSTRAP_CHUNK_ELEMENTS // k)
+        for start in range(0, n_boot, chunk):
+            size = min(chunk, n_boot - start)
+            draws = rng.integers(0, k, (size, k)) + (np.arange(size) * k)[:, None]
+            counts = np.bincount(draws.ravel(), minlength=size * k).reshape(size, k)
+            sums = counts @ group_scores
+            totals[start:start + size] += sums
+            group_means[start:start + size] = sums / k
+        means[label] = group_means
+    means[None] = totals / n
+    return means
+
+
+def _summary(model, scores, boot_means, confidence):
+    summary = {
+        "model": model,
+        "n": len(scores),
+        "mean": dict(zip(DIMENSIONS, scores.mean(axis=0).tolist())) if len(scores) else {},
+        "ci": {},
+    }
+    if len(scores) and boot_means is not None:
+        alpha = (1 - confidence) / 2
+        low, high = np.quantile(boot_means, [alpha, 1 - alpha], axis=0)
+        summary["ci"] = {dim: [low[i], high[i]] for i, dim in enumerate(DIMENSIONS)}
+    return summary
+
+
+def summarize_scores(race_scores, n_boot=1000, confidence=0.95, seed=0):
+    """
+    Means and bootstrap CIs of every dimension, overall and per language
+
+    Returns:
+        {"model", "n", "mean": {dim: float}, "ci": {dim: [low, high]},
+         "confidence", "n_boot", "by_language": {language: {"model", "n", "mean", "ci"}}}
+    """
+    boot = None
+    if n_boot > 0:
+        boot = bootstrap_means(race_scores.scores, race_scores.languages, n_boot, seed)
+    summary = _summary(race_scores.model, race_scores.scores, boot[None] if boot else None, confidence)
+    summary["confidence"] = confidence
+    summary["n_boot"] = n_boot
+    summary["by_language"] = {
+        language: _summary(race_scores.model, subset.scores, boot[language] if boot else None, confidence)
+        for language, subset in race_scores.by_language().items()
+    }
+    return summary
+
+
+def format_summary(summary, digits=4):
+    """One line per dimension: mean and CI"""
+    lines = []
+    for dim in DIMENSIONS:
+        if dim not in summary["mean"]:
+            continue
+        line = f"{DIMENSION_LABELS[dim] + ':':23s} {summary['mean'][dim]:.{digits}f}"
+        if dim in summary["ci"]:
+            low, high = summary["ci"][dim]
+            line += f"  [{low:.{digits}f}, {high:.{digits}f}]"
+        lines.append(line)
+    return lines
+
+
+def format_comparison(summaries, dimension="overall_score", digits=4):
+    """Table of runs, best first: overall and per-language mean [CI] of one dimension"""
+    languages = sorted({language for summary in summaries for language in summary.get("by_language", {})})
+
+    def cell(summary):
+        if dimension not in summary["mean"]:
+            return "-"
+        text = f"{summary['mean'][dimension]:.{digits}f}"
+        if dimension in summary["ci"]:
+            low, high = summary["ci"][dimension]
+            text += f" [{low:.{digits}f}, {high:.{digits}f}]"
+        return text
+
+    width = max([len("model")] + [len(str(summary["model"])) for summary in summaries])
+    header = f"{'model':{width}s} {'n':>5s}  {'all':26s}" + "".join(f"  {language:26s}" for language in languages)
+    lines = [f"{DIMENSION_LABELS[dimension]} (mean [CI])", header]
+    ranked = sorted(summaries, key=lambda s: s["mean"].get(dimension, float("-inf")), reverse=True)
+    for summary in ranked:
+        line = f"{str(summary['model']):{width}s} {summary['n']:5d}  {cell(summary):26s}"
+        for language in languages:
+            language_summary = summary.get("by_language", {}).get(language)
+            line += f"  {cell(language_summary) if language_summary else '-':26s}"
+        lines.append(line)
+    return lines
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Aggregate RACE raw_results.jsonl files with bootstrap confidence intervals")
+    parser.add_argument("paths", nargs="+", help="raw_results.jsonl files, directories containing them, or globs")
+    parser.add_argument("--query_file", type=str, default="data/prompt_data/query.jsonl", help="Query file with task languages.")
+    parser.add_argument("--n_boot", type=int, default=1000, help="Bootstrap resamples; 0 disables CIs.")
+    parser.add_argument("--confidence", type=float, default=0.95, help="Confidence level of the intervals.")
+    parser.add_argument("--seed", type=int, default=0, help="Bootstrap random seed.")
+    parser.add_argument("--dimension", type=str, default="overall_score", choices=DIMENSIONS, help="Dimension compared across runs.")
+    parser.add_argument("--output_json", type=str, default=None, help="Optional path to write all summaries as JSON.")
+    args = parser.parse_args()
+
+    language_by_id = load_query_languages(args.query_file) if os.path.exists(args.query_file) else None
+    results_files = find_results_files(args.paths)
+    if not results_files:
+        parser.error(f"No {RESULTS_FILENAME} files found in {args.paths}")
+
+    summaries = [summarize_scores(load_race_scores(path, language_by_id=language_by_id),
+                                  args.n_boot, args.confidence, args.seed)
+                 for path in results_files]
+
+    if len(summaries) == 1:
+        summary = summaries[0]
+        print(f"{summary['model']} ({summary['n']} tasks, {args.confidence:.0%} bootstrap CI)")
+        print("\n".join(format_summary(summary)))
+        for language, language_summary in summary["by_language"].items():
+            print(f"\n{language} ({language_summary['n']} tasks)")
+            print("\n".join(format_summary(language_summary)))
+    else:
+        print("\n".join(format_comparison(summaries, args.dimension)))
+
+    if args.output_json:
+        with open(args.output_json, 'w', encoding='utf-8') as f:
+            json.dump(summaries, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,150 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Cache configuration, read from environment variables
+# LLM_CACHE=0 bypasses the cache for every AIClient in the process
+CACHE_ENABLED = os.environ.get("LLM_CACHE", "1") != "0"
+CACHE_DIR = os.environ.get("LLM_CACHE_DIR", ".llm_cache")
+CACHE_MAX_MB = float(os.environ.get("LLM_CACHE_MAX_MB", "1024"))
+
+# Eviction trims the cache to this fraction of its size limit, so it doesn't run on every write
+EVICTION_TARGET = 0.9
+
+
+def response_cache_key(model, system_prompt, user_prompt, config, variant=None):
+    """
+    Content address of a generation request
+
+    Args:
+        model: Model name
+        system_prompt: System prompt
+        user_prompt: User prompt
+        config: JSON-serializable generation config, including the thinking budget
+        variant: Distinguishes deliberate repeated samples of the same prompt
+    """
+    payload = json.dumps({
+        "model": model,
+        "system_prompt_sha256": hashlib.sha256(system_prompt.encode("utf-8")).hexdigest(),
+        "user_prompt_sha256": hashlib.sha256(user_prompt.encode("utf-8")).hexdigest(),
+        "config": config,
+        "variant": variant,
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    On-disk, content-addressed cache of LLM responses with a size bound
+
+    One JSON file per response under <cache_dir>/<key[:2]>/<key>.json. Files are
+    written atomically, so worker processes can share a cache directory. When the
+    cache grows past max_bytes, the least recently used entries are deleted.
+
+    Args:
+        cache_dir: Cache directory
+        max_bytes: Size limit of the cache
+    """
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=int(CACHE_MAX_MB * 1024 * 1024)):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._size = None
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key):
+        """Return the cached response for key, or None"""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                response = json.load(f)["response"]
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            return None
+        # Touch the entry so eviction treats it as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return response
+
+    def put(self, key, response, model=None):
+        """Store a response under key, evicting old entries if the cache is full"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = json.dumps({"model": model, "created": time.time(), "response": response}, ensure_ascii=False)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(data)
+        # An overwritten entry (e.g. after refresh_cache) no longer counts towards the size
+        try:
+            replaced_size = os.path.getsize(path)
+        except OSError:
+            replaced_size = 0
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            else:
+                self._size += len(data.encode("utf-8")) - replaced_size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        """(path, size, last used) of every cache file"""
+        for shard in os.scandir(self.cache_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(".json"):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    yield entry.path, stat.st_size, stat.st_mtime
+
+    def _evict(self):
+        """Delete least recently used entries until the cache is under EVICTION_TARGET of its limit"""
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        size = sum(entry[1] for entry in entries)
+        removed = 0
+        for path, entry_size, _ in entries:
+            if size <= self.max_bytes * EVICTION_TARGET:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            size -= entry_size
+            removed += 1
+        self._size = size
+        logger.info(f"Evicted {removed} LLM cache entries, cache size now {size / 1024 / 1024:.1f} MB")
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Return the process-wide response cache, or None when LLM_CACHE=0"""
+    global _response_cache
+    if not CACHE_ENABLED:
+        return None
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache()
+        return _response_cache
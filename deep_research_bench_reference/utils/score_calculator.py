@@ -1,4 +1,154 @@
 import logging
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+
+# Fuzzy criterion matches below this similarity, or within FUZZY_MARGIN of the
+# runner-up, are treated as unmatched rather than guessed
+MIN_FUZZY_SCORE = 0.75
+FUZZY_MARGIN = 0.1
+
+# Matchers kept for recently scored criteria records
+MATCHER_CACHE_SIZE = 256
+
+_CJK_RUN_RE = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+")
+_WORD_RE = re.compile(r"[^\W_\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+")
+_EDGE_PUNCTUATION = " \t\"'`*-_.,;:!?()[]{}<>。，；：！？、（）【】《》“”‘’"
+
+
+def normalize_criterion(text):
+    """Canonical form of a criterion: NFKC, case-folded, single spaces, no edge punctuation"""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return " ".join(text.split()).strip(_EDGE_PUNCTUATION)
+
+
+def criterion_tokens(normalized_text):
+    """Token set of a normalized criterion: words, plus character bigrams of CJK runs"""
+    tokens = set(_WORD_RE.findall(normalized_text))
+    for run in _CJK_RUN_RE.findall(normalized_text):
+        if len(run) == 1:
+            tokens.add(run)
+        else:
+            tokens.update(map(str.__add__, run, run[1:]))
+    return tokens
+
+
+class CriterionMatcher:
+    """
+    Resolves criterion strings from the judge's output to criterion weights
+    
+    Built once per criteria record. Lookups try the exact text, then its
+    normalized form, both by hash. Failing that, candidates sharing tokens with
+    the text are found through an inverted index and scored by token-set
+    similarity (Dice coefficient), or, when one normalized text contains the
+    other, by 0.5 plus half their length ratio if that is higher, so a
+    truncated criterion still matches but a single shared word does not. The
+    best candidate is used only if it scores at least
+    MIN_FUZZY_SCORE and beats the runner-up by FUZZY_MARGIN.
+    
+    Args:
+        criteria_data: Criteria record with a "criterions" mapping of dimension to criteria
+    """
+    def __init__(self, criteria_data):
+        self.dimensions = {}
+        for dim, criterions in criteria_data.get("criterions", {}).items():
+            exact = {crit['criterion']: crit['weight'] for crit in criterions}
+            normalized = {}
+            entries = []
+            postings = {}
+            for text, weight in exact.items():
+                norm = normalize_criterion(text)
+                if norm in normalized:
+                    continue
+                normalized[norm] = (text, weight)
+                tokens = criterion_tokens(norm)
+                for token in tokens:
+                    postings.setdefault(token, []).append(len(entries))
+                entries.append((text, norm, tokens, weight))
+            self.dimensions[dim] = {
+                "exact": exact,
+                "normalized": normalized,
+                "entries": entries,
+                "postings": postings,
+                "average_weight": sum(exact.values()) / len(exact) if exact else 0.0,
+            }
+
+    def has_dimension(self, dim):
+        return dim in self.dimensions and bool(self.dimensions[dim]["exact"])
+
+    def average_weight(self, dim):
+        return self.dimensions[dim]["average_weight"]
+
+    def match(self, dim, criterion_text):
+        """
+        Find the weight of a criterion
+        
+        Returns:
+            (weight, score, matched criterion text); weight and matched text are
+            None when there is no confident match. score is 1.0 for exact and
+            normalized matches.
+        """
+        index = self.dimensions.get(dim)
+        if index is None:
+            return None, 0.0, None
+
+        weight = index["exact"].get(criterion_text)
+        if weight is not None:
+            return weight, 1.0, criterion_text
+
+        norm = normalize_criterion(criterion_text)
+        if norm in index["normalized"]:
+            text, weight = index["normalized"][norm]
+            return weight, 1.0, text
+
+        tokens = criterion_tokens(norm)
+        postings = index["postings"]
+        overlaps = {}
+        for token in tokens:
+            for entry_index in postings.get(token, ()):
+                overlaps[entry_index] = overlaps.get(entry_index, 0) + 1
+        if not overlaps:
+            return None, 0.0, None
+
+        scored = []
+        for entry_index, overlap in overlaps.items():
+            text, entry_norm, entry_tokens, entry_weight = index["entries"][entry_index]
+            score = 2 * overlap / (len(tokens) + len(entry_tokens))
+            if norm in entry_norm or entry_norm in norm:
+                shorter, longer = sorted((len(norm), len(entry_norm)))
+                score = max(score, 0.5 + 0.5 * shorter / longer)
+            scored.append((score, text, entry_weight))
+        scored.sort(key=lambda item: item[0], reverse=True)
+
+        best_score, best_text, best_weight = scored[0]
+        runner_up = scored[1][0] if len(scored) > 1 else 0.0
+        if best_score < MIN_FUZZY_SCORE or best_score - runner_up < FUZZY_MARGIN:
+            return None, best_score, None
+        return best_weight, best_score, best_text
+
+
+_matcher_cache = OrderedDict()
+_matcher_cache_lock = threading.Lock()
+
+
+def get_criterion_matcher(criteria_data):
+    """Return the CriterionMatcher for a criteria record, building it on first use"""
+    key = id(criteria_data)
+    with _matcher_cache_lock:
+        cached = _matcher_cache.get(key)
+        # Check identity too: an id can be reused once its record is garbage collected
+        if cached is not None and cached[0] is criteria_data:
+            _matcher_cache.move_to_end(key)
+            return cached[1]
+    matcher = CriterionMatcher(criteria_data)
+    with _matcher_cache_lock:
+        _matcher_cache[key] = (criteria_data, matcher)
+        _matcher_cache.move_to_end(key)
+        while len(_matcher_cache) > MATCHER_CACHE_SIZE:
+            _matcher_cache.popitem(last=False)
+    return matcher
+
 
 def calculate_weighted_scores(llm_output_json, criteria_data, language="en"):
     """
@@ -29,13 +179,12 @@ def calculate_weighted_scores(llm_output_json, criteria_data, language="en"):
         logging.error(error_msg)
         raise ValueError(error_msg)
     
-    # Create a mapping from criterion text to weight for easier lookup
-    criterion_weights = {}
-    for dim, criterions in criteria_data.get("criterions", {}).items():
-        criterion_weights[dim] = {crit['criterion']: crit['weight'] for crit in criterions}
+    # Indexed criterion-to-weight lookup, built once per criteria record
+    matcher = get_criterion_matcher(criteria_data)
 
-    # Record all unmatched criteria for warnings
+    # Record all unmatched and fuzzily matched criteria for warnings
     unmatched_criteria = set()
+    fuzzy_matches = {}
     
     for dim, scores_list in llm_output_json.items():
         if not isinstance(scores_list, list):
@@ -46,7 +195,7 @@ def calculate_weighted_scores(llm_output_json, criteria_data, language="en"):
             logging.warning(f"ID: {task_id} - Dimension '{dim}' from LLM output not found in criteria dimension weights. Skipping dimension.")
             continue
             
-        if dim not in criterion_weights:
+        if dim not in matcher.dimensions:
             logging.warning(f"ID: {task_id} - Dimension '{dim}' from LLM output not found in criteria details. Skipping dimension.")
             continue
 
@@ -54,10 +203,8 @@ def calculate_weighted_scores(llm_output_json, criteria_data, language="en"):
         dim_reference_weighted_sum = 0.0
         dim_total_weight = 0.0
 
-        dim_criteria_map = criterion_weights.get(dim, {})
-        
         # Skip dimension if no criteria mapping exists
-        if not dim_criteria_map:
+        if not matcher.has_dimension(dim):
             logging.warning(f"ID: {task_id} - No criteria mapping found for dimension '{dim}'. Skipping dimension.")
             continue
 
@@ -90,31 +237,15 @@ def calculate_weighted_scores(llm_output_json, criteria_data, language="en"):
 
             # If criterion_text exists and article_1_score is not None
             if criterion_text and article_1_score is not None:
-                # Check for exact match
-                weight = dim_criteria_map.get(criterion_text)
-                
-                # If exact match not found, try fuzzy matching
-                if weight is None:
-                    # First try case-insensitive matching
-                    criterion_lower = criterion_text.lower()
-                    for key, val in dim_criteria_map.items():
-                        if key.lower() == criterion_lower:
-                            weight = val
-                            break
-                    
-                    # If still not found, try substring matching
-                    if weight is None:
-                        for key, val in dim_criteria_map.items():
-                            # Check if criterion text contains criteria or criteria contains criterion text
-                            if criterion_lower in key.lower() or key.lower() in criterion_lower:
-                                weight = val
-                                break
+                # Exact and normalized matches by hash, then a scored token-set match
+                weight, match_score, matched_criterion = matcher.match(dim, criterion_text)
+                if weight is not None and match_score < 1.0:
+                    fuzzy_matches[f"{dim}:{criterion_text}"] = f"{matched_criterion} ({match_score:.2f})"
                 
-                # If still no match found, record and use average weight
+                # If no confident match found, record and use average weight
                 if weight is None:
                     unmatched_criteria.add(f"{dim}:{criterion_text}")
-                    # Calculate average weight for this dimension's criteria
-                    weight = sum(dim_criteria_map.values()) / len(dim_criteria_map)
+                    weight = matcher.average_weight(dim)
                     
                 dim_target_weighted_sum += article_1_score * weight
                 dim_total_weight += weight
@@ -125,7 +256,7 @@ def calculate_weighted_scores(llm_output_json, criteria_data, language="en"):
             else:
                 if criterion_text:
                     if dim not in getattr(calculate_weighted_scores, '_warned_dims', set()):
-                        logging.warning(f"ID: {task_id} - Criterion text mismatch for dimension '{dim}': '{criterion_text}'. Available criteria keys start with: {list(dim_criteria_map.keys())[:1] if dim_criteria_map else []}... Check prompt/output/criteria file consistency. Further mismatches in this dim won't be logged fully.")
+                        logging.warning(f"ID: {task_id} - Criterion text mismatch for dimension '{dim}': '{criterion_text}'. Available criteria keys start with: {list(matcher.dimensions[dim]['exact'])[:1]}... Check prompt/output/criteria file consistency. Further mismatches in this dim won't be logged fully.")
                         if not hasattr(calculate_weighted_scores, '_warned_dims'): calculate_weighted_scores._warned_dims = set()
                         calculate_weighted_scores._warned_dims.add(dim)
                     else:
@@ -150,9 +281,11 @@ def calculate_weighted_scores(llm_output_json, criteria_data, language="en"):
         total_target_score += dim_target_avg * dim_weight
         total_reference_score += dim_reference_avg * dim_weight
 
-    # Log warning if there are unmatched criteria
+    # Log fuzzy matches with their scores, and unmatched criteria
+    if fuzzy_matches:
+        logging.info(f"ID: {task_id} - {len(fuzzy_matches)} criteria matched by similarity: {fuzzy_matches}")
     if unmatched_criteria:
-        logging.warning(f"ID: {task_id} - {len(unmatched_criteria)} criteria without exact matches: {unmatched_criteria}")
+        logging.warning(f"ID: {task_id} - {len(unmatched_criteria)} criteria without confident matches, average weight used: {unmatched_criteria}")
     
     results["target"]["total"] = total_target_score
     results["reference"]["total"] = total_reference_score
@@ -0,0 +1,146 @@
+"""
+Microbenchmark: criterion-to-weight matching in calculate_weighted_scores
+
+Builds judge outputs for every task in the criteria file, with each criterion
+echoed exactly, reformatted (case, spacing, trailing punctuation), truncated,
+or replaced by a criterion from another task. Times the previous linear
+matcher against CriterionMatcher and counts how often each picks the right
+criterion, the wrong one, or none.
+
+Usage:
+    python -m utils.score_calculator_benchmark --criteria_file data/criteria_data/criteria.jsonl
+"""
+import argparse
+import random
+import time
+
+from .jsonl_store import iter_jsonl
+from .score_calculator import CriterionMatcher, calculate_weighted_scores
+
+VARIANTS = ("exact", "reformatted", "truncated", "foreign")
+
+
+def legacy_match(dim_criteria_map, criterion_text):
+    """Previous lookup: exact, then a case-insensitive scan, then a substring scan"""
+    weight = dim_criteria_map.get(criterion_text)
+    if weight is not None:
+        return criterion_text
+    criterion_lower = criterion_text.lower()
+    for key in dim_criteria_map:
+        if key.lower() == criterion_lower:
+            return key
+    for key in dim_criteria_map:
+        if criterion_lower in key.lower() or key.lower() in criterion_lower:
+            return key
+    return None
+
+
+def _variant_text(text, variant, foreign_texts, rng):
+    if variant == "exact":
+        return text
+    if variant == "reformatted":
+        return f"  {text.upper() if text.isascii() else text}  " + rng.choice(["", ".", "。", ":"])
+    if variant == "truncated":
+        return text[:max(4, int(len(text) * 0.7))]
+    return rng.choice(foreign_texts)
+
+
+def build_cases(criteria_rows, seed=0):
+    """(variant, criteria record, dimension, judge criterion text, intended criterion or None) for every criterion"""
+    rng = random.Random(seed)
+    all_texts = [crit['criterion'] for row in criteria_rows
+                 for criterions in row['criterions'].values() for crit in criterions]
+    cases = []
+    for row in criteria_rows:
+        own_texts = {crit['criterion'] for criterions in row['criterions'].values() for crit in criterions}
+        foreign_texts = [text for text in all_texts if text not in own_texts]
+        for dim, criterions in row['criterions'].items():
+            for crit in criterions:
+                variant = rng.choice(VARIANTS)
+                judge_text = _variant_text(crit['criterion'], variant, foreign_texts, rng)
+                cases.append((variant, row, dim, judge_text, None if variant == "foreign" else crit['criterion']))
+    return cases
+
+
+def _outcomes(matches, cases):
+    counts = {"correct": 0, "wrong": 0, "unmatched": 0}
+    for matched, (_, _, _, _, intended) in zip(matches, cases):
+        if matched == intended:
+            counts["correct"] += 1
+        elif matched is None:
+            counts["unmatched"] += 1
+        else:
+            counts["wrong"] += 1
+    return counts
+
+
+def _time_matches(match, cases, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        matches = [match(row, dim, text.strip()) for _, row, dim, text, _ in cases]
+    return (time.perf_counter() - start) / (rounds * len(cases)) * 1e6, matches
+
+
+def run_benchmark(criteria_file, rounds=20):
+    criteria_rows = list(iter_jsonl(criteria_file))
+    cases = build_cases(criteria_rows)
+
+    weight_maps = {row['id']: {dim: {crit['criterion']: crit['weight'] for crit in criterions}
+                               for dim, criterions in row['criterions'].items()}
+                   for row in criteria_rows}
+    start = time.perf_counter()
+    matchers = {row['id']: CriterionMatcher(row) for row in criteria_rows}
+    build_seconds = time.perf_counter() - start
+
+    def legacy(row, dim, text):
+        return legacy_match(weight_maps[row['id']][dim], text)
+
+    def indexed(row, dim, text):
+        return matchers[row['id']].match(dim, text)[2]
+
+    results = {"tasks": len(criteria_rows), "lookups": len(cases),
+               "matcher_build_ms_total": round(build_seconds * 1000, 2), "variants": {}}
+    for variant in VARIANTS + ("all",):
+        variant_cases = [case for case in cases if variant in ("all", case[0])]
+        legacy_us, legacy_matches = _time_matches(legacy, variant_cases, rounds)
+        indexed_us, indexed_matches = _time_matches(indexed, variant_cases, rounds)
+        results["variants"][variant] = {
+            "lookups": len(variant_cases),
+            "legacy_us": round(legacy_us, 2),
+            "indexed_us": round(indexed_us, 2),
+            "legacy": _outcomes(legacy_matches, variant_cases),
+            "indexed": _outcomes(indexed_matches, variant_cases),
+        }
+
+    # Whole-task scoring of exact judge output, the common case for the RACE judge
+    rng = random.Random(1)
+    judge_outputs = [
+        {dim: [{"criterion": crit['criterion'], "article_1_score": rng.randint(1, 10),
+                "article_2_score": rng.randint(1, 10)} for crit in criterions]
+         for dim, criterions in row['criterions'].items()}
+        for row in criteria_rows
+    ]
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for row, judge_output in zip(criteria_rows, judge_outputs):
+            calculate_weighted_scores(judge_output, row)
+    results["scoring_us_per_task"] = round((time.perf_counter() - start) / (rounds * len(criteria_rows)) * 1e6, 2)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the linear and indexed criterion matchers")
+    parser.add_argument("--criteria_file", type=str, default="data/criteria_data/criteria.jsonl", help="Criteria JSONL file")
+    parser.add_argument("--rounds", type=int, default=20, help="Passes over all criteria")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.criteria_file, args.rounds)
+    print(f"{results['tasks']} tasks, {results['lookups']} criteria, "
+          f"matchers built in {results['matcher_build_ms_total']} ms, "
+          f"calculate_weighted_scores {results['scoring_us_per_task']} us/task")
+    print(f"{'variant':12s} {'n':>5s} {'legacy us':>10s} {'indexed us':>11s}   outcomes (correct/wrong/unmatched)")
+    for variant, stats in results["variants"].items():
+        legacy, indexed = stats["legacy"], stats["indexed"]
+        print(f"{variant:12s} {stats['lookups']:5d} {stats['legacy_us']:10.2f} {stats['indexed_us']:11.2f}   "
+              f"legacy {legacy['correct']}/{legacy['wrong']}/{legacy['unmatched']}   "
+              f"indexed {indexed['correct']}/{indexed['wrong']}/{indexed['unmatched']}")
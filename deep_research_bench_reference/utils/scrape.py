@@ -6,7 +6,7 @@ import argparse
 import platform
 from tqdm import tqdm
 from .api import scrape_url
-from .io_utils import load_jsonl
+from .io_utils import JsonlStore
 
 
 def scrape(citation_url):
@@ -56,26 +56,27 @@ if __name__ == '__main__':
     output_path = args.output_path
     
     # initialize variables
-    raw_data = []
     data_to_process = []
-    processed = []
+    processed = set()
+    remaining = 0
     
     try:
-        raw_data = load_jsonl(args.raw_data_path)
+        raw_store = JsonlStore(args.raw_data_path)
         
         if os.path.exists(output_path):
-            processed = [d['id'] for d in load_jsonl(output_path)]
-            data_to_process = [d for d in raw_data if d['id'] not in processed]
-        else:
-            data_to_process = raw_data
+            with JsonlStore(output_path) as store:
+                processed = store.ids()
+        # Stream the raw data rather than holding every article and its citations in memory
+        data_to_process = (d for d in raw_store if d['id'] not in processed)
+        remaining = len(raw_store.ids() - processed)
     except:
         import sys
         print(f"cannot process file {args.raw_data_path}")
         sys.exit(f'{args.raw_data_path} has not been processed yet...')
     
-    print(f"processing {len(data_to_process)} instances...")
+    print(f"processing {remaining} instances...")
 
-    for d in tqdm(data_to_process):
+    for d in tqdm(data_to_process, total=remaining):
         # get the citations that need to be scraped
         citations = list([k for k, v in d['citations_deduped'].items() if 'url_content' not in v or not v['url_content']])
         results = []
@@ -1,6 +1,6 @@
 import os
 import argparse
-from utils import load_jsonl
+from utils import iter_jsonl, JsonlStore
 from tqdm import tqdm
 
 if __name__ == "__main__":
@@ -15,9 +15,12 @@ if __name__ == "__main__":
     total_num = 0
     total_usage = [0, 0]
 
-    data = load_jsonl(args.input_path)
+    # Rows are streamed, so take the progress bar total from the row index
+    with JsonlStore(args.input_path) as store:
+        num_rows = len(store)
+    data = iter_jsonl(args.input_path)
 
-    for d in tqdm(data):
+    for d in tqdm(data, total=num_rows):
         if not d['citations']:
             continue
         for c in d['citations_deduped'].values():
@@ -5,7 +5,7 @@ import time
 import argparse
 from tqdm import tqdm
 from functools import partial
-from .io_utils import load_jsonl
+from .io_utils import iter_jsonl, JsonlStore
 from .api import call_model
 import platform
 
@@ -117,7 +117,7 @@ def validate(data, id_to_lang_map):
     error = None
     while retries < 3:
         try:
-            response = call_model(user_prompt)
+            response = call_model(user_prompt, refresh_cache=retries > 0)
 
             validate_res = json.loads(response.replace("```json", "").replace("```", ""))
             for _v in validate_res:
@@ -160,10 +160,10 @@ if __name__ == '__main__':
     args = parser.parse_args()
     
     output_path = args.output_path
-    raw_data = load_jsonl(args.raw_data_path)
+    raw_store = JsonlStore(args.raw_data_path)
     
     # Load the query data to get language information
-    query_data = load_jsonl(args.query_data_path)
+    query_data = iter_jsonl(args.query_data_path)
     
     # Create a mapping from ID to language
     id_to_lang_map = {item['id']: item.get('language') for item in query_data if 'id' in item and 'language' in item}
@@ -174,15 +174,17 @@ if __name__ == '__main__':
     n_total_process = args.n_total_process
 
     # if the output file exists, load the processed ids and filter out the processed instances
+    processed = set()
     if os.path.exists(output_path):
-        processed = [d['id'] for d in load_jsonl(output_path)]
-        data_to_process = [d for d in raw_data if d['id'] not in processed]
-    else:
-        data_to_process = raw_data
+        with JsonlStore(output_path) as store:
+            processed = store.ids()
+    # Stream the raw data rather than holding every article and its citations in memory
+    data_to_process = (d for d in raw_store if d['id'] not in processed)
+    remaining = len(raw_store.ids() - processed)
 
-    print(f"Processing {len(data_to_process)} instances...")
+    print(f"Processing {remaining} instances...")
 
-    for d in tqdm(data_to_process):
+    for d in tqdm(data_to_process, total=remaining):
         # get the citations that need to be validated
         citations = [(k, v) for k, v in d['citations_deduped'].items()]
         
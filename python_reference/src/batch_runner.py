@@ -0,0 +1,244 @@
+"""Batch Runner for the Full Research Agent.
+
+This module runs the full agent in-process over a query.jsonl-style task set
+and writes results in the DeepResearch Bench raw_data format, one
+{"id", "prompt", "article"} row per completed task. Tasks run concurrently
+on one event loop, so they share the model clients, the researcher execution
+backend and, optionally, a persistent LLM cache.
+
+Rows are appended as soon as each task completes, and per-task timing and
+usage are appended to a sidecar <model_name>.timing.jsonl. A re-run skips
+tasks already present in the output file; --no-resume discards the output and
+timing files instead and starts over.
+
+--llm-cache and a record/replay cassette (DEEP_RESEARCH_CASSETTE) both install
+the global LangChain LLM cache, so only one of them can be used.
+
+Usage:
+    python -m deep_research.batch_runner --query-file query.jsonl --output-dir raw_data \\
+        --model-name deep-research --max-concurrent-tasks 4
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Optional
+
+from langchain_core.messages import HumanMessage
+
+from deep_research.budget import RunBudget, run_budget_config
+
+# ===== CONFIGURATION =====
+
+DEFAULT_MAX_CONCURRENT_TASKS = 4
+DEFAULT_TASK_TIMEOUT = 3600 # seconds
+DEFAULT_RECURSION_LIMIT = 50
+
+logger = logging.getLogger(__name__)
+
+# ===== JSONL HELPERS =====
+
+def load_jsonl(path: Path) -> list[dict]:
+    """Load non-empty lines of a JSONL file."""
+    with path.open("r", encoding="utf-8") as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+def append_jsonl(path: Path, rows: list[dict]) -> None:
+    """Append rows to a JSONL file, creating its directory if needed."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a", encoding="utf-8") as file:
+        for row in rows:
+            file.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+def completed_task_ids(output_path: Path) -> set[str]:
+    """Return the ids of tasks already written to an output file."""
+    if not output_path.exists():
+        return set()
+    return {str(row["id"]) for row in load_jsonl(output_path) if "id" in row}
+
+# ===== BATCH EXECUTION =====
+
+class BatchRunner:
+    """Run the full agent over many tasks with bounded concurrency.
+
+    Args:
+        output_path: raw_data JSONL file that completed rows are appended to
+        max_concurrent_tasks: Maximum number of agent runs in flight
+        budget_tier: Optional BUDGET_TIERS name applied to every task
+        timeout: Seconds before a single attempt is cancelled
+        retries: Extra attempts for a task that fails or times out
+        retry_delay: Seconds to wait between attempts
+    """
+
+    def __init__(
+        self,
+        output_path: Path,
+        max_concurrent_tasks: int = DEFAULT_MAX_CONCURRENT_TASKS,
+        budget_tier: Optional[str] = None,
+        timeout: float = DEFAULT_TASK_TIMEOUT,
+        retries: int = 1,
+        retry_delay: float = 5.0,
+    ):
+        self.output_path = output_path
+        self.timing_path = output_path.with_suffix(".timing.jsonl")
+        self.failed_path = output_path.parent / "failed_tasks.jsonl"
+        self.max_concurrent_tasks = max_concurrent_tasks
+        self.budget_tier = budget_tier
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_delay = retry_delay
+
+    def reset(self) -> None:
+        """Discard the output and timing rows of earlier runs."""
+        for path in (self.output_path, self.timing_path):
+            if path.exists():
+                logger.info(f"Discarding existing {path}")
+                path.unlink()
+
+    async def run_task(self, task: dict) -> dict:
+        """Run the agent on one task.
+
+        Returns:
+            Dictionary with the final report as "article", the run's "usage" and
+            the number of "attempts"
+
+        Raises:
+            Exception: The error of the last attempt once retries are exhausted
+        """
+        # Imported here so that --help and resume checks do not initialize the model clients
+        from deep_research.research_agent_full import agent
+
+        for attempt in range(self.retries + 1):
+            budget = RunBudget.for_tier(self.budget_tier) if self.budget_tier else RunBudget()
+            config = run_budget_config(budget, {"recursion_limit": DEFAULT_RECURSION_LIMIT})
+            try:
+                result = await asyncio.wait_for(
+                    agent.ainvoke({"messages": [HumanMessage(content=task["prompt"])]}, config=config),
+                    timeout=self.timeout
+                )
+                return {"article": result["final_report"], "usage": budget.usage(), "attempts": attempt + 1}
+            except Exception as e:
+                if attempt == self.retries:
+                    raise
+                logger.warning(f"[error] {task['id']} (attempt {attempt + 1}/{self.retries + 1}): {type(e).__name__}: {e}")
+                await asyncio.sleep(self.retry_delay)
+
+    async def run(self, tasks: list[dict]) -> tuple[int, int]:
+        """Run all tasks and append each result as it completes.
+
+        Args:
+            tasks: Tasks with "id" and "prompt" keys
+
+        Returns:
+            Tuple of (completed count, failed count)
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrent_tasks)
+        completed = 0
+        failed = 0
+        batch_start = time.monotonic()
+
+        async def run_one(task: dict) -> None:
+            nonlocal completed, failed
+            async with semaphore:
+                start = time.monotonic()
+                started_at = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+                try:
+                    result = await self.run_task(task)
+                except Exception as e:
+                    failed += 1
+                    append_jsonl(self.failed_path, [{
+                        "id": str(task["id"]),
+                        "prompt": task["prompt"],
+                        "error": f"{type(e).__name__}: {e}",
+                        "attempts": self.retries + 1,
+                        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+                    }])
+                    logger.error(f"[failed] {task['id']} logged to {self.failed_path.name}")
+                    return
+                elapsed = time.monotonic() - start
+
+                # Each row is written before the next await, so concurrent tasks never interleave lines
+                append_jsonl(self.output_path, [{"id": str(task["id"]), "prompt": task["prompt"], "article": result["article"]}])
+                append_jsonl(self.timing_path, [{
+                    "id": str(task["id"]),
+                    "started_at": started_at,
+                    "elapsed_seconds": round(elapsed, 2),
+                    "attempts": result["attempts"],
+                    "usage": result["usage"]
+                }])
+                completed += 1
+                logger.info(f"[{completed + failed}/{len(tasks)}] Completed {task['id']} ({elapsed:.1f}s)")
+
+        await asyncio.gather(*(run_one(task) for task in tasks))
+        logger.info(f"Batch finished in {time.monotonic() - batch_start:.1f}s")
+        return completed, failed
+
+# ===== CLI =====
+
+def select_tasks(tasks: list[dict], limit: int = 0, task_ids: str = "", skip_ids: Optional[set[str]] = None) -> list[dict]:
+    """Filter loaded tasks by limit, explicit ids and already completed ids."""
+    tasks = [task for task in tasks if "id" in task and isinstance(task.get("prompt"), str)]
+    if limit > 0:
+        tasks = tasks[:limit]
+    if task_ids:
+        wanted = {task_id.strip() for task_id in task_ids.split(",") if task_id.strip()}
+        tasks = [task for task in tasks if str(task["id"]) in wanted]
+    if skip_ids:
+        tasks = [task for task in tasks if str(task["id"]) not in skip_ids]
+    return tasks
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the full research agent over a JSONL query set")
+    parser.add_argument("--query-file", default="../deep_research_bench_reference/data/prompt_data/query.jsonl")
+    parser.add_argument("--output-dir", default="../deep_research_bench_reference/data/test_data/raw_data")
+    parser.add_argument("--model-name", default="deep-research", help="Output model name")
+    parser.add_argument("--max-concurrent-tasks", type=int, default=DEFAULT_MAX_CONCURRENT_TASKS)
+    parser.add_argument("--budget-tier", choices=["fast", "standard", "deep"], default=None,
+                        help="Run budget tier applied to every task (default: uncapped)")
+    parser.add_argument("--limit", type=int, default=0, help="Limit number of tasks (0 = all)")
+    parser.add_argument("--task-ids", type=str, default="",
+                        help="Comma-separated task IDs to run (e.g., '51,52,53')")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TASK_TIMEOUT, help="Seconds per attempt")
+    parser.add_argument("--retries", type=int, default=1)
+    parser.add_argument("--retry-delay", type=float, default=5.0)
+    parser.add_argument("--llm-cache", default=None,
+                        help="SQLite file for a persistent LLM cache shared by all tasks "
+                             "(not with DEEP_RESEARCH_CASSETTE)")
+    parser.add_argument("--no-resume", dest="resume", action="store_false",
+                        help="Start fresh, discarding existing output and timing files")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if args.llm_cache:
+        # Both would install the global LLM cache, and the later one would silently win
+        from deep_research.cassette import cassette_active
+        if cassette_active():
+            parser.error("--llm-cache cannot be combined with a DEEP_RESEARCH_CASSETTE cassette")
+        from langchain_community.cache import SQLiteCache
+        from langchain_core.globals import set_llm_cache
+        set_llm_cache(SQLiteCache(database_path=args.llm_cache))
+
+    output_path = Path(args.output_dir) / f"{args.model_name}.jsonl"
+    skip_ids = completed_task_ids(output_path) if args.resume else set()
+    tasks = select_tasks(load_jsonl(Path(args.query_file)), args.limit, args.task_ids, skip_ids)
+    logger.info(f"Running {len(tasks)} tasks ({len(skip_ids)} already completed), output: {output_path}")
+
+    runner = BatchRunner(
+        output_path,
+        max_concurrent_tasks=args.max_concurrent_tasks,
+        budget_tier=args.budget_tier,
+        timeout=args.timeout,
+        retries=args.retries,
+        retry_delay=args.retry_delay,
+    )
+    if not args.resume:
+        runner.reset()
+    completed, failed = asyncio.run(runner.run(tasks))
+    logger.info(f"Done. Completed: {completed}, Failed: {failed}, Output: {output_path}")
+
+if __name__ == "__main__":
+    main()
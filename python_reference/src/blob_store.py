@@ -0,0 +1,210 @@
+"""Disk-Spilled Blobs for Large State Values.
+
+Raw research notes and search tool outputs dominate the size of researcher
+and supervisor state, and of every checkpoint taken of it, yet raw_notes are
+never read by the final report. This module spills such values to
+compressed, content-addressed local files so state only carries a short
+reference:
+
+    ref = spill(text)        # "blob:sha256:<hex>" once spilling is enabled
+    text = load_blob(ref)    # lazy loader; plain strings pass through
+
+Spilling is opt-in. Set DEEP_RESEARCH_BLOB_DIR to a directory to enable it;
+otherwise spill() returns its input unchanged. Researchers running in other
+processes must see the same directory to resolve each other's references.
+
+Measure the effect on peak memory with:
+    python -m deep_research.blob_store measure --notes 400 --note-kb 64
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional
+
+from langchain_core.messages import BaseMessage
+
+# ===== CONFIGURATION =====
+
+BLOB_REF_PREFIX = "blob:sha256:"
+
+# Tool outputs shorter than this stay inline in researcher messages
+DEFAULT_SPILL_THRESHOLD_CHARS = 4096
+
+# ===== BLOB STORE =====
+
+class BlobStore:
+    """Content-addressed store of gzip-compressed text blobs.
+
+    Args:
+        root: Directory holding the blob files
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, digest: str) -> Path:
+        return self.root / digest[:2] / f"{digest}.gz"
+
+    def put(self, text: str) -> str:
+        """Store text and return its reference. Identical text is stored once."""
+        data = text.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write under a unique name, then rename, so readers never see a partial blob
+            tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(gzip.compress(data, compresslevel=6))
+            os.replace(tmp_path, path)
+        return BLOB_REF_PREFIX + digest
+
+    def get(self, ref: str) -> str:
+        """Load the text behind a reference.
+
+        Raises:
+            FileNotFoundError: If the blob is not in this store
+        """
+        digest = ref[len(BLOB_REF_PREFIX):]
+        return gzip.decompress(self._path(digest).read_bytes()).decode("utf-8")
+
+_blob_store: Optional[BlobStore] = None
+_blob_store_lock = threading.Lock()
+
+def get_blob_store() -> Optional[BlobStore]:
+    """Return the process-wide blob store, or None when spilling is not enabled."""
+    global _blob_store
+    root = os.environ.get("DEEP_RESEARCH_BLOB_DIR")
+    if not root:
+        return None
+    with _blob_store_lock:
+        if _blob_store is None or _blob_store.root != Path(root):
+            _blob_store = BlobStore(root)
+        return _blob_store
+
+# ===== SPILLING AND LAZY LOADING =====
+
+def is_blob_ref(value: object) -> bool:
+    """Whether a value is a blob reference."""
+    return isinstance(value, str) and value.startswith(BLOB_REF_PREFIX)
+
+def spill(text: str, threshold: int = 0) -> str:
+    """Replace text with a blob reference when spilling is enabled.
+
+    Args:
+        text: Text to spill
+        threshold: Texts shorter than this many characters are kept inline
+
+    Returns:
+        Blob reference, or the text itself when spilling is disabled or the text is short
+    """
+    store = get_blob_store()
+    if store is None or len(text) < threshold or is_blob_ref(text):
+        return text
+    return store.put(text)
+
+def load_blob(value: str) -> str:
+    """Resolve a blob reference to its text. Other strings are returned unchanged."""
+    if not is_blob_ref(value):
+        return value
+    store = get_blob_store()
+    if store is None:
+        raise FileNotFoundError(f"Cannot load {value}: DEEP_RESEARCH_BLOB_DIR is not set")
+    return store.get(value)
+
+def spill_message(message: BaseMessage, threshold: int = DEFAULT_SPILL_THRESHOLD_CHARS) -> BaseMessage:
+    """Return the message with a large string body replaced by a blob reference."""
+    if not isinstance(message.content, str):
+        return message
+    content = spill(message.content, threshold)
+    if content is message.content:
+        return message
+    return message.model_copy(update={"content": content})
+
+def resolve_messages(messages: list[BaseMessage]) -> list[BaseMessage]:
+    """Return messages with spilled bodies loaded back, for sending to a model."""
+    return [
+        message.model_copy(update={"content": load_blob(message.content)})
+        if is_blob_ref(message.content) else message
+        for message in messages
+    ]
+
+# ===== PEAK MEMORY MEASUREMENT =====
+
+def _measure_worker(notes: int, note_kb: int) -> dict:
+    """Accumulate raw notes through a checkpointed graph and report peak RSS."""
+    import operator
+    import random
+    import resource
+    import string
+    from typing import Annotated, TypedDict
+
+    from langgraph.checkpoint.memory import InMemorySaver
+    from langgraph.graph import END, START, StateGraph
+
+    class NotesState(TypedDict):
+        raw_notes: Annotated[list[str], operator.add]
+        steps: int
+
+    rng = random.Random(0)
+    words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9))) for _ in range(5000)]
+
+    def collect(state: NotesState) -> dict:
+        note = " ".join(rng.choices(words, k=note_kb * 1024 // 7))
+        return {"raw_notes": [spill(note)], "steps": state.get("steps", 0) + 1}
+
+    builder = StateGraph(NotesState)
+    builder.add_node("collect", collect)
+    builder.add_edge(START, "collect")
+    builder.add_conditional_edges("collect", lambda state: "collect" if state["steps"] < notes else END)
+    checkpointer = InMemorySaver()
+    graph = builder.compile(checkpointer=checkpointer)
+    graph.invoke({"raw_notes": [], "steps": 0}, {"configurable": {"thread_id": "measure"}, "recursion_limit": notes + 10})
+
+    checkpoint_bytes = sum(
+        len(value[1]) for value in checkpointer.blobs.values() if isinstance(value[1], bytes)
+    )
+    return {
+        "spilling": get_blob_store() is not None,
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "checkpoint_mb": round(checkpoint_bytes / 1024 / 1024, 1),
+    }
+
+def measure(notes: int, note_kb: int) -> list[dict]:
+    """Compare peak RSS with and without spilling, each in a fresh process."""
+    results = []
+    with tempfile.TemporaryDirectory() as blob_dir:
+        for blob_env in ("", blob_dir):
+            env = {**os.environ, "DEEP_RESEARCH_BLOB_DIR": blob_env}
+            output = subprocess.run(
+                [sys.executable, "-m", "deep_research.blob_store", "measure-worker",
+                 "--notes", str(notes), "--note-kb", str(note_kb)],
+                env=env, capture_output=True, text=True, check=True
+            ).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure peak memory with and without blob spilling")
+    parser.add_argument("command", choices=["measure", "measure-worker"])
+    parser.add_argument("--notes", type=int, default=400, help="Raw notes to accumulate")
+    parser.add_argument("--note-kb", type=int, default=64, help="Size of each note in KB")
+    args = parser.parse_args()
+
+    if args.command == "measure-worker":
+        sys.stdout.write(json.dumps(_measure_worker(args.notes, args.note_kb)) + "\n")
+    else:
+        inline, spilled = measure(args.notes, args.note_kb)
+        for result in (inline, spilled):
+            label = "spilled" if result["spilling"] else "inline"
+            sys.stdout.write(f"{label:8s} peak RSS {result['peak_rss_mb']:8.1f} MB   checkpoints {result['checkpoint_mb']:8.1f} MB\n")
+        reduction = 1 - spilled["peak_rss_mb"] / inline["peak_rss_mb"]
+        sys.stdout.write(f"Peak RSS reduction: {reduction:.0%}\n")
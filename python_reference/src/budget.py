@@ -0,0 +1,279 @@
+"""Run-Scoped Budgets for the Research Workflow.
+
+This module bounds what a single research run may spend:
+1. Tokens and estimated cost, charged from every chat model call
+2. Search calls, charged by tavily_search
+3. Wall-clock seconds since the run started
+4. Loop limits for the supervisor and researchers
+
+A RunBudget travels with the run in the LangGraph config, so every node,
+researcher and tool invoked inside the run sees the same object:
+
+    budget = RunBudget.for_tier("fast")
+    await agent.ainvoke(inputs, config=run_budget_config(budget))
+
+Nodes read it with get_run_budget(). Outside a budgeted run they get a fresh
+uncapped budget carrying the historical loop limits, so behavior is unchanged
+and no usage is carried over from one run to the next.
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field, fields
+from typing import Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langgraph.config import get_config
+
+# ===== CONFIGURATION =====
+
+# Loop limits used when a run has no explicit budget
+DEFAULT_MAX_SUPERVISOR_ITERATIONS = 15 # Calls to think_tool + ConductResearch + refine_draft_report
+DEFAULT_MAX_CONCURRENT_RESEARCHERS = 3
+
+# USD per million tokens, used to turn token counts into an estimated cost
+INPUT_COST_PER_MILLION_TOKENS = 1.25
+OUTPUT_COST_PER_MILLION_TOKENS = 10.0
+
+# Remaining budget fractions at which the supervisor is told to wrap up
+BUDGET_WARNING_FRACTION = 0.5
+BUDGET_CRITICAL_FRACTION = 0.2
+
+# ===== BUDGET =====
+
+@dataclass
+class RunBudget:
+    """Limits and running usage for one research run.
+
+    Limits set to None are not enforced; researchers have no tool-call cap
+    unless one is set. Usage counters are updated from several threads and
+    event loops, so all charges go through a lock.
+    """
+
+    max_tokens: Optional[int] = None
+    max_searches: Optional[int] = None
+    max_seconds: Optional[float] = None
+    max_cost_usd: Optional[float] = None
+    max_supervisor_iterations: int = DEFAULT_MAX_SUPERVISOR_ITERATIONS
+    max_concurrent_researchers: int = DEFAULT_MAX_CONCURRENT_RESEARCHERS
+    max_researcher_tool_calls: Optional[int] = None
+
+    input_tokens: int = 0
+    output_tokens: int = 0
+    searches: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    @classmethod
+    def for_tier(cls, tier: str) -> "RunBudget":
+        """Create a fresh budget from one of the BUDGET_TIERS templates."""
+        if tier not in BUDGET_TIERS:
+            raise ValueError(f"Unknown budget tier: {tier}. Expected one of {sorted(BUDGET_TIERS)}")
+        template = BUDGET_TIERS[tier]
+        return cls(**{
+            f.name: getattr(template, f.name)
+            for f in fields(cls)
+            if f.name.startswith("max_")
+        })
+
+    # ----- usage -----
+
+    @property
+    def tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+    @property
+    def cost_usd(self) -> float:
+        return (
+            self.input_tokens * INPUT_COST_PER_MILLION_TOKENS
+            + self.output_tokens * OUTPUT_COST_PER_MILLION_TOKENS
+        ) / 1_000_000
+
+    @property
+    def elapsed_seconds(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def charge_tokens(self, input_tokens: int, output_tokens: int) -> None:
+        """Record token usage from a model call."""
+        with self._lock:
+            self.input_tokens += input_tokens
+            self.output_tokens += output_tokens
+
+    def try_charge_search(self) -> bool:
+        """Reserve one search call, or return False if the search budget is spent."""
+        with self._lock:
+            if self.max_searches is not None and self.searches >= self.max_searches:
+                return False
+            if self._remaining_fraction_unlocked() <= 0:
+                return False
+            self.searches += 1
+            return True
+
+    def merge_usage(self, usage: dict) -> None:
+        """Add usage reported by a researcher that ran in another process."""
+        with self._lock:
+            self.input_tokens += usage.get("input_tokens", 0)
+            self.output_tokens += usage.get("output_tokens", 0)
+            self.searches += usage.get("searches", 0)
+
+    def remote_limits(self) -> dict:
+        """Limits for a researcher that runs in another process.
+
+        Each enforced cap is reduced to what remains of it now, so the remote
+        researcher stops where the run would. Researchers running in parallel
+        each get the full remainder; their usage is charged back afterwards.
+
+        Returns:
+            RunBudget keyword arguments for usage_tracking_budget
+        """
+        with self._lock:
+            tokens, cost_usd, elapsed_seconds = self.tokens, self.cost_usd, self.elapsed_seconds
+            return {
+                "max_tokens": None if self.max_tokens is None else max(0, self.max_tokens - tokens),
+                "max_searches": None if self.max_searches is None else max(0, self.max_searches - self.searches),
+                "max_seconds": None if self.max_seconds is None else max(0.0, self.max_seconds - elapsed_seconds),
+                "max_cost_usd": None if self.max_cost_usd is None else max(0.0, self.max_cost_usd - cost_usd),
+                "max_researcher_tool_calls": self.max_researcher_tool_calls,
+            }
+
+    def usage(self) -> dict:
+        """Snapshot of usage so far."""
+        return {
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "searches": self.searches,
+            "cost_usd": round(self.cost_usd, 4),
+            "elapsed_seconds": round(self.elapsed_seconds, 2),
+        }
+
+    # ----- limits -----
+
+    def _remaining_fraction_unlocked(self) -> float:
+        fractions = [1.0]
+        for used, limit in (
+            (self.tokens, self.max_tokens),
+            (self.searches, self.max_searches),
+            (self.elapsed_seconds, self.max_seconds),
+            (self.cost_usd, self.max_cost_usd),
+        ):
+            if limit is not None:
+                fractions.append(1.0 - used / limit if limit > 0 else 0.0)
+        return max(0.0, min(fractions))
+
+    def remaining_fraction(self) -> float:
+        """Fraction of the tightest limit still available, from 1.0 down to 0.0."""
+        with self._lock:
+            return self._remaining_fraction_unlocked()
+
+    def exhausted(self) -> bool:
+        """Whether any enforced limit has been reached."""
+        return self.remaining_fraction() <= 0
+
+    def steering_message(self) -> str:
+        """Budget guidance for the supervisor prompt, empty while budget is plentiful."""
+        remaining = self.remaining_fraction()
+        if remaining > BUDGET_WARNING_FRACTION:
+            return ""
+        usage = self.usage()
+        summary = (
+            f"{remaining:.0%} of this run's budget remains "
+            f"(tokens used: {usage['input_tokens'] + usage['output_tokens']}, searches used: {usage['searches']}, "
+            f"elapsed: {usage['elapsed_seconds']:.0f}s, estimated cost: ${usage['cost_usd']:.2f})."
+        )
+        if remaining > BUDGET_CRITICAL_FRACTION:
+            return (
+                f"<Budget>\n{summary} Delegate only the most important remaining gaps, "
+                "with fewer parallel researchers.\n</Budget>"
+            )
+        return (
+            f"<Budget>\n{summary} The budget is nearly exhausted. Do not start new research. "
+            "Call refine_draft_report once with the findings you have if the draft is out of date, "
+            "then call ResearchComplete.\n</Budget>"
+        )
+
+# Budget templates per request tier. Tiers trade depth for latency SLOs.
+BUDGET_TIERS = {
+    "fast": RunBudget(
+        max_tokens=400_000,
+        max_searches=20,
+        max_seconds=180,
+        max_cost_usd=1.0,
+        max_supervisor_iterations=5,
+        max_concurrent_researchers=2,
+        max_researcher_tool_calls=6,
+    ),
+    "standard": RunBudget(
+        max_tokens=1_500_000,
+        max_searches=60,
+        max_seconds=900,
+        max_cost_usd=5.0,
+        max_supervisor_iterations=10,
+        max_concurrent_researchers=3,
+        max_researcher_tool_calls=12,
+    ),
+    "deep": RunBudget(
+        max_tokens=5_000_000,
+        max_searches=200,
+        max_seconds=3600,
+        max_cost_usd=20.0,
+        max_researcher_tool_calls=20,
+    ),
+}
+
+# ===== RUN INTEGRATION =====
+
+class BudgetCallbackHandler(BaseCallbackHandler):
+    """Charge token usage from every chat model call to a budget."""
+
+    run_inline = True
+
+    def __init__(self, budget: RunBudget):
+        self.budget = budget
+
+    def on_llm_end(self, response, **kwargs):
+        for generations in response.generations:
+            for generation in generations:
+                metadata = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                self.budget.charge_tokens(metadata.get("input_tokens", 0), metadata.get("output_tokens", 0))
+
+def run_budget_config(budget: RunBudget, config: Optional[dict] = None) -> dict:
+    """Attach a budget to a LangGraph run config.
+
+    The budget is placed under configurable["run_budget"] for nodes to read,
+    and a callback handler is added so model calls are charged to it.
+
+    Args:
+        budget: Budget for the run
+        config: Existing run config to extend
+
+    Returns:
+        New run config
+    """
+    config = dict(config or {})
+    config["configurable"] = {**config.get("configurable", {}), "run_budget": budget}
+    config["callbacks"] = list(config.get("callbacks") or []) + [BudgetCallbackHandler(budget)]
+    return config
+
+def get_run_budget() -> RunBudget:
+    """Return the budget of the run being executed.
+
+    Returns:
+        The run's budget, or a new uncapped budget when called outside a
+        budgeted run. The latter is not shared, so its usage is not recorded.
+    """
+    try:
+        config = get_config()
+    except RuntimeError:
+        return RunBudget()
+    return config.get("configurable", {}).get("run_budget") or RunBudget()
+
+def usage_tracking_budget(limits: Optional[dict] = None) -> RunBudget:
+    """Create the budget of a researcher running in another process.
+
+    Args:
+        limits: Limits from the supervisor's RunBudget.remote_limits(); uncapped if omitted
+
+    Returns:
+        Budget that enforces the limits and records the researcher's usage to report back
+    """
+    return RunBudget(**(limits or {}))
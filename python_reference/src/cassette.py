@@ -0,0 +1,244 @@
+"""Record/Replay Cassettes for Model and Search I/O.
+
+Whole agent runs can be captured once and replayed offline, so orchestration
+can be benchmarked and profiled without live LLM or Tavily calls:
+
+    DEEP_RESEARCH_CASSETTE=runs/q1.jsonl DEEP_RESEARCH_CASSETTE_MODE=record python ...
+    DEEP_RESEARCH_CASSETTE=runs/q1.jsonl DEEP_RESEARCH_CASSETTE_MODE=replay python ...
+
+Every chat model call goes through a LangChain LLM cache (CassetteCache), and
+tavily_search_multiple goes through cassette_call. Both key entries by a hash
+of the normalized request: message ids are dropped by LangChain, and dates
+rendered into prompts are masked so a cassette replays on any day. Identical
+requests are replayed in recorded order.
+
+In replay mode a request missing from the cassette raises CassetteMiss rather
+than reaching the network. Set DEEP_RESEARCH_CASSETTE_LATENCY=1 to sleep for
+each call's recorded latency, so replayed runs keep realistic timing.
+
+Streaming models fall back to a single chunk while a cassette is active,
+since LangChain's streaming path bypasses the LLM cache.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from langchain_core.caches import BaseCache
+from langchain_core.globals import set_llm_cache
+from langchain_core.load import dumps, loads
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, Generation
+
+# ===== CONFIGURATION =====
+
+CASSETTE_MODES = ("record", "replay")
+
+# Dates rendered by get_today_str, e.g. "Mon Oct 19, 2026"
+DATE_PATTERN = re.compile(
+    r"\b(?:Mon|Tue|Wed|Thu|Fri|Sat|Sun) (?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec) \d{1,2}, \d{4}\b"
+)
+
+# Classes a recorded chat model response may contain; replay revives nothing else
+REPLAY_ALLOWED_OBJECTS = (Generation, ChatGeneration, ChatGenerationChunk, AIMessage, AIMessageChunk)
+
+class CassetteMiss(KeyError):
+    """Raised in replay mode for a request that was never recorded."""
+
+# ===== CASSETTE =====
+
+# Message fields that vary between a live call and its replay, such as the
+# total_cost LangChain adds to usage on cache hits
+VOLATILE_MESSAGE_FIELDS = frozenset({"usage_metadata", "response_metadata"})
+
+def normalize_request(text: str) -> str:
+    """Mask run-specific details that should not affect the request key."""
+    return DATE_PATTERN.sub("<date>", text)
+
+def strip_volatile_fields(value: Any) -> Any:
+    """Drop VOLATILE_MESSAGE_FIELDS from serialized messages."""
+    if isinstance(value, dict):
+        return {key: strip_volatile_fields(item) for key, item in value.items() if key not in VOLATILE_MESSAGE_FIELDS}
+    if isinstance(value, list):
+        return [strip_volatile_fields(item) for item in value]
+    return value
+
+def request_key(kind: str, request: Any) -> str:
+    """Hash a normalized request of the given kind ("llm" or "tavily")."""
+    payload = normalize_request(json.dumps(request, sort_keys=True, default=str))
+    return hashlib.sha256(f"{kind}\x00{payload}".encode("utf-8")).hexdigest()
+
+class Cassette:
+    """Append-only JSONL file of recorded request/response pairs.
+
+    Args:
+        path: Cassette file
+        mode: "record" to call live services and append, "replay" to serve recordings
+        emulate_latency: In replay mode, sleep for each call's recorded latency
+    """
+
+    def __init__(self, path: str, mode: str, emulate_latency: bool = False):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Unknown cassette mode: {mode}. Expected one of {CASSETTE_MODES}")
+        self.path = Path(path)
+        self.mode = mode
+        self.emulate_latency = emulate_latency
+        self._lock = threading.Lock()
+        self._entries = defaultdict(list)
+        self._next_index = defaultdict(int)
+        if mode == "replay":
+            with self.path.open("r", encoding="utf-8") as file:
+                for line in file:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries[entry["key"]].append(entry)
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def record(self, kind: str, key: str, response: Any, latency: float) -> None:
+        """Append one response to the cassette."""
+        line = json.dumps({"kind": kind, "key": key, "latency": round(latency, 4), "response": response})
+        with self._lock:
+            with self.path.open("a", encoding="utf-8") as file:
+                file.write(line + "\n")
+
+    def replay(self, kind: str, key: str) -> tuple[Any, float]:
+        """Return the next recorded response and latency for a request.
+
+        Raises:
+            CassetteMiss: If the request was not recorded
+        """
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                raise CassetteMiss(f"No {kind} response recorded for request {key[:12]} in {self.path}")
+            # Serve repeated identical requests in recorded order, then keep repeating the last
+            index = min(self._next_index[key], len(entries) - 1)
+            self._next_index[key] += 1
+            entry = entries[index]
+        return entry["response"], entry["latency"] if self.emulate_latency else 0.0
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+
+def llm_request_key(prompt: str, llm_string: str) -> str:
+    """Key a chat model call by its serialized messages and model parameters."""
+    try:
+        messages = strip_volatile_fields(json.loads(prompt))
+    except json.JSONDecodeError:
+        messages = prompt
+    return request_key("llm", [messages, llm_string])
+
+class CassetteCache(BaseCache):
+    """LangChain LLM cache that records or replays every chat model call."""
+
+    def __init__(self, cassette: Cassette):
+        self.cassette = cassette
+        self._started = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[list]:
+        key = llm_request_key(prompt, llm_string)
+        if self.cassette.mode == "record":
+            with self._lock:
+                self._started[key].append(time.monotonic())
+            return None
+        response, latency = self.cassette.replay("llm", key)
+        time.sleep(latency)
+        return [loads(generation, allowed_objects=REPLAY_ALLOWED_OBJECTS) for generation in response]
+
+    async def alookup(self, prompt: str, llm_string: str) -> Optional[list]:
+        key = llm_request_key(prompt, llm_string)
+        if self.cassette.mode == "record":
+            return self.lookup(prompt, llm_string)
+        response, latency = self.cassette.replay("llm", key)
+        await asyncio.sleep(latency)
+        return [loads(generation, allowed_objects=REPLAY_ALLOWED_OBJECTS) for generation in response]
+
+    def update(self, prompt: str, llm_string: str, return_val: list) -> None:
+        if self.cassette.mode != "record":
+            return
+        key = llm_request_key(prompt, llm_string)
+        with self._lock:
+            started = self._started[key].pop(0) if self._started[key] else time.monotonic()
+        self.cassette.record("llm", key, [dumps(generation) for generation in return_val], time.monotonic() - started)
+
+    async def aupdate(self, prompt: str, llm_string: str, return_val: list) -> None:
+        self.update(prompt, llm_string, return_val)
+
+    def clear(self, **kwargs: Any) -> None:
+        pass
+
+# ===== PROCESS CONFIGURATION =====
+
+_cassette: Optional[Cassette] = None
+
+def get_cassette() -> Optional[Cassette]:
+    """Return the active cassette, or None when not recording or replaying."""
+    return _cassette
+
+def cassette_call(kind: str, request: dict, call: Callable[[], Any]) -> Any:
+    """Run a non-model call through the active cassette.
+
+    Args:
+        kind: Request kind, part of the key
+        request: JSON-serializable description of the call
+        call: Performs the live call
+
+    Returns:
+        Live result, recorded result when replaying, or the live result when no
+        cassette is active
+
+    Raises:
+        CassetteMiss: In replay mode, if the request was not recorded
+    """
+    if _cassette is None:
+        return call()
+    key = request_key(kind, request)
+    if _cassette.mode == "replay":
+        response, latency = _cassette.replay(kind, key)
+        time.sleep(latency)
+        return response
+    started = time.monotonic()
+    response = call()
+    _cassette.record(kind, key, response, time.monotonic() - started)
+    return response
+
+def configure_cassette(path: Optional[str], mode: Optional[str] = None, emulate_latency: bool = False) -> Optional[Cassette]:
+    """Activate a cassette for this process, or deactivate it when path is empty.
+
+    Args:
+        path: Cassette file
+        mode: "record" or "replay", defaulting to replay when the file exists
+        emulate_latency: In replay mode, sleep for recorded latencies
+
+    Returns:
+        Active cassette, or None
+    """
+    global _cassette
+    if not path:
+        if _cassette is not None:
+            set_llm_cache(None)
+        _cassette = None
+        return None
+    mode = mode or ("replay" if Path(path).exists() else "record")
+    _cassette = Cassette(path, mode, emulate_latency)
+    set_llm_cache(CassetteCache(_cassette))
+    return _cassette
+
+def cassette_active() -> bool:
+    """Whether model calls are being recorded or replayed."""
+    return _cassette is not None
+
+configure_cassette(
+    os.environ.get("DEEP_RESEARCH_CASSETTE"),
+    os.environ.get("DEEP_RESEARCH_CASSETTE_MODE") or None,
+    os.environ.get("DEEP_RESEARCH_CASSETTE_LATENCY") == "1",
+)
@@ -0,0 +1,270 @@
+"""Event-Loop Blocking Detector.
+
+Async nodes that call blocking code (a sync model invoke, a sync HTTP client)
+stall every other coroutine on the event loop, and the stall stays invisible
+until throughput collapses. This debug mode finds them:
+1. A heartbeat scheduled on the loop measures how late it wakes up
+2. A watchdog thread samples the loop thread's stack while a heartbeat is overdue
+3. Each stall over the threshold is attributed to the graph node and the
+   deep_research call on that stack, with the stack sample kept as evidence
+
+The monitor attaches itself to the event loop of any LangChain run once
+DEEP_RESEARCH_LOOP_MONITOR=1 is set; the full agent reads the variable when
+its graph is built, other callers use configure_loop_monitor. DEEP_RESEARCH_LOOP_MONITOR_THRESHOLD_MS
+sets the stall threshold (default 100). A summary grouped by node and call is
+printed to stderr at exit, and written as JSON after every top-level run to
+DEEP_RESEARCH_LOOP_MONITOR_FILE when set.
+"""
+
+import asyncio
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import defaultdict
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.tracers.context import register_configure_hook
+
+from deep_research.tracing import node_name_for_code
+
+# ===== CONFIGURATION =====
+
+DEFAULT_STALL_THRESHOLD_MS = 100
+STACK_SAMPLE_DEPTH = 20
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# ===== STALL ATTRIBUTION =====
+
+@dataclass
+class Stall:
+    """One period in which the event loop could not run other tasks."""
+
+    duration_ms: float
+    node: str
+    call: str
+    blocked_in: str
+    stack: list[str]
+    at: float
+
+def attribute_stack(frame) -> tuple[str, str, str]:
+    """Find the graph node, deep_research call and innermost frame of a stack.
+
+    Args:
+        frame: Innermost frame of the blocked thread
+
+    Returns:
+        Tuple of (node name, deep_research call site, innermost frame location)
+    """
+    blocked_in = f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}:{frame.f_lineno}"
+    call = "unknown"
+    node = "unknown"
+    current = frame
+    while current is not None:
+        code = current.f_code
+        name = node_name_for_code(code)
+        if name is not None:
+            node = name
+            break
+        if call == "unknown" and os.path.abspath(code.co_filename).startswith(PACKAGE_DIR) \
+                and os.path.abspath(code.co_filename) != os.path.abspath(__file__):
+            call = f"{os.path.basename(code.co_filename)}:{code.co_name}:{current.f_lineno}"
+        current = current.f_back
+    return node, call, blocked_in
+
+# ===== MONITOR =====
+
+class LoopMonitor:
+    """Detect and attribute stalls of one event loop.
+
+    Args:
+        loop: Event loop to watch; must be running in the current thread
+        threshold_ms: Heartbeat lateness that counts as a stall
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, threshold_ms: float = DEFAULT_STALL_THRESHOLD_MS):
+        self.loop = loop
+        self.threshold = threshold_ms / 1000
+        self.interval = self.threshold / 2
+        self.stalls: list[Stall] = []
+        self._loop_thread_id = threading.get_ident()
+        self._next_tick = time.monotonic() + self.interval
+        self._sample = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        loop.call_later(self.interval, self._tick)
+        threading.Thread(target=self._watch, name="loop-monitor", daemon=True).start()
+
+    def _tick(self) -> None:
+        """Heartbeat run on the loop; records a stall if it woke up late."""
+        now = time.monotonic()
+        lag = now - self._next_tick
+        with self._lock:
+            sample, self._sample = self._sample, None
+        if lag >= self.threshold:
+            node, call, blocked_in, stack = sample or ("unknown", "unknown", "unknown", [])
+            self.stalls.append(Stall(round(lag * 1000, 1), node, call, blocked_in, stack, time.time()))
+        self._next_tick = now + self.interval
+        if not self._stopped.is_set():
+            self.loop.call_later(self.interval, self._tick)
+
+    def _watch(self) -> None:
+        """Watchdog thread; samples the loop thread's stack while a heartbeat is overdue."""
+        while not self._stopped.wait(self.interval / 2):
+            if self.loop.is_closed():
+                self._stopped.set()
+                _forget_monitor(self)
+                return
+            if time.monotonic() - self._next_tick < self.threshold / 2:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            node, call, blocked_in = attribute_stack(frame)
+            stack = traceback.format_stack(frame)[-STACK_SAMPLE_DEPTH:]
+            with self._lock:
+                # Keep the first sample of a stall; later ones usually show the same frame
+                if self._sample is None:
+                    self._sample = (node, call, blocked_in, stack)
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+_monitors: dict[int, LoopMonitor] = {}
+# Stalls of monitors whose loop has closed, kept for the exit summary
+_closed_loop_stalls: list[Stall] = []
+_monitors_lock = threading.Lock()
+
+def _forget_monitor(monitor: LoopMonitor) -> None:
+    """Drop the monitor of a closed loop, keeping its stalls."""
+    with _monitors_lock:
+        if _monitors.get(id(monitor.loop)) is monitor:
+            del _monitors[id(monitor.loop)]
+        _closed_loop_stalls.extend(monitor.stalls)
+
+def watch_running_loop(threshold_ms: Optional[float] = None) -> Optional[LoopMonitor]:
+    """Attach a monitor to the running event loop, once per loop.
+
+    Returns:
+        The loop's monitor, or None when called outside a running loop
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+    with _monitors_lock:
+        monitor = _monitors.get(id(loop))
+        if monitor is None or monitor.loop is not loop:
+            if monitor is not None:
+                # A closed loop whose id was reused before its watchdog noticed
+                monitor.stop()
+                _closed_loop_stalls.extend(monitor.stalls)
+            if threshold_ms is None:
+                threshold_ms = float(os.environ.get("DEEP_RESEARCH_LOOP_MONITOR_THRESHOLD_MS", DEFAULT_STALL_THRESHOLD_MS))
+            monitor = LoopMonitor(loop, threshold_ms)
+            _monitors[id(loop)] = monitor
+        return monitor
+
+def all_stalls() -> list[Stall]:
+    """Stalls recorded by every monitor in this process."""
+    with _monitors_lock:
+        monitors = list(_monitors.values())
+        stalls = list(_closed_loop_stalls)
+    return stalls + [stall for monitor in monitors for stall in monitor.stalls]
+
+# ===== SUMMARY =====
+
+def summarize_stalls(stalls: list[Stall]) -> list[dict]:
+    """Group stalls by node and call, worst total first."""
+    groups = defaultdict(list)
+    for stall in stalls:
+        groups[(stall.node, stall.call)].append(stall)
+    summary = []
+    for (node, call), group in groups.items():
+        worst = max(group, key=lambda stall: stall.duration_ms)
+        summary.append({
+            "node": node,
+            "call": call,
+            "count": len(group),
+            "total_ms": round(sum(stall.duration_ms for stall in group), 1),
+            "max_ms": worst.duration_ms,
+            "blocked_in": worst.blocked_in,
+            "stack": worst.stack,
+        })
+    return sorted(summary, key=lambda entry: entry["total_ms"], reverse=True)
+
+def format_summary(stalls: list[Stall]) -> str:
+    """Render a stall summary for the terminal."""
+    if not stalls:
+        return "Event loop monitor: no stalls recorded."
+    lines = [f"Event loop monitor: {len(stalls)} stalls, {sum(s.duration_ms for s in stalls):.0f} ms blocked"]
+    for entry in summarize_stalls(stalls):
+        lines.append(
+            f"  {entry['total_ms']:9.1f} ms  {entry['count']:4d}x  max {entry['max_ms']:8.1f} ms  "
+            f"node={entry['node']}  call={entry['call']}  blocked in {entry['blocked_in']}"
+        )
+        lines.extend("      " + line.rstrip() for line in "".join(entry["stack"][-6:]).splitlines())
+    return "\n".join(lines)
+
+def export_summary(path: str) -> None:
+    """Write the stall summary and raw stalls as JSON."""
+    stalls = all_stalls()
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({
+            "summary": summarize_stalls(stalls),
+            "stalls": [asdict(stall) for stall in stalls],
+        }, file, indent=2)
+
+# ===== RUN INTEGRATION =====
+
+class LoopMonitorCallbackHandler(BaseCallbackHandler):
+    """Attach the monitor to each run's event loop and export at run end."""
+
+    run_inline = True
+
+    def __init__(self, export_path: Optional[str] = None):
+        self.export_path = export_path
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs):
+        if parent_run_id is None:
+            watch_running_loop()
+
+    def on_chain_end(self, outputs, *, run_id, parent_run_id=None, **kwargs):
+        if parent_run_id is None and self.export_path:
+            export_summary(self.export_path)
+
+_loop_monitor_callback: ContextVar[Optional[LoopMonitorCallbackHandler]] = ContextVar(
+    "deep_research_loop_monitor_callback", default=None
+)
+register_configure_hook(_loop_monitor_callback, inheritable=True)
+
+_summary_at_exit_registered = False
+
+def configure_loop_monitor(enabled: bool, export_path: Optional[str] = None) -> None:
+    """Turn the blocking detector on or off for runs started in this process."""
+    global _summary_at_exit_registered
+    _loop_monitor_callback.set(LoopMonitorCallbackHandler(export_path) if enabled else None)
+    if enabled and not _summary_at_exit_registered:
+        atexit.register(_write_summary_at_exit)
+        _summary_at_exit_registered = True
+
+def configure_loop_monitor_from_env() -> None:
+    """Configure the blocking detector from DEEP_RESEARCH_LOOP_MONITOR and DEEP_RESEARCH_LOOP_MONITOR_FILE.
+
+    Does nothing when DEEP_RESEARCH_LOOP_MONITOR is unset, so a monitor that
+    was configured in code stays as it is.
+    """
+    enabled = os.environ.get("DEEP_RESEARCH_LOOP_MONITOR")
+    if enabled is None:
+        return
+    configure_loop_monitor(enabled == "1", os.environ.get("DEEP_RESEARCH_LOOP_MONITOR_FILE"))
+
+def _write_summary_at_exit() -> None:
+    if _loop_monitor_callback.get() is not None:
+        sys.stderr.write(format_summary(all_stalls()) + "\n")
@@ -11,13 +11,15 @@ maintaining isolated context windows for each research topic.
 """
 
 import asyncio
+import random
 
 from typing_extensions import Literal
 
 from langchain.chat_models import init_chat_model
 from langchain_core.messages import (
-    HumanMessage, 
+    AIMessage,
     BaseMessage, 
+    HumanMessage,
     SystemMessage, 
     ToolMessage,
     filter_messages
@@ -26,13 +28,23 @@ from langgraph.graph import StateGraph, START, END
 from langgraph.types import Command
 
 from deep_research.prompts import lead_researcher_with_multiple_steps_diffusion_double_check_prompt
-from deep_research.research_agent import researcher_agent
+from deep_research.budget import get_run_budget
+from deep_research.researcher_backends import get_researcher_backend, is_transient_error
+from deep_research.tracing import traced_node, tracer
 from deep_research.state_multi_agent_supervisor import (
     SupervisorState, 
     ConductResearch,
     ResearchComplete
 )
-from deep_research.utils import get_today_str, think_tool, refine_draft_report
+from deep_research.utils import (
+    get_today_str,
+    think_tool,
+    refine_draft_report,
+    topic_shingles,
+    topic_similarity,
+    draft_change_ratio,
+    count_new_citations
+)
 
 def get_notes_from_tool_calls(messages: list[BaseMessage]) -> list[str]:
     """Extract research notes from ToolMessage objects in supervisor message history.
@@ -42,6 +54,8 @@ def get_notes_from_tool_calls(messages: list[BaseMessage]) -> list[str]:
     sub-agents via ConductResearch tool calls, each sub-agent returns its
     compressed findings as the content of a ToolMessage. This function
     extracts all such ToolMessage content to compile the final research notes.
+    ToolMessages reporting failed research are skipped so error text never
+    reaches the final report as a finding.
 
     Args:
         messages: List of messages from supervisor's conversation history
@@ -49,7 +63,122 @@ def get_notes_from_tool_calls(messages: list[BaseMessage]) -> list[str]:
     Returns:
         List of research note strings extracted from ToolMessage objects
     """
-    return [tool_msg.content for tool_msg in filter_messages(messages, include_types="tool")]
+    return [
+        tool_msg.content
+        for tool_msg in filter_messages(messages, include_types="tool")
+        if tool_msg.status != "error" and not is_skipped_research(tool_msg)
+    ]
+
+def skipped_research_message(tool_call: dict, content: str) -> ToolMessage:
+    """Answer a ConductResearch call that is not launched.
+
+    The message is tagged through its artifact so it is neither taken for
+    findings nor counted as research already done.
+
+    Args:
+        tool_call: ConductResearch tool call that is skipped
+        content: Explanation for the supervisor
+
+    Returns:
+        ToolMessage answering the tool call
+    """
+    return ToolMessage(
+        content=content,
+        name=tool_call["name"],
+        tool_call_id=tool_call["id"],
+        artifact={"research_skipped": True}
+    )
+
+def is_skipped_research(tool_msg: ToolMessage) -> bool:
+    """Whether a ToolMessage answers a ConductResearch call that was never launched."""
+    return isinstance(tool_msg.artifact, dict) and tool_msg.artifact.get("research_skipped", False)
+
+def get_prior_research_topics(messages: list[BaseMessage]) -> list[str]:
+    """Collect research topics delegated in earlier supervisor iterations.
+
+    Only calls whose researcher ran and returned findings count; a topic that
+    was skipped as a duplicate or over the parallel limit, or whose researcher
+    failed, was never researched, so it must not block a later call on the
+    same topic.
+
+    Args:
+        messages: List of messages from supervisor's conversation history
+
+    Returns:
+        List of research_topic strings from previous ConductResearch calls
+    """
+    results = {
+        tool_msg.tool_call_id: tool_msg
+        for tool_msg in filter_messages(messages, include_types="tool")
+    }
+    return [
+        tool_call["args"].get("research_topic", "")
+        for message in filter_messages(messages, include_types="ai")
+        for tool_call in message.tool_calls
+        if tool_call["name"] == "ConductResearch"
+        and tool_call["id"] in results
+        and results[tool_call["id"]].status != "error"
+        and not is_skipped_research(results[tool_call["id"]])
+    ]
+
+def partition_research_calls(
+    conduct_research_calls: list[dict],
+    prior_topics: list[str],
+    threshold: float
+) -> tuple[list[dict], list[ToolMessage]]:
+    """Drop ConductResearch calls that overlap with other topics before launch.
+
+    A call is skipped when its topic is a near-duplicate of a topic researched
+    in an earlier wave, or of a call earlier in the same wave. Skipped calls
+    still receive a ToolMessage so every tool call in the supervisor's message
+    is answered, and so the supervisor learns why no new research ran.
+
+    Args:
+        conduct_research_calls: ConductResearch tool calls from the latest supervisor message
+        prior_topics: Research topics already delegated in earlier waves
+        threshold: Topic similarity at or above which two topics are considered overlapping
+
+    Returns:
+        Tuple of (calls to launch, ToolMessages for skipped calls)
+    """
+    prior_shingles = [topic_shingles(topic) for topic in prior_topics]
+    launched_shingles = []
+    calls_to_launch = []
+    skipped_messages = []
+
+    for tool_call in conduct_research_calls:
+        shingles = topic_shingles(tool_call["args"]["research_topic"])
+
+        prior_matches = [
+            (topic_similarity(shingles, other), topic)
+            for other, topic in zip(prior_shingles, prior_topics)
+        ]
+        wave_matches = [
+            (topic_similarity(shingles, other), launched_call)
+            for other, launched_call in zip(launched_shingles, calls_to_launch)
+        ]
+        prior_score, prior_topic = max(prior_matches, key=lambda match: match[0], default=(0.0, ""))
+        wave_score, wave_call = max(wave_matches, key=lambda match: match[0], default=(0.0, None))
+
+        if prior_score >= threshold:
+            content = (
+                f"Skipped: this topic overlaps (similarity {prior_score:.2f}) with research already "
+                f"completed in an earlier wave: \"{prior_topic[:300]}\". Use those findings, or "
+                "delegate a narrower topic that covers only what is still missing."
+            )
+        elif wave_score >= threshold:
+            content = (
+                f"Merged: this topic overlaps (similarity {wave_score:.2f}) with the parallel "
+                f"ConductResearch call {wave_call['id']}, whose findings cover it."
+            )
+        else:
+            calls_to_launch.append(tool_call)
+            launched_shingles.append(shingles)
+            continue
+
+        skipped_messages.append(skipped_research_message(tool_call, content))
+
+    return calls_to_launch, skipped_messages
 
 # Ensure async compatibility for Jupyter environments
 try:
@@ -72,16 +201,138 @@ supervisor_model = init_chat_model(model="openai:gpt-5")
 supervisor_model_with_tools = supervisor_model.bind_tools(supervisor_tools)
 
 # System constants
-# Maximum number of tool call iterations for individual researcher agents
-# This prevents infinite loops and controls research depth per topic
-max_researcher_iterations = 15 # Calls to think_tool + ConductResearch + refine_draft_report
+# Iteration and concurrency limits live on the run's RunBudget (see budget.py).
+# Its defaults keep the historical 15 supervisor iterations and 3 parallel researchers.
+
+# Jaccard similarity between research topic shingles at or above which a new
+# ConductResearch call is treated as a duplicate and not launched
+topic_overlap_threshold = 0.6
+
+# Extra attempts for a researcher that fails with a transient error (rate limits,
+# timeouts, dropped connections), and the base delay in seconds for the
+# exponential backoff between attempts
+max_researcher_retries = 2
+researcher_retry_base_delay = 2.0
+
+# A draft refinement counts as stalled when it changes less than this share of
+# the draft's words and adds fewer than convergence_min_new_citations sources
+convergence_change_threshold = 0.05
+convergence_min_new_citations = 1
+
+# After this many consecutive stalled refinements the supervisor is told to stop;
+# one more stalled refinement ends the research loop
+convergence_patience = 2
+
+# ===== CONVERGENCE =====
+
+def is_stalled_refinement(entry: dict) -> bool:
+    """Whether a refinement improved the draft too little to count as progress."""
+    return (
+        entry["change_ratio"] < convergence_change_threshold
+        and entry["new_citations"] < convergence_min_new_citations
+    )
+
+def count_stalled_refinements(convergence_history: list[dict]) -> int:
+    """Count consecutive stalled refinements at the end of the history."""
+    stalled = 0
+    for entry in reversed(convergence_history):
+        if not is_stalled_refinement(entry):
+            break
+        stalled += 1
+    return stalled
+
+# ===== RESEARCHER EXECUTION =====
+
+async def run_researcher(research_topic: str) -> dict:
+    """Run a researcher agent on one topic, retrying transient failures.
 
-# Maximum number of concurrent research agents the supervisor can launch
-# This is passed to the lead_researcher_prompt to limit parallel research tasks
-max_concurrent_researchers = 3
+    The researcher runs on the configured execution backend, which may be the
+    current event loop, a local process pool or a pool of queue workers.
+
+    Args:
+        research_topic: Topic delegated through a ConductResearch call
+
+    Returns:
+        Researcher output state with compressed_research and raw_notes
+
+    Raises:
+        Exception: The last error, once it is permanent or retries are exhausted
+    """
+    backend = get_researcher_backend()
+    with tracer.span("researcher", backend=backend.name, research_topic=research_topic[:200]) as span:
+        for attempt in range(max_researcher_retries + 1):
+            if span:
+                span.attributes["attempts"] = attempt + 1
+            try:
+                return await backend.run({
+                    "research_topic": research_topic,
+                    "trace_context": tracer.current_context(),
+                    "budget_limits": get_run_budget().remote_limits()
+                })
+            except Exception as e:
+                if attempt == max_researcher_retries or not is_transient_error(e):
+                    raise
+                delay = researcher_retry_base_delay * 2 ** attempt
+                await asyncio.sleep(delay + random.uniform(0, delay / 2))
+
+async def conduct_research_wave(conduct_research_calls: list[dict]) -> tuple[list[ToolMessage], list[str]]:
+    """Run one wave of ConductResearch calls in parallel.
+
+    A researcher that still fails after its retries is reported as an error
+    ToolMessage instead of aborting the others.
+
+    Args:
+        conduct_research_calls: ConductResearch tool calls to launch
+
+    Returns:
+        Tuple of (one ToolMessage per call, raw notes of successful researchers)
+    """
+    tool_messages = []
+    raw_notes = []
+
+    # Launch parallel research agents
+    coros = [
+        run_researcher(tool_call["args"]["research_topic"])
+        for tool_call in conduct_research_calls
+    ]
+    tool_results = await asyncio.gather(*coros, return_exceptions=True)
+
+    # Format research results as tool messages
+    # Each sub-agent returns compressed research findings in result["compressed_research"]
+    # We write this compressed research as the content of a ToolMessage, which allows
+    # the supervisor to later retrieve these findings via get_notes_from_tool_calls()
+    for result, tool_call in zip(tool_results, conduct_research_calls):
+        if isinstance(result, BaseException):
+            tool_messages.append(
+                ToolMessage(
+                    content=(
+                        f"Research failed for this topic ({type(result).__name__}: {result}). "
+                        "No findings were collected; retry with a rephrased or narrower topic if it is still needed."
+                    ),
+                    name=tool_call["name"],
+                    tool_call_id=tool_call["id"],
+                    status="error"
+                )
+            )
+            continue
+
+        tool_messages.append(
+            ToolMessage(
+                content=result.get("compressed_research", "Error synthesizing research report"),
+                name=tool_call["name"],
+                tool_call_id=tool_call["id"]
+            )
+        )
+
+        # Aggregate raw notes from all successful research. With the blob store
+        # enabled these are references, so they are collected rather than joined.
+        raw_notes.extend(result.get("raw_notes", []))
+
+    return tool_messages, raw_notes
 
 # ===== SUPERVISOR NODES =====
 
+@traced_node("supervisor")
 async def supervisor(state: SupervisorState) -> Command[Literal["supervisor_tools"]]:
     """Coordinate research activities.
 
@@ -97,14 +348,30 @@ async def supervisor(state: SupervisorState) -> Command[Literal["supervisor_tool
         Command to proceed to supervisor_tools node with updated state
     """
     supervisor_messages = state.get("supervisor_messages", [])
+    budget = get_run_budget()
 
     # Prepare system message with current date and constraints
 
     system_message = lead_researcher_with_multiple_steps_diffusion_double_check_prompt.format(
         date=get_today_str(), 
-        max_concurrent_research_units=max_concurrent_researchers,
-        max_researcher_iterations=max_researcher_iterations
+        max_concurrent_research_units=budget.max_concurrent_researchers,
+        max_researcher_iterations=budget.max_supervisor_iterations
     )
+
+    # Steer toward ResearchComplete as the run budget drains
+    budget_message = budget.steering_message()
+    if budget_message:
+        system_message += "\n\n" + budget_message
+
+    # Steer toward ResearchComplete once refinements stop improving the draft
+    stalled_refinements = count_stalled_refinements(state.get("convergence_history", []))
+    if stalled_refinements >= convergence_patience:
+        system_message += (
+            f"\n\n<Convergence>\nThe last {stalled_refinements} draft refinements changed the draft very little "
+            "and added no new sources. The research has converged. Call ResearchComplete now unless a "
+            "specific, important gap remains.\n</Convergence>"
+        )
+
     messages = [SystemMessage(content=system_message)] + supervisor_messages
 
     # Make decision about next research steps
@@ -118,6 +385,7 @@ async def supervisor(state: SupervisorState) -> Command[Literal["supervisor_tool
         }
     )
 
+@traced_node("supervisor_tools")
 async def supervisor_tools(state: SupervisorState) -> Command[Literal["supervisor", "__end__"]]:
     """Execute supervisor decisions - either conduct research or end the process.
 
@@ -141,18 +409,21 @@ async def supervisor_tools(state: SupervisorState) -> Command[Literal["superviso
     tool_messages = []
     all_raw_notes = []
     draft_report = ""
+    convergence_entries = []
     next_step = "supervisor"  # Default next step
     should_end = False
 
     # Check exit criteria first
-    exceeded_iterations = research_iterations >= max_researcher_iterations
+    budget = get_run_budget()
+    exceeded_iterations = research_iterations >= budget.max_supervisor_iterations or budget.exhausted()
+    converged = count_stalled_refinements(state.get("convergence_history", [])) > convergence_patience
     no_tool_calls = not most_recent_message.tool_calls
     research_complete = any(
         tool_call["name"] == "ResearchComplete" 
         for tool_call in most_recent_message.tool_calls
     )
 
-    if exceeded_iterations or no_tool_calls or research_complete:
+    if exceeded_iterations or converged or no_tool_calls or research_complete:
         should_end = True
         next_step = END
 
@@ -186,41 +457,29 @@ async def supervisor_tools(state: SupervisorState) -> Command[Literal["superviso
                     )
                 )
 
-            # Handle ConductResearch calls (asynchronous)
-            if conduct_research_calls:
-                # Launch parallel research agents
-                coros = [
-                    researcher_agent.ainvoke({
-                        "researcher_messages": [
-                            HumanMessage(content=tool_call["args"]["research_topic"])
-                        ],
-                        "research_topic": tool_call["args"]["research_topic"]
-                    }) 
-                    for tool_call in conduct_research_calls
-                ]
-
-                # Wait for all research to complete
-                tool_results = await asyncio.gather(*coros)
-
-                # Format research results as tool messages
-                # Each sub-agent returns compressed research findings in result["compressed_research"]
-                # We write this compressed research as the content of a ToolMessage, which allows
-                # the supervisor to later retrieve these findings via get_notes_from_tool_calls()
-                research_tool_messages = [
-                    ToolMessage(
-                        content=result.get("compressed_research", "Error synthesizing research report"),
-                        name=tool_call["name"],
-                        tool_call_id=tool_call["id"]
-                    ) for result, tool_call in zip(tool_results, conduct_research_calls)
-                ]
+            # Drop topics that duplicate each other or earlier research waves
+            conduct_research_calls, skipped_research_messages = partition_research_calls(
+                conduct_research_calls,
+                get_prior_research_topics(supervisor_messages[:-1]),
+                topic_overlap_threshold
+            )
+            tool_messages.extend(skipped_research_messages)
 
-                tool_messages.extend(research_tool_messages)
+            # Launch at most the budgeted number of parallel researchers
+            for tool_call in conduct_research_calls[budget.max_concurrent_researchers:]:
+                tool_messages.append(
+                    skipped_research_message(
+                        tool_call,
+                        f"Skipped: at most {budget.max_concurrent_researchers} researchers run in parallel "
+                        "per iteration. Delegate this topic again later if it is still needed."
+                    )
+                )
+            conduct_research_calls = conduct_research_calls[:budget.max_concurrent_researchers]
 
-                # Aggregate raw notes from all research
-                all_raw_notes = [
-                    "\n".join(result.get("raw_notes", [])) 
-                    for result in tool_results
-                ]
+            # Handle ConductResearch calls (asynchronous)
+            if conduct_research_calls:
+                research_messages, all_raw_notes = await conduct_research_wave(conduct_research_calls)
+                tool_messages.extend(research_messages)
 
             for tool_call in refine_report_calls: 
               notes = get_notes_from_tool_calls(supervisor_messages)    
@@ -240,6 +499,20 @@ async def supervisor_tools(state: SupervisorState) -> Command[Literal["superviso
                 )
               )
 
+            # Measure how much this iteration's refinement moved the draft
+            if refine_report_calls:
+                previous_draft = state.get("draft_report", "")
+                convergence_entries.append({
+                    "change_ratio": draft_change_ratio(previous_draft, draft_report),
+                    "new_citations": count_new_citations(previous_draft, draft_report)
+                })
+
+                # End as soon as this refinement completes the stalled run, instead of
+                # paying for another supervisor turn only to stop at the top of the next call
+                convergence_history = state.get("convergence_history", []) + convergence_entries
+                if count_stalled_refinements(convergence_history) > convergence_patience:
+                    next_step = END
+
         except Exception as e:
             should_end = True
             next_step = END
@@ -254,14 +527,17 @@ async def supervisor_tools(state: SupervisorState) -> Command[Literal["superviso
             }
         )
     elif len(refine_report_calls) > 0:
-        return Command(
-            goto=next_step,
-            update={
-                "supervisor_messages": tool_messages,
-                "raw_notes": all_raw_notes,
-                "draft_report": draft_report
-            }
-        )        
+        update = {
+            "supervisor_messages": tool_messages,
+            "raw_notes": all_raw_notes,
+            "draft_report": draft_report,
+            "convergence_history": convergence_entries
+        }
+        if next_step == END:
+            # Converged: hand back the notes including this iteration's research
+            update["notes"] = get_notes_from_tool_calls(supervisor_messages + tool_messages)
+            update["research_brief"] = state.get("research_brief", "")
+        return Command(goto=next_step, update=update)
     else:
         return Command(
             goto=next_step,
@@ -272,6 +548,69 @@ async def supervisor_tools(state: SupervisorState) -> Command[Literal["superviso
         )
 
 
+# ===== FIRST RESEARCH WAVE =====
+
+@traced_node("first_research_wave")
+async def first_research_wave(state: dict) -> dict:
+    """Plan and run the first research wave from the research brief alone.
+
+    Used by the overlapped workflow, where this node runs alongside
+    write_draft_report instead of after it. The supervisor plans the wave
+    without a draft, and the findings are kept in first_wave_messages as a
+    ConductResearch message followed by its ToolMessages. Once the draft
+    lands they are merged into supervisor_messages as if the supervisor had
+    delegated them in its first iteration, so it goes on to refine the draft
+    with them. The wave's raw notes go straight to raw_notes.
+
+    A failed plan yields an empty wave; the supervisor then starts from the
+    draft as in the sequential workflow.
+
+    Args:
+        state: Agent state with the research brief
+
+    Returns:
+        Update with first_wave_messages and the wave's raw_notes
+    """
+    research_brief = state.get("research_brief", "")
+    budget = get_run_budget()
+
+    system_message = lead_researcher_with_multiple_steps_diffusion_double_check_prompt.format(
+        date=get_today_str(), 
+        max_concurrent_research_units=budget.max_concurrent_researchers,
+        max_researcher_iterations=budget.max_supervisor_iterations
+    )
+    planning_message = (
+        "The draft report is still being written. Delegate the first wave of research now, "
+        "based on the research brief alone, by calling ConductResearch only.\n\n" + research_brief
+    )
+
+    try:
+        response = await supervisor_model_with_tools.ainvoke([
+            SystemMessage(content=system_message),
+            HumanMessage(content=planning_message)
+        ])
+    except Exception:
+        return {"first_wave_messages": []}
+
+    conduct_research_calls, _ = partition_research_calls(
+        [tool_call for tool_call in response.tool_calls if tool_call["name"] == "ConductResearch"],
+        [],
+        topic_overlap_threshold
+    )
+    conduct_research_calls = conduct_research_calls[:budget.max_concurrent_researchers]
+    if not conduct_research_calls:
+        return {"first_wave_messages": []}
+
+    tool_messages, raw_notes = await conduct_research_wave(conduct_research_calls)
+    return {
+        "first_wave_messages": [AIMessage(content="", tool_calls=conduct_research_calls)] + tool_messages,
+        "raw_notes": raw_notes
+    }
+
+def merge_first_research_wave(state: dict) -> dict:
+    """Append the first research wave after the draft report in supervisor_messages."""
+    return {"supervisor_messages": state.get("first_wave_messages", [])}
+
 # ===== GRAPH CONSTRUCTION =====
 
 # Build supervisor graph
@@ -0,0 +1,220 @@
+"""Node-Level Memoization for Deterministic Workflow Stages.
+
+Stages whose output depends only on their inputs, the model and the prompt
+(write_research_brief, write_draft_report and compress_research) can be
+served from a cache when the same prompt set is run again, as during
+evaluation and regression testing. This module provides:
+1. node_cache_policy, a LangGraph CachePolicy keyed on normalized node inputs
+   plus the model identity and a hash of the node's prompt templates
+2. NodeCache, a SQLite-backed LangGraph cache with TTL and size-bounded
+   least-recently-used eviction, shared by every graph in the process
+
+Caching is opt-in. Set DEEP_RESEARCH_NODE_CACHE to a SQLite file path to
+enable it; graphs compile with get_node_cache(), which is None otherwise.
+DEEP_RESEARCH_NODE_CACHE_TTL (seconds) and DEEP_RESEARCH_NODE_CACHE_MAX_ENTRIES
+override the defaults.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Callable, Mapping, Sequence
+from typing import Any, Optional
+
+from langchain_core.messages import BaseMessage
+from langgraph.cache.base import BaseCache, FullKey, Namespace
+from langgraph.types import CachePolicy
+
+# ===== CONFIGURATION =====
+
+# Bump when a cached node's code changes in a way that alters its output
+NODE_CACHE_VERSION = 1
+
+DEFAULT_NODE_CACHE_TTL = 7 * 24 * 3600 # seconds
+DEFAULT_NODE_CACHE_MAX_ENTRIES = 10_000
+
+# ===== CACHE KEYS =====
+
+def normalize_cache_input(value: Any) -> Any:
+    """Reduce a state value to a JSON-serializable form that ignores incidental differences.
+
+    Whitespace runs are collapsed, and messages keep only their type, content
+    and tool calls, so ids and response metadata do not defeat the cache.
+    """
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, BaseMessage):
+        return {
+            "type": value.type,
+            "content": normalize_cache_input(value.content),
+            "tool_calls": [
+                {"name": tool_call["name"], "args": tool_call["args"]}
+                for tool_call in getattr(value, "tool_calls", None) or []
+            ],
+        }
+    if isinstance(value, Mapping):
+        return {str(key): normalize_cache_input(item) for key, item in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        return [normalize_cache_input(item) for item in value]
+    return value
+
+def model_identity(model: Any) -> str:
+    """Describe a chat model by class, model name and output limit."""
+    name = getattr(model, "model_name", None) or getattr(model, "model", None) or ""
+    max_tokens = getattr(model, "max_tokens", None)
+    return f"{type(model).__name__}:{name}:{max_tokens}"
+
+def node_cache_policy(
+    input_keys: Sequence[str],
+    get_model: Callable[[], Any],
+    prompts: Sequence[str],
+    ttl: Optional[int] = None,
+) -> CachePolicy:
+    """Build a cache policy for a node that is deterministic in its inputs.
+
+    Args:
+        input_keys: State keys the node reads
+        get_model: Returns the model the node calls, looked up at call time so
+            that swapping the model invalidates cached results
+        prompts: Prompt templates the node formats; editing one invalidates
+            cached results
+        ttl: Seconds a cached result stays valid, defaulting to the configured TTL
+
+    Returns:
+        CachePolicy for StateGraph.add_node
+    """
+    prompt_hash = hashlib.sha256("\x00".join(prompts).encode("utf-8")).hexdigest()
+
+    def key_func(state: dict) -> str:
+        payload = {
+            "version": NODE_CACHE_VERSION,
+            "model": model_identity(get_model()),
+            "prompts": prompt_hash,
+            "inputs": {key: normalize_cache_input(state.get(key)) for key in input_keys},
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    if ttl is None:
+        ttl = int(os.environ.get("DEEP_RESEARCH_NODE_CACHE_TTL", DEFAULT_NODE_CACHE_TTL))
+    return CachePolicy(key_func=key_func, ttl=ttl)
+
+# ===== CACHE STORE =====
+
+class NodeCache(BaseCache):
+    """SQLite-backed LangGraph cache with TTL and least-recently-used eviction.
+
+    Args:
+        path: SQLite database file
+        max_entries: Entries kept before the least recently used are evicted
+    """
+
+    def __init__(self, path: str, max_entries: int = DEFAULT_NODE_CACHE_MAX_ENTRIES):
+        super().__init__()
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS node_cache ("
+            "namespace TEXT, key TEXT, encoding TEXT, value BLOB, expires_at REAL, accessed_at REAL, "
+            "PRIMARY KEY (namespace, key))"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS node_cache_accessed ON node_cache (accessed_at)")
+        self._connection.commit()
+
+    @staticmethod
+    def _namespace(namespace: Namespace) -> str:
+        return "/".join(namespace)
+
+    def get(self, keys: Sequence[FullKey]) -> dict[FullKey, Any]:
+        """Get unexpired cached values and mark them as recently used."""
+        now = time.time()
+        values = {}
+        with self._lock:
+            for namespace, key in keys:
+                row = self._connection.execute(
+                    "SELECT encoding, value, expires_at FROM node_cache WHERE namespace = ? AND key = ?",
+                    (self._namespace(namespace), key),
+                ).fetchone()
+                if row is None:
+                    continue
+                encoding, value, expires_at = row
+                if expires_at is not None and expires_at <= now:
+                    self._connection.execute(
+                        "DELETE FROM node_cache WHERE namespace = ? AND key = ?",
+                        (self._namespace(namespace), key),
+                    )
+                    continue
+                self._connection.execute(
+                    "UPDATE node_cache SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                    (now, self._namespace(namespace), key),
+                )
+                values[(namespace, key)] = self.serde.loads_typed((encoding, value))
+            self._connection.commit()
+        return values
+
+    async def aget(self, keys: Sequence[FullKey]) -> dict[FullKey, Any]:
+        """Asynchronously get cached values."""
+        return await asyncio.to_thread(self.get, keys)
+
+    def set(self, pairs: Mapping[FullKey, tuple[Any, Optional[int]]]) -> None:
+        """Store values with their TTLs, then evict down to max_entries."""
+        now = time.time()
+        with self._lock:
+            for (namespace, key), (value, ttl) in pairs.items():
+                encoding, data = self.serde.dumps_typed(value)
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO node_cache VALUES (?, ?, ?, ?, ?, ?)",
+                    (self._namespace(namespace), key, encoding, data, now + ttl if ttl is not None else None, now),
+                )
+            self._connection.execute(
+                "DELETE FROM node_cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,)
+            )
+            self._connection.execute(
+                "DELETE FROM node_cache WHERE rowid IN ("
+                "SELECT rowid FROM node_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._connection.commit()
+
+    async def aset(self, pairs: Mapping[FullKey, tuple[Any, Optional[int]]]) -> None:
+        """Asynchronously store values."""
+        await asyncio.to_thread(self.set, pairs)
+
+    def clear(self, namespaces: Optional[Sequence[Namespace]] = None) -> None:
+        """Delete cached values in the given namespaces, or all of them."""
+        with self._lock:
+            if namespaces is None:
+                self._connection.execute("DELETE FROM node_cache")
+            else:
+                self._connection.executemany(
+                    "DELETE FROM node_cache WHERE namespace = ?",
+                    [(self._namespace(namespace),) for namespace in namespaces],
+                )
+            self._connection.commit()
+
+    async def aclear(self, namespaces: Optional[Sequence[Namespace]] = None) -> None:
+        """Asynchronously delete cached values."""
+        await asyncio.to_thread(self.clear, namespaces)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM node_cache").fetchone()[0]
+
+_node_cache: Optional[NodeCache] = None
+_node_cache_lock = threading.Lock()
+
+def get_node_cache() -> Optional[NodeCache]:
+    """Return the process-wide node cache, or None when caching is not enabled."""
+    global _node_cache
+    path = os.environ.get("DEEP_RESEARCH_NODE_CACHE")
+    if not path:
+        return None
+    with _node_cache_lock:
+        if _node_cache is None:
+            max_entries = int(os.environ.get("DEEP_RESEARCH_NODE_CACHE_MAX_ENTRIES", DEFAULT_NODE_CACHE_MAX_ENTRIES))
+            _node_cache = NodeCache(path, max_entries=max_entries)
+        return _node_cache
@@ -0,0 +1,359 @@
+"""Orchestration Overhead Benchmark with Scripted Fake Models.
+
+This module measures the cost of the graph machinery itself, independent of
+model and search latency. researcher_agent, supervisor_agent and the full
+agent are driven by scripted fake chat models and a fake search backend, so
+runs are offline, deterministic and free. It reports:
+1. Per-node orchestration overhead, from zero-latency runs
+2. Memory per concurrent researcher, from tracemalloc peaks
+3. Event-loop lag, sampled by a monitor task during every scaling run
+4. Scaling curves from 1 to 100+ concurrent researchers and full runs, with a
+   fixed simulated model latency
+
+Results are printed as JSON, or written with --output, for regression tracking:
+
+    python -m deep_research.orchestration_benchmark --output orchestration.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from importlib.metadata import PackageNotFoundError, version
+from typing import Any, Callable, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+
+from deep_research.budget import RunBudget, run_budget_config
+
+# ===== CONFIGURATION =====
+
+DEFAULT_SCALING_LEVELS = [1, 10, 25, 50, 100, 150]
+DEFAULT_MODEL_LATENCY = 0.05 # seconds per simulated model call
+DEFAULT_SEARCH_LATENCY = 0.05 # seconds per simulated search
+SEARCHES_PER_RESEARCHER = 2
+RESEARCHERS_PER_WAVE = 3
+OVERHEAD_REPETITIONS = 20
+LOOP_LAG_INTERVAL = 0.01 # seconds between event-loop lag samples
+
+# ===== FAKE MODELS AND SEARCH =====
+
+class ScriptedChatModel(BaseChatModel):
+    """Chat model that answers from a script after a fixed latency.
+
+    The script maps the input messages to a reply, so concurrent runs sharing
+    one model instance each follow their own conversation.
+    """
+
+    script: Optional[Callable[[list[BaseMessage]], Any]] = None
+    latency: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def _reply(self, messages: list[BaseMessage]) -> AIMessage:
+        reply = self.script(messages) if self.script else "ok"
+        message = AIMessage(content=reply) if isinstance(reply, str) else reply
+        message.usage_metadata = {"input_tokens": 100, "output_tokens": 20, "total_tokens": 120}
+        return message
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        for word in self._reply(messages).content.split(" "):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    def bind_tools(self, tools, **kwargs) -> "ScriptedChatModel":
+        return self
+
+    def with_structured_output(self, schema, **kwargs) -> RunnableLambda:
+        def respond(_input):
+            time.sleep(self.latency)
+            return schema(**{name: f"Scripted {name.replace('_', ' ')}." for name in schema.model_fields})
+        return RunnableLambda(respond)
+
+def researcher_script(messages: list[BaseMessage]) -> AIMessage:
+    """Search SEARCHES_PER_RESEARCHER times, then answer."""
+    searches = sum(1 for message in messages if message.type == "tool")
+    if searches < SEARCHES_PER_RESEARCHER:
+        return AIMessage(content="", tool_calls=[{
+            "name": "tavily_search", "id": f"search-{searches}", "args": {"query": f"query {searches}"}
+        }])
+    return AIMessage(content="Research finished.")
+
+def benchmark_topic(index: int) -> str:
+    """Research topic whose words overlap no other topic, so none are merged."""
+    return " ".join(f"t{index}w{word}" for word in range(8))
+
+def make_supervisor_script(wave_size: int) -> Callable[[list[BaseMessage]], AIMessage]:
+    """Delegate one wave of wave_size researchers, refine the draft once, then finish."""
+    def script(messages: list[BaseMessage]) -> AIMessage:
+        tool_names = [message.name for message in messages if message.type == "tool"]
+        if "ConductResearch" not in tool_names:
+            return AIMessage(content="", tool_calls=[
+                {"name": "ConductResearch", "id": f"research-{i}", "args": {"research_topic": benchmark_topic(i)}}
+                for i in range(wave_size)
+            ])
+        if "refine_draft_report" not in tool_names:
+            return AIMessage(content="", tool_calls=[{"name": "refine_draft_report", "id": "refine", "args": {}}])
+        return AIMessage(content="", tool_calls=[{"name": "ResearchComplete", "id": "complete", "args": {}}])
+    return script
+
+def install_fakes(model_latency: float, search_latency: float, wave_size: int = RESEARCHERS_PER_WAVE) -> None:
+    """Replace every model and the search backend used by the agent modules."""
+    import deep_research.multi_agent_supervisor as supervisor_module
+    import deep_research.research_agent as researcher_module
+    import deep_research.research_agent_full as full_module
+    import deep_research.research_agent_scope as scope_module
+    import deep_research.utils as utils_module
+
+    def fake_search(search_queries, max_results=3, topic="general", include_raw_content=True):
+        time.sleep(search_latency)
+        return [{"results": [
+            {"url": f"https://example.com/{query.replace(' ', '-')}/{i}", "title": f"Result {i}",
+             "content": "Snippet. " * 40, "raw_content": "Page text. " * 400}
+            for i in range(max_results)
+        ]} for query in search_queries]
+
+    utils_module.tavily_search_multiple = fake_search
+    utils_module.summarization_model = ScriptedChatModel(latency=model_latency)
+    utils_module.writer_model = ScriptedChatModel(latency=model_latency, script=lambda m: "Refined draft https://example.com/a")
+    researcher_module.model_with_tools = ScriptedChatModel(latency=model_latency, script=researcher_script)
+    researcher_module.compress_model = ScriptedChatModel(latency=model_latency, script=lambda m: "Compressed findings.")
+    supervisor_module.supervisor_model_with_tools = ScriptedChatModel(
+        latency=model_latency, script=make_supervisor_script(wave_size)
+    )
+    scope_module.model = ScriptedChatModel(latency=model_latency)
+    scope_module.creative_model = ScriptedChatModel(latency=model_latency)
+    full_module.writer_model = ScriptedChatModel(latency=model_latency, script=lambda m: "Final report " * 50)
+
+# ===== MEASUREMENT HELPERS =====
+
+class LoopLagMonitor:
+    """Sample how late the event loop wakes a sleeping task."""
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL):
+        self.interval = interval
+        self.samples = []
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(time.perf_counter() - start - self.interval)
+
+    def __enter__(self) -> "LoopLagMonitor":
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._task.cancel()
+
+    def summary(self) -> dict:
+        """Lag percentiles in milliseconds."""
+        if not self.samples:
+            return {"p50_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+        ordered = sorted(self.samples)
+        return {
+            "p50_ms": round(ordered[len(ordered) // 2] * 1000, 2),
+            "p99_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000, 2),
+            "max_ms": round(ordered[-1] * 1000, 2),
+        }
+
+def researcher_input(index: int = 0) -> dict:
+    topic = benchmark_topic(index)
+    return {"researcher_messages": [HumanMessage(content=topic)], "research_topic": topic}
+
+def supervisor_input() -> dict:
+    return {
+        "supervisor_messages": [HumanMessage(content="Here is the draft report: Draft."), HumanMessage(content="Brief.")],
+        "research_brief": "Brief.",
+        "draft_report": "Draft.",
+    }
+
+def agent_input() -> dict:
+    return {"messages": [HumanMessage(content="Benchmark research question.")]}
+
+def benchmark_config(max_concurrent_researchers: int = RESEARCHERS_PER_WAVE) -> dict:
+    budget = RunBudget(max_concurrent_researchers=max_concurrent_researchers)
+    return run_budget_config(budget, {"recursion_limit": 100})
+
+# ===== BENCHMARKS =====
+
+async def measure_node_overhead(graph, inputs: dict, repetitions: int = OVERHEAD_REPETITIONS) -> dict:
+    """Time each node execution with zero-latency fakes.
+
+    The time between consecutive streamed updates is attributed to the node
+    that produced the later one; with instant models and search it is the
+    framework's per-node cost plus the node's own bookkeeping.
+    """
+    durations = defaultdict(list)
+    run_seconds = []
+    for _ in range(repetitions):
+        start = previous = time.perf_counter()
+        async for _namespace, update in graph.astream(inputs, config=benchmark_config(), stream_mode="updates", subgraphs=True):
+            now = time.perf_counter()
+            for node in update:
+                durations[node].append(now - previous)
+            previous = now
+        run_seconds.append(time.perf_counter() - start)
+    return {
+        "run_ms": round(statistics.mean(run_seconds) * 1000, 3),
+        "nodes": {
+            node: {"executions_per_run": len(values) / repetitions, "mean_us": round(statistics.mean(values) * 1e6, 1)}
+            for node, values in sorted(durations.items())
+        },
+    }
+
+async def measure_researcher_memory(concurrency: int) -> dict:
+    """Peak traced memory while concurrency researchers are in flight."""
+    from deep_research.research_agent import researcher_agent
+
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        await asyncio.gather(*(
+            researcher_agent.ainvoke(researcher_input(i), config=benchmark_config())
+            for i in range(concurrency)
+        ))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "concurrency": concurrency,
+        "peak_mb": round((peak - baseline) / 1024 / 1024, 2),
+        "per_researcher_kb": round((peak - baseline) / concurrency / 1024, 1),
+    }
+
+async def measure_scaling(run_one: Callable[[int], Any], levels: list[int]) -> list[dict]:
+    """Run each concurrency level and compare its wall time with the first level's."""
+    points = []
+    single_run_seconds = None
+    for concurrency in levels:
+        with LoopLagMonitor() as monitor:
+            start = time.perf_counter()
+            results = await asyncio.gather(*(run_one(i) for i in range(concurrency)), return_exceptions=True)
+            wall = time.perf_counter() - start
+        failures = [result for result in results if isinstance(result, BaseException)]
+        if single_run_seconds is None:
+            single_run_seconds = wall
+        points.append({
+            "concurrency": concurrency,
+            "wall_s": round(wall, 3),
+            "throughput_per_s": round(concurrency / wall, 2),
+            # 1.0 means every run finished as fast as a run at the first level
+            "efficiency": round(single_run_seconds / wall, 3),
+            "failures": len(failures),
+            "first_failure": repr(failures[0])[:200] if failures else None,
+            "loop_lag": monitor.summary(),
+        })
+    return points
+
+async def run_suite(levels: list[int], model_latency: float, search_latency: float, include_agent: bool = True) -> dict:
+    """Run all benchmarks and return the JSON-ready results."""
+    from deep_research.multi_agent_supervisor import supervisor_agent
+    from deep_research.research_agent import researcher_agent
+    from deep_research.research_agent_full import agent
+
+    results = {"meta": {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "langgraph": _package_version("langgraph"),
+        "langchain_core": _package_version("langchain-core"),
+        "model_latency_s": model_latency,
+        "search_latency_s": search_latency,
+        "searches_per_researcher": SEARCHES_PER_RESEARCHER,
+        "levels": levels,
+    }}
+
+    install_fakes(0.0, 0.0)
+    results["node_overhead"] = {
+        "researcher_agent": await measure_node_overhead(researcher_agent, researcher_input()),
+        "supervisor_agent": await measure_node_overhead(supervisor_agent, supervisor_input()),
+    }
+    if include_agent:
+        results["node_overhead"]["agent"] = await measure_node_overhead(agent, agent_input())
+
+    install_fakes(model_latency, search_latency)
+    results["memory"] = [await measure_researcher_memory(concurrency) for concurrency in (1, max(levels))]
+
+    results["scaling"] = {
+        "researcher_agent": await measure_scaling(
+            lambda i: researcher_agent.ainvoke(researcher_input(i), config=benchmark_config()), levels
+        ),
+    }
+
+    # One supervisor delegating a single wave of n researchers
+    supervisor_points = []
+    for concurrency in levels:
+        install_fakes(model_latency, search_latency, wave_size=concurrency)
+        [point] = await measure_scaling(
+            lambda i, n=concurrency: supervisor_agent.ainvoke(supervisor_input(), config=benchmark_config(n)), [1]
+        )
+        point["concurrency"] = concurrency
+        supervisor_points.append(point)
+    base = supervisor_points[0]["wall_s"]
+    for point in supervisor_points:
+        point["efficiency"] = round(base / point["wall_s"], 3)
+        point["throughput_per_s"] = round(point["concurrency"] / point["wall_s"], 2)
+    results["scaling"]["supervisor_wave"] = supervisor_points
+
+    if include_agent:
+        install_fakes(model_latency, search_latency)
+        results["scaling"]["agent"] = await measure_scaling(
+            lambda i: agent.ainvoke(agent_input(), config=benchmark_config()), levels
+        )
+    return results
+
+def _package_version(name: str) -> Optional[str]:
+    try:
+        return version(name)
+    except PackageNotFoundError:
+        return None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark graph orchestration overhead with fake models")
+    parser.add_argument("--levels", default=",".join(map(str, DEFAULT_SCALING_LEVELS)),
+                        help="Comma-separated concurrency levels")
+    parser.add_argument("--model-latency", type=float, default=DEFAULT_MODEL_LATENCY)
+    parser.add_argument("--search-latency", type=float, default=DEFAULT_SEARCH_LATENCY)
+    parser.add_argument("--skip-agent", action="store_true", help="Skip full agent runs")
+    parser.add_argument("--output", default=None, help="Write results to this JSON file instead of stdout")
+    args = parser.parse_args()
+
+    # The agent modules create API clients at import time; fakes replace them before any call
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark-offline")
+    os.environ.setdefault("TAVILY_API_KEY", "benchmark-offline")
+    levels = [int(level) for level in args.levels.split(",") if level.strip()]
+    results = asyncio.run(run_suite(levels, args.model_latency, args.search_latency, not args.skip_agent))
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+        sys.stderr.write(f"Wrote {args.output}\n")
+    else:
+        sys.stdout.write(output + "\n")
@@ -13,6 +13,10 @@ from langchain.chat_models import init_chat_model
 
 from deep_research.state_research import ResearcherState, ResearcherOutputState
 from deep_research.utils import tavily_search, get_today_str, think_tool
+from deep_research.budget import get_run_budget
+from deep_research.tracing import traced_node
+from deep_research.node_cache import get_node_cache, node_cache_policy
+from deep_research.blob_store import spill, spill_message, resolve_messages
 from deep_research.prompts import research_agent_prompt, compress_research_system_prompt, compress_research_human_message
 
 # ===== CONFIGURATION =====
@@ -29,6 +33,7 @@ compress_model = init_chat_model(model="openai:gpt-5", max_tokens=32000) # model
 
 # ===== AGENT NODES =====
 
+@traced_node("llm_call")
 def llm_call(state: ResearcherState):
     """Analyze current state and decide on next actions.
 
@@ -41,58 +46,73 @@ def llm_call(state: ResearcherState):
     return {
         "researcher_messages": [
             model_with_tools.invoke(
-                [SystemMessage(content=research_agent_prompt)] + state["researcher_messages"]
+                [SystemMessage(content=research_agent_prompt)] + resolve_messages(state["researcher_messages"])
             )
         ]
     }
 
+@traced_node("tool_node")
 def tool_node(state: ResearcherState):
     """Execute all tool calls from the previous LLM response.
 
     Executes all tool calls from the previous LLM responses.
     Returns updated state with tool execution results.
+
+    Once the run budget is exhausted, tool calls are answered with a notice
+    instead of being executed, so every call still gets a ToolMessage.
+    Large tool outputs are spilled to the blob store when it is enabled.
     """
     tool_calls = state["researcher_messages"][-1].tool_calls
 
     # Execute all tool calls
     observations = []
+    budget_exhausted = get_run_budget().exhausted()
     for tool_call in tool_calls:
+        if budget_exhausted:
+            observations.append("Research budget exhausted. This tool call was not executed.")
+            continue
         tool = tools_by_name[tool_call["name"]]
         observations.append(tool.invoke(tool_call["args"]))
 
     # Create tool message outputs
     tool_outputs = [
-        ToolMessage(
+        spill_message(ToolMessage(
             content=observation,
             name=tool_call["name"],
             tool_call_id=tool_call["id"]
-        ) for observation, tool_call in zip(observations, tool_calls)
+        )) for observation, tool_call in zip(observations, tool_calls)
     ]
 
-    return {"researcher_messages": tool_outputs}
+    return {
+        "researcher_messages": tool_outputs,
+        "tool_call_iterations": state.get("tool_call_iterations", 0) + 1
+    }
 
+@traced_node("compress_research")
 def compress_research(state: ResearcherState) -> dict:
     """Compress research findings into a concise summary.
 
     Takes all the research messages and tool outputs and creates
     a compressed summary suitable for the supervisor's decision-making.
+    The raw notes are spilled to the blob store when it is enabled.
     """
 
+    researcher_messages = resolve_messages(state.get("researcher_messages", []))
     system_message = compress_research_system_prompt.format(date=get_today_str())
-    messages = [SystemMessage(content=system_message)] + state.get("researcher_messages", []) + [HumanMessage(content=compress_research_human_message)]
+    messages = [SystemMessage(content=system_message)] + researcher_messages + [HumanMessage(content=compress_research_human_message)]
     response = compress_model.invoke(messages)
 
     # Extract raw notes from tool and AI messages
     raw_notes = [
         str(m.content) for m in filter_messages(
-            state["researcher_messages"], 
+            researcher_messages, 
             include_types=["tool", "ai"]
         )
     ]
 
     return {
         "compressed_research": str(response.content),
-        "raw_notes": ["\n".join(raw_notes)]
+        "raw_notes": [spill("\n".join(raw_notes))]
     }
 
 # ===== ROUTING LOGIC =====
@@ -116,6 +136,19 @@ def should_continue(state: ResearcherState) -> Literal["tool_node", "compress_re
     # Otherwise, we have a final answer
     return "compress_research"
 
+def should_continue_after_tools(state: ResearcherState) -> Literal["llm_call", "compress_research"]:
+    """Determine whether the researcher may take another step after running tools.
+
+    Returns:
+        "llm_call": Continue the research loop
+        "compress_research": Stop because the tool call or run budget is spent
+    """
+    budget = get_run_budget()
+    tool_call_cap = budget.max_researcher_tool_calls
+    if (tool_call_cap is not None and state.get("tool_call_iterations", 0) >= tool_call_cap) or budget.exhausted():
+        return "compress_research"
+    return "llm_call"
+
 # ===== GRAPH CONSTRUCTION =====
 
 # Build the agent workflow
@@ -124,7 +157,15 @@ agent_builder = StateGraph(ResearcherState, output_schema=ResearcherOutputState)
 # Add nodes to the graph
 agent_builder.add_node("llm_call", llm_call)
 agent_builder.add_node("tool_node", tool_node)
-agent_builder.add_node("compress_research", compress_research)
+agent_builder.add_node(
+    "compress_research",
+    compress_research,
+    # Identical research transcripts compress to the same findings
+    cache_policy=node_cache_policy(
+        ["researcher_messages"], lambda: compress_model,
+        [compress_research_system_prompt, compress_research_human_message]
+    )
+)
 
 # Add edges to connect nodes
 agent_builder.add_edge(START, "llm_call")
@@ -136,8 +177,15 @@ agent_builder.add_conditional_edges(
         "compress_research": "compress_research", # Provide final answer
     },
 )
-agent_builder.add_edge("tool_node", "llm_call") # Loop back for more research
+agent_builder.add_conditional_edges(
+    "tool_node",
+    should_continue_after_tools,
+    {
+        "llm_call": "llm_call", # Loop back for more research
+        "compress_research": "compress_research", # Budget spent, compress what we have
+    },
+)
 agent_builder.add_edge("compress_research", END)
 
 # Compile the agent
-researcher_agent = agent_builder.compile()
+researcher_agent = agent_builder.compile(cache=get_node_cache())
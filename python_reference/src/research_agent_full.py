@@ -10,31 +10,57 @@ This module integrates all components of the research system:
 
 The system orchestrates the complete research workflow from initial user
 input through final report delivery.
+
+In the overlapped workflow the first research wave, planned from the research
+brief, runs while the knowledge-only draft is being written, and its findings
+are merged when the draft lands. Enable it with
+DEEP_RESEARCH_OVERLAP_FIRST_WAVE=1 or build_deep_researcher(overlap_first_wave=True).
 """
 
+import os
+from typing import AsyncIterator, Optional
+
 from langchain_core.messages import HumanMessage
+from langgraph.config import get_stream_writer
 from langgraph.graph import StateGraph, START, END
 
 from deep_research.utils import get_today_str
 from deep_research.prompts import final_report_generation_with_helpfulness_insightfulness_hit_citation_prompt
 from deep_research.state_scope import AgentState, AgentInputState
-from deep_research.research_agent_scope import clarify_with_user, write_research_brief, write_draft_report
-from deep_research.multi_agent_supervisor import supervisor_agent
+from deep_research.state_multi_agent_supervisor import SupervisorInputState
+from deep_research.research_agent_scope import (
+    clarify_with_user,
+    write_research_brief,
+    write_draft_report,
+    write_research_brief_cache_policy,
+    write_draft_report_cache_policy
+)
+from deep_research.multi_agent_supervisor import supervisor_agent, first_research_wave, merge_first_research_wave
+from deep_research.tracing import traced_node
+from deep_research.loop_monitor import configure_loop_monitor_from_env
+from deep_research.node_cache import get_node_cache
+from deep_research.cassette import cassette_active
 
 # ===== Config =====
 
 from langchain.chat_models import init_chat_model
-writer_model = init_chat_model(model="openai:gpt-5", max_tokens=40000) # model="anthropic:claude-sonnet-4-20250514", max_tokens=64000
+# Streaming bypasses the LLM cache, so cassette runs receive the report as one chunk
+writer_model = init_chat_model(model="openai:gpt-5", max_tokens=40000, stream_usage=True, disable_streaming=cassette_active()) # model="anthropic:claude-sonnet-4-20250514", max_tokens=64000
 
 # ===== FINAL REPORT GENERATION =====
 
 from deep_research.state_scope import AgentState
 
+@traced_node("final_report_generation")
 async def final_report_generation(state: AgentState):
     """
     Final report generation node.
 
-    Synthesizes all research findings into a comprehensive final report
+    Synthesizes all research findings into a comprehensive final report.
+    The report is streamed from the writer model, and each token is emitted
+    on LangGraph's "custom" stream mode as {"final_report_token": ...}, so
+    callers see the report while it is written. The returned state is the
+    same as with a single blocking call.
     """
 
     notes = state.get("notes", [])
@@ -49,30 +75,91 @@ async def final_report_generation(state: AgentState):
         user_request=state.get("user_request", "")
     )
 
-    final_report = await writer_model.ainvoke([HumanMessage(content=final_report_prompt)])
+    # Emit tokens as they arrive; the writer is a no-op when nobody is streaming.
+    # Tokens are joined once at the end, since adding chunks one by one is quadratic.
+    write_stream = get_stream_writer()
+    tokens = []
+    async for chunk in writer_model.astream([HumanMessage(content=final_report_prompt)]):
+        token = chunk.content if isinstance(chunk.content, str) else "".join(
+            block.get("text", "") for block in chunk.content if isinstance(block, dict)
+        )
+        if token:
+            tokens.append(token)
+            write_stream({"final_report_token": token})
+
+    if not tokens:
+        raise ValueError("Writer model returned an empty final report")
+    final_report = "".join(tokens)
 
     return {
-        "final_report": final_report.content, 
-        "messages": ["Here is the final report: " + final_report.content],
+        "final_report": final_report, 
+        "messages": ["Here is the final report: " + final_report],
     }
 
 # ===== GRAPH CONSTRUCTION =====
-# Build the overall workflow
-deep_researcher_builder = StateGraph(AgentState, input_schema=AgentInputState)
-
-# Add workflow nodes
-deep_researcher_builder.add_node("clarify_with_user", clarify_with_user)
-deep_researcher_builder.add_node("write_research_brief", write_research_brief)
-deep_researcher_builder.add_node("write_draft_report", write_draft_report)
-deep_researcher_builder.add_node("supervisor_subgraph", supervisor_agent)
-deep_researcher_builder.add_node("final_report_generation", final_report_generation)
-
-# Add workflow edges
-deep_researcher_builder.add_edge(START, "clarify_with_user")
-deep_researcher_builder.add_edge("write_research_brief", "write_draft_report")
-deep_researcher_builder.add_edge("write_draft_report", "supervisor_subgraph")
-deep_researcher_builder.add_edge("supervisor_subgraph", "final_report_generation")
-deep_researcher_builder.add_edge("final_report_generation", END)
+
+def build_deep_researcher(overlap_first_wave: bool = False) -> StateGraph:
+    """Build the overall workflow.
+
+    Args:
+        overlap_first_wave: Run the first research wave alongside draft generation
+            instead of waiting for the draft
+
+    Returns:
+        Uncompiled workflow graph
+    """
+    deep_researcher_builder = StateGraph(AgentState, input_schema=AgentInputState)
+
+    # Add workflow nodes
+    deep_researcher_builder.add_node("clarify_with_user", clarify_with_user)
+    deep_researcher_builder.add_node("write_research_brief", write_research_brief, cache_policy=write_research_brief_cache_policy)
+    deep_researcher_builder.add_node("write_draft_report", write_draft_report, cache_policy=write_draft_report_cache_policy)
+    deep_researcher_builder.add_node("supervisor_subgraph", supervisor_agent, input_schema=SupervisorInputState)
+    deep_researcher_builder.add_node("final_report_generation", final_report_generation)
+
+    # Add workflow edges
+    deep_researcher_builder.add_edge(START, "clarify_with_user")
+    deep_researcher_builder.add_edge("write_research_brief", "write_draft_report")
+    if overlap_first_wave:
+        # Fan out from the brief and join once both the draft and the wave are done
+        deep_researcher_builder.add_node("first_research_wave", first_research_wave)
+        deep_researcher_builder.add_node("merge_first_research_wave", merge_first_research_wave)
+        deep_researcher_builder.add_edge("write_research_brief", "first_research_wave")
+        deep_researcher_builder.add_edge(["write_draft_report", "first_research_wave"], "merge_first_research_wave")
+        deep_researcher_builder.add_edge("merge_first_research_wave", "supervisor_subgraph")
+    else:
+        deep_researcher_builder.add_edge("write_draft_report", "supervisor_subgraph")
+    deep_researcher_builder.add_edge("supervisor_subgraph", "final_report_generation")
+    deep_researcher_builder.add_edge("final_report_generation", END)
+
+    return deep_researcher_builder
 
 # Compile the full workflow
-agent = deep_researcher_builder.compile()
+configure_loop_monitor_from_env()
+deep_researcher_builder = build_deep_researcher(os.environ.get("DEEP_RESEARCH_OVERLAP_FIRST_WAVE") == "1")
+agent = deep_researcher_builder.compile(cache=get_node_cache())
+
+# ===== STREAMING =====
+
+async def astream_research(inputs: dict, config: Optional[dict] = None) -> AsyncIterator[dict]:
+    """Run the full agent and yield progress, report tokens and the final state.
+
+    Args:
+        inputs: Agent input, e.g. {"messages": [HumanMessage(content=prompt)]}
+        config: Optional run config
+
+    Yields:
+        {"type": "node", "node": name} as each top-level node finishes,
+        {"type": "token", "content": text} for each final report token, and
+        {"type": "final", "state": state} once the run completes
+    """
+    final_state = None
+    async for mode, chunk in agent.astream(inputs, config=config, stream_mode=["updates", "custom", "values"]):
+        if mode == "custom" and "final_report_token" in chunk:
+            yield {"type": "token", "content": chunk["final_report_token"]}
+        elif mode == "updates":
+            for node in chunk:
+                yield {"type": "node", "node": node}
+        elif mode == "values":
+            final_state = chunk
+    yield {"type": "final", "state": final_state}
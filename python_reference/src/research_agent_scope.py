@@ -19,6 +19,8 @@ from langgraph.types import Command
 
 from deep_research.prompts import transform_messages_into_research_topic_human_msg_prompt, draft_report_generation_prompt, clarify_with_user_instructions
 from deep_research.state_scope import AgentState, ResearchQuestion, AgentInputState, DraftReport
+from deep_research.tracing import traced_node
+from deep_research.node_cache import get_node_cache, node_cache_policy
 
 # ===== UTILITY FUNCTIONS =====
 
@@ -34,6 +36,7 @@ creative_model = init_chat_model(model="openai:gpt-5")
 
 # ===== WORKFLOW NODES =====
 
+@traced_node("clarify_with_user")
 def clarify_with_user(state: AgentState) -> Command[Literal["write_research_brief"]]:
     #uncomment if you want to enable this module  
     """
@@ -67,6 +70,7 @@ def clarify_with_user(state: AgentState) -> Command[Literal["write_research_brie
         goto="write_research_brief"
     )
 
+@traced_node("write_research_brief")
 def write_research_brief(state: AgentState) -> Command[Literal["write_draft_report"]]:
     """
     Transform the conversation history into a comprehensive research brief.
@@ -91,6 +95,7 @@ def write_research_brief(state: AgentState) -> Command[Literal["write_draft_repo
             update={"research_brief": response.research_brief}
         )
 
+@traced_node("write_draft_report")
 def write_draft_report(state: AgentState) -> Command[Literal["__end__"]]:
     """
     Final report generation node.
@@ -113,6 +118,17 @@ def write_draft_report(state: AgentState) -> Command[Literal["__end__"]]:
         "supervisor_messages": ["Here is the draft report: " + response.draft_report, research_brief]
     }
 
+# ===== NODE CACHING =====
+
+# Both nodes depend only on their inputs, model and prompt, so repeated prompts
+# can be served from the node cache when it is enabled
+write_research_brief_cache_policy = node_cache_policy(
+    ["messages"], lambda: model, [transform_messages_into_research_topic_human_msg_prompt]
+)
+write_draft_report_cache_policy = node_cache_policy(
+    ["research_brief"], lambda: creative_model, [draft_report_generation_prompt]
+)
+
 # ===== GRAPH CONSTRUCTION =====
 
 # Build the scoping workflow
@@ -120,8 +136,8 @@ deep_researcher_builder = StateGraph(AgentState, input_schema=AgentInputState)
 
 # Add workflow nodes
 deep_researcher_builder.add_node("clarify_with_user", clarify_with_user)
-deep_researcher_builder.add_node("write_research_brief", write_research_brief)
-deep_researcher_builder.add_node("write_draft_report", write_draft_report)
+deep_researcher_builder.add_node("write_research_brief", write_research_brief, cache_policy=write_research_brief_cache_policy)
+deep_researcher_builder.add_node("write_draft_report", write_draft_report, cache_policy=write_draft_report_cache_policy)
 
 # Add workflow edges
 deep_researcher_builder.add_edge(START, "clarify_with_user")
@@ -129,4 +145,4 @@ deep_researcher_builder.add_edge("write_research_brief", "write_draft_report")
 deep_researcher_builder.add_edge("write_draft_report", END)
 
 # Compile the workflow
-scope_research = deep_researcher_builder.compile()
+scope_research = deep_researcher_builder.compile(cache=get_node_cache())
@@ -0,0 +1,497 @@
+"""Execution Backends for Researcher Agents.
+
+This module decides where researcher agents run when the supervisor delegates
+ConductResearch calls:
+1. InProcessBackend runs researchers on the supervisor's own event loop (default)
+2. ProcessPoolBackend runs each researcher in a local worker process
+3. QueueBackend publishes payloads to a broker that worker processes consume,
+   locally or on other machines
+
+Every backend takes the same ConductResearch payload and returns the same
+ResearcherOutputState dictionary, so the supervisor does not need to know where
+the work ran. The backend is selected with environment variables:
+
+    DEEP_RESEARCH_EXECUTION_BACKEND   in_process | process_pool | queue
+    DEEP_RESEARCH_EXECUTION_WORKERS   worker processes for process_pool and queue
+    DEEP_RESEARCH_BROKER_ADDRESS      host:port of an existing queue broker
+    DEEP_RESEARCH_BROKER_AUTHKEY      shared secret for the queue broker
+    DEEP_RESEARCH_QUEUE_TIMEOUT       seconds to wait for a queued researcher
+
+A shared broker and remote queue workers are started with:
+
+    python -m deep_research.researcher_backends broker --address host:port
+    python -m deep_research.researcher_backends worker --address host:port
+
+A broker reachable from other machines needs its own DEEP_RESEARCH_BROKER_AUTHKEY;
+the default secret is only accepted on loopback addresses.
+"""
+
+import argparse
+import asyncio
+import ipaddress
+import multiprocessing
+import os
+import queue
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.managers import BaseManager
+from typing import Optional
+
+from langchain_core.messages import HumanMessage
+
+from deep_research.budget import get_run_budget, run_budget_config, usage_tracking_budget
+from deep_research.research_agent import researcher_agent
+from deep_research.tracing import tracer
+
+# ===== CONFIGURATION =====
+
+DEFAULT_BACKEND = "in_process"
+DEFAULT_BROKER_AUTHKEY = "deep-research"
+
+# Concurrent researchers each queue worker process runs on its own event loop
+QUEUE_WORKER_CONCURRENCY = 4
+
+# Seconds a supervisor waits for a queued researcher before giving up on it,
+# e.g. when the worker running it died
+DEFAULT_QUEUE_TIMEOUT = 1800.0
+
+# HTTP status codes from model and search providers worth retrying
+TRANSIENT_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+# Provider exception class names that indicate a transient failure. Matched by
+# name, including on base classes, so researcher execution does not depend on
+# any one provider SDK or on the wrappers LangChain puts around it.
+TRANSIENT_ERROR_NAMES = {
+    "APIConnectionError",
+    "APITimeoutError",
+    "RateLimitError",
+    "InternalServerError",
+    "ServiceUnavailableError",
+    "OverloadedError",
+}
+
+# ===== ERRORS =====
+
+def is_transient_error(error: BaseException) -> bool:
+    """Decide whether a researcher failure is worth retrying.
+
+    Args:
+        error: Exception raised by a researcher run
+
+    Returns:
+        True for timeouts, connection failures, rate limits and server errors
+    """
+    if isinstance(error, RemoteResearcherError):
+        return error.transient
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError, ConnectionError)):
+        return True
+    if any(cls.__name__ in TRANSIENT_ERROR_NAMES for cls in type(error).__mro__):
+        return True
+    status_code = getattr(error, "status_code", None)
+    if status_code is None:
+        status_code = getattr(getattr(error, "response", None), "status_code", None)
+    return status_code in TRANSIENT_STATUS_CODES
+
+class RemoteResearcherError(Exception):
+    """Error raised by a researcher that ran in another process.
+
+    Provider exceptions do not always survive pickling, so workers report
+    failures as plain data and the supervisor re-raises them as this type.
+    """
+
+    def __init__(self, error_type: str, message: str, transient: bool):
+        super().__init__(f"{error_type}: {message}")
+        self.error_type = error_type
+        self.transient = transient
+
+# ===== PAYLOAD SERIALIZATION =====
+
+def serialize_researcher_output(result: dict, usage: Optional[dict] = None) -> dict:
+    """Convert a researcher output state into picklable, JSON-friendly data."""
+    return {
+        "compressed_research": result.get("compressed_research", ""),
+        "raw_notes": list(result.get("raw_notes", [])),
+        "usage": usage or {},
+    }
+
+def deserialize_researcher_output(data: dict) -> dict:
+    """Rebuild a researcher output state from serialize_researcher_output data.
+
+    Usage recorded by the worker is charged to the current run's budget.
+
+    Raises:
+        RemoteResearcherError: If the worker reported a failure instead of a result
+    """
+    get_run_budget().merge_usage(data.get("usage", {}))
+    if "error" in data:
+        error = data["error"]
+        raise RemoteResearcherError(error["type"], error["message"], error["transient"])
+    return {
+        "compressed_research": data["compressed_research"],
+        "raw_notes": data["raw_notes"],
+    }
+
+async def run_researcher_payload_async(payload: dict, config: Optional[dict] = None) -> dict:
+    """Run researcher_agent on a ConductResearch payload in the current process."""
+    research_topic = payload["research_topic"]
+    with tracer.attach_context(payload.get("trace_context")):
+        return await researcher_agent.ainvoke({
+            "researcher_messages": [HumanMessage(content=research_topic)],
+            "research_topic": research_topic
+        }, config=config)
+
+async def run_serialized_payload(payload: dict) -> dict:
+    """Run a payload and return its serialized output or serialized error.
+
+    The supervisor's budget object cannot cross processes, so the researcher
+    runs under a local budget rebuilt from the limits sent in the payload,
+    and reports its usage with the result.
+    """
+    budget = usage_tracking_budget(payload.get("budget_limits"))
+    try:
+        result = await run_researcher_payload_async(payload, config=run_budget_config(budget))
+        return serialize_researcher_output(result, budget.usage())
+    except Exception as e:
+        return {
+            "error": {
+                "type": type(e).__name__,
+                "message": str(e),
+                "transient": is_transient_error(e),
+            },
+            "usage": budget.usage(),
+        }
+
+def run_researcher_payload(payload: dict) -> dict:
+    """Process pool entry point: run one payload on a fresh event loop."""
+    return asyncio.run(run_serialized_payload(payload))
+
+# ===== BACKENDS =====
+
+class ResearcherBackend:
+    """Interface shared by all researcher execution backends."""
+
+    name = "base"
+
+    async def run(self, payload: dict) -> dict:
+        """Run one ConductResearch payload and return a ResearcherOutputState dict."""
+        raise NotImplementedError
+
+    def shutdown(self) -> None:
+        """Release worker processes and broker connections held by the backend."""
+
+class InProcessBackend(ResearcherBackend):
+    """Run researchers as coroutines on the supervisor's event loop."""
+
+    name = "in_process"
+
+    async def run(self, payload: dict) -> dict:
+        return await run_researcher_payload_async(payload)
+
+class ProcessPoolBackend(ResearcherBackend):
+    """Run each researcher on its own event loop inside a local process pool."""
+
+    name = "process_pool"
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    async def run(self, payload: dict) -> dict:
+        loop = asyncio.get_running_loop()
+        data = await loop.run_in_executor(self._get_executor(), run_researcher_payload, payload)
+        return deserialize_researcher_output(data)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+# Queues owned by the broker process. Workers and supervisors reach them
+# through manager proxies, so they can live on other machines. Each supervisor
+# process has its own result queue, so supervisors sharing a broker only
+# receive the results of their own jobs.
+_broker_task_queue: queue.Queue = queue.Queue()
+_broker_result_queues: dict[str, queue.Queue] = {}
+_broker_lock = threading.Lock()
+
+def _get_broker_task_queue() -> queue.Queue:
+    return _broker_task_queue
+
+def _get_broker_result_queue(client_id: str) -> queue.Queue:
+    with _broker_lock:
+        return _broker_result_queues.setdefault(client_id, queue.Queue())
+
+def _drop_broker_result_queue(client_id: str) -> None:
+    with _broker_lock:
+        _broker_result_queues.pop(client_id, None)
+
+class ResearchBroker(BaseManager):
+    """Local stand-in for a message broker, served over TCP by a manager process."""
+
+ResearchBroker.register("task_queue", callable=_get_broker_task_queue)
+ResearchBroker.register("result_queue", callable=_get_broker_result_queue)
+ResearchBroker.register("drop_result_queue", callable=_drop_broker_result_queue)
+
+def parse_broker_address(address: str) -> tuple[str, int]:
+    """Parse a host:port broker address."""
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+def is_loopback_host(host: str) -> bool:
+    """Whether a broker host is only reachable from this machine."""
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+def check_broker_authkey(address: tuple[str, int], authkey: bytes) -> None:
+    """Refuse the well-known default secret for a broker reachable from other machines.
+
+    Manager connections exchange pickles, so anyone holding the secret can run
+    code in the broker and its workers.
+
+    Raises:
+        ValueError: If the default secret is used with a non-loopback address
+    """
+    if authkey == DEFAULT_BROKER_AUTHKEY.encode() and not is_loopback_host(address[0]):
+        raise ValueError(
+            f"Broker address {address[0]}:{address[1]} is not a loopback address; "
+            "set DEEP_RESEARCH_BROKER_AUTHKEY (or --authkey) to a private secret"
+        )
+
+def run_broker(address: tuple[str, int], authkey: bytes) -> None:
+    """Serve the broker queues in this process until it is stopped.
+
+    Args:
+        address: (host, port) to listen on
+        authkey: Shared broker secret
+    """
+    check_broker_authkey(address, authkey)
+    broker = ResearchBroker(address=address, authkey=authkey)
+    broker.get_server().serve_forever()
+
+async def _queue_worker_slot(broker: ResearchBroker, task_queue) -> None:
+    """Run payloads from the broker until a shutdown sentinel arrives."""
+    result_queues = {}
+    while True:
+        task = await asyncio.to_thread(task_queue.get)
+        if task is None:
+            return
+        job_id, client_id, payload = task
+        result = await run_serialized_payload(payload)
+        if client_id not in result_queues:
+            result_queues[client_id] = await asyncio.to_thread(broker.result_queue, client_id)
+        await asyncio.to_thread(result_queues[client_id].put, (job_id, result))
+
+def run_queue_worker(address: tuple[str, int], authkey: bytes, concurrency: int = QUEUE_WORKER_CONCURRENCY) -> None:
+    """Connect to a broker and serve researcher payloads until told to stop.
+
+    Args:
+        address: Broker (host, port)
+        authkey: Shared broker secret
+        concurrency: Researchers this worker runs at the same time
+    """
+    check_broker_authkey(address, authkey)
+    broker = ResearchBroker(address=address, authkey=authkey)
+    broker.connect()
+    task_queue = broker.task_queue()
+
+    async def serve():
+        await asyncio.gather(*[
+            _queue_worker_slot(broker, task_queue) for _ in range(concurrency)
+        ])
+
+    asyncio.run(serve())
+
+class QueueBackend(ResearcherBackend):
+    """Dispatch researchers through a broker to pools of queue workers.
+
+    Without an address the backend starts a local broker and spawns its own
+    workers. With an address it only publishes to an existing broker, and
+    workers are expected to be started separately, possibly on other machines.
+    Results come back on a result queue of this backend's own, so several
+    supervisors can share one broker.
+
+    Args:
+        num_workers: Worker processes to spawn for a local broker
+        address: host:port of an existing broker
+        authkey: Shared broker secret
+        timeout: Seconds to wait for each researcher result
+    """
+
+    name = "queue"
+
+    def __init__(self, num_workers: Optional[int] = None, address: Optional[str] = None,
+                 authkey: str = DEFAULT_BROKER_AUTHKEY, timeout: float = DEFAULT_QUEUE_TIMEOUT):
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.address = parse_broker_address(address) if address else None
+        self.authkey = authkey.encode()
+        if self.address is not None:
+            check_broker_authkey(self.address, self.authkey)
+        self.timeout = timeout
+        self.client_id = uuid.uuid4().hex
+        self._broker: Optional[ResearchBroker] = None
+        self._workers: list = []
+        self._pending: dict[str, tuple[asyncio.AbstractEventLoop, asyncio.Future]] = {}
+        self._lock = threading.Lock()
+        self._started = False
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._started:
+                return
+            context = multiprocessing.get_context("spawn")
+            self._broker = ResearchBroker(
+                address=self.address or ("127.0.0.1", 0),
+                authkey=self.authkey,
+                ctx=context
+            )
+            if self.address is None:
+                # Own a local broker and a matching set of worker processes
+                self._broker.start()
+                self.address = self._broker.address
+                for _ in range(self.num_workers):
+                    worker = context.Process(
+                        target=run_queue_worker,
+                        args=(self.address, self.authkey),
+                        daemon=True
+                    )
+                    worker.start()
+                    self._workers.append(worker)
+            else:
+                self._broker.connect()
+            self._task_queue = self._broker.task_queue()
+            self._result_queue = self._broker.result_queue(self.client_id)
+            threading.Thread(target=self._collect_results, args=(self._result_queue,), daemon=True).start()
+            self._started = True
+
+    def _collect_results(self, result_queue) -> None:
+        """Route results from this backend's result queue back to the awaiting supervisor calls."""
+        while True:
+            try:
+                item = result_queue.get()
+            except (EOFError, OSError):
+                return
+            if item is None:
+                return
+            job_id, data = item
+            with self._lock:
+                pending = self._pending.pop(job_id, None)
+            if pending is not None:
+                loop, future = pending
+                loop.call_soon_threadsafe(
+                    lambda future=future, data=data: future.done() or future.set_result(data)
+                )
+
+    async def run(self, payload: dict) -> dict:
+        await asyncio.to_thread(self._start)
+        loop = asyncio.get_running_loop()
+        job_id = uuid.uuid4().hex
+        future = loop.create_future()
+        with self._lock:
+            self._pending[job_id] = (loop, future)
+        await asyncio.to_thread(self._task_queue.put, (job_id, self.client_id, payload))
+        try:
+            # A worker that dies mid-job never answers; the timeout surfaces that
+            # as a transient error the supervisor may retry
+            data = await asyncio.wait_for(future, self.timeout)
+        finally:
+            with self._lock:
+                self._pending.pop(job_id, None)
+        return deserialize_researcher_output(data)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if not self._started:
+                return
+            for _ in self._workers:
+                for _ in range(QUEUE_WORKER_CONCURRENCY):
+                    self._task_queue.put(None)
+            for worker in self._workers:
+                worker.join(timeout=30)
+            # Stop the result collector and release this backend's queue on a shared broker
+            self._result_queue.put(None)
+            if self._workers:
+                self._broker.shutdown()
+            else:
+                self._broker.drop_result_queue(self.client_id)
+            self._workers = []
+            self._started = False
+
+# ===== BACKEND SELECTION =====
+
+_backend: Optional[ResearcherBackend] = None
+
+def create_researcher_backend(name: str, num_workers: Optional[int] = None,
+                              broker_address: Optional[str] = None,
+                              broker_authkey: str = DEFAULT_BROKER_AUTHKEY,
+                              queue_timeout: float = DEFAULT_QUEUE_TIMEOUT) -> ResearcherBackend:
+    """Create a researcher backend by name.
+
+    Args:
+        name: One of "in_process", "process_pool" or "queue"
+        num_workers: Worker processes for the process pool and queue backends
+        broker_address: host:port of an existing broker for the queue backend
+        broker_authkey: Shared broker secret for the queue backend
+        queue_timeout: Seconds the queue backend waits for each researcher
+
+    Returns:
+        A researcher backend. Worker processes are started lazily on first use.
+    """
+    if name == "in_process":
+        return InProcessBackend()
+    if name == "process_pool":
+        return ProcessPoolBackend(max_workers=num_workers)
+    if name == "queue":
+        return QueueBackend(num_workers=num_workers, address=broker_address, authkey=broker_authkey,
+                            timeout=queue_timeout)
+    raise ValueError(f"Unknown researcher execution backend: {name}")
+
+def get_researcher_backend() -> ResearcherBackend:
+    """Return the process-wide researcher backend configured from the environment."""
+    global _backend
+    if _backend is None:
+        workers = os.environ.get("DEEP_RESEARCH_EXECUTION_WORKERS")
+        _backend = create_researcher_backend(
+            os.environ.get("DEEP_RESEARCH_EXECUTION_BACKEND", DEFAULT_BACKEND),
+            num_workers=int(workers) if workers else None,
+            broker_address=os.environ.get("DEEP_RESEARCH_BROKER_ADDRESS"),
+            broker_authkey=os.environ.get("DEEP_RESEARCH_BROKER_AUTHKEY", DEFAULT_BROKER_AUTHKEY),
+            queue_timeout=float(os.environ.get("DEEP_RESEARCH_QUEUE_TIMEOUT", DEFAULT_QUEUE_TIMEOUT)),
+        )
+    return _backend
+
+def set_researcher_backend(backend: ResearcherBackend) -> None:
+    """Replace the process-wide researcher backend."""
+    global _backend
+    _backend = backend
+
+# ===== BROKER AND WORKER ENTRY POINT =====
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Researcher queue broker and worker")
+    parser.add_argument("command", choices=["broker", "worker"])
+    parser.add_argument("--address", required=True, help="Broker address as host:port")
+    parser.add_argument("--authkey", default=os.environ.get("DEEP_RESEARCH_BROKER_AUTHKEY", DEFAULT_BROKER_AUTHKEY))
+    parser.add_argument("--concurrency", type=int, default=QUEUE_WORKER_CONCURRENCY,
+                        help="Researchers a worker runs at the same time")
+    args = parser.parse_args()
+
+    if args.command == "broker":
+        run_broker(parse_broker_address(args.address), args.authkey.encode())
+    else:
+        run_queue_worker(parse_broker_address(args.address), args.authkey.encode(), args.concurrency)
@@ -0,0 +1,361 @@
+"""Asyncio HTTP Service for the Full Research Agent.
+
+This module serves research runs over HTTP using only the standard library
+asyncio server, so the agent can be run under load without a web framework:
+
+    POST /research   {"prompt": ..., "tenant": ..., "budget_tier": ...}
+                     Streams Server-Sent Events while the run is queued and
+                     executing
+    GET  /health     Queue depth, in-flight runs and per-tenant load
+
+ack, step_complete, heartbeat and error events have the shapes of the Next.js
+API's ProgressEvent union. complete carries report and topics as there, but its
+stats are this service's budget usage rather than ResearchStats. token events,
+one per final report token, have no counterpart in the union.
+
+Admission control keeps the service responsive when overloaded:
+1. At most max_in_flight runs execute at once; later requests wait in a
+   bounded FIFO queue
+2. Each tenant may hold at most tenant_limit queued or running requests
+3. Requests beyond either bound are shed immediately with 429 (tenant
+   limit) or 503 (queue full) and a Retry-After hint estimated from recent
+   run durations
+
+Usage:
+    python -m deep_research.service --port 8000 --max-in-flight 4 --max-queue 16
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+from collections import Counter, deque
+from typing import Optional
+
+from langchain_core.messages import HumanMessage
+
+from deep_research.budget import RunBudget, run_budget_config
+from deep_research.multi_agent_supervisor import get_prior_research_topics
+from deep_research.research_agent_full import astream_research
+
+logger = logging.getLogger(__name__)
+
+# ===== CONFIGURATION =====
+
+DEFAULT_MAX_IN_FLIGHT = 4
+DEFAULT_MAX_QUEUE = 16
+DEFAULT_TENANT_LIMIT = 2
+DEFAULT_TENANT = "default"
+DEFAULT_RECURSION_LIMIT = 50
+
+HEARTBEAT_SECONDS = 15
+MAX_REQUEST_BYTES = 1_000_000
+
+# Assumed run duration until enough runs have finished to estimate it
+INITIAL_RUN_SECONDS_ESTIMATE = 300.0
+
+# Top-level graph nodes reported as progress steps, named as in the Next.js API
+NODE_STEPS = {
+    "write_research_brief": "brief",
+    "write_draft_report": "draft",
+    "supervisor_subgraph": "research",
+    "final_report_generation": "final",
+}
+
+# ===== ADMISSION CONTROL =====
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed instead of queued."""
+
+    def __init__(self, status: int, message: str, retry_after: int):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """Bounded queue with global and per-tenant concurrency limits.
+
+    Args:
+        max_in_flight: Runs executing at once
+        max_queue: Requests allowed to wait for a run slot
+        tenant_limit: Queued plus running requests allowed per tenant
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        tenant_limit: int = DEFAULT_TENANT_LIMIT,
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.tenant_limit = tenant_limit
+        self.in_flight = 0
+        self.queued = 0
+        self.completed = 0
+        self.shed = 0
+        self.tenant_load = Counter()
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._recent_run_seconds = deque(maxlen=20)
+
+    def estimated_run_seconds(self) -> float:
+        """Mean duration of recent runs."""
+        if not self._recent_run_seconds:
+            return INITIAL_RUN_SECONDS_ESTIMATE
+        return sum(self._recent_run_seconds) / len(self._recent_run_seconds)
+
+    def retry_after(self) -> int:
+        """Seconds until the queue is expected to have room again."""
+        waves = (self.queued + self.in_flight) / self.max_in_flight
+        return max(1, round(self.estimated_run_seconds() * max(waves, 1.0) / 2))
+
+    def admit(self, tenant: str) -> None:
+        """Reserve a queue position for a tenant's request.
+
+        Raises:
+            AdmissionRejected: If the tenant is at its limit or the queue is full
+        """
+        if self.tenant_load[tenant] >= self.tenant_limit:
+            self.shed += 1
+            raise AdmissionRejected(
+                429, f"Tenant {tenant} already has {self.tenant_limit} research runs queued or running",
+                self.retry_after()
+            )
+        if self.queued + self.in_flight >= self.max_in_flight + self.max_queue:
+            self.shed += 1
+            raise AdmissionRejected(503, "Research queue is full", self.retry_after())
+        self.tenant_load[tenant] += 1
+        self.queued += 1
+
+    async def acquire(self) -> None:
+        """Wait for a run slot after admit()."""
+        await self._slots.acquire()
+        self.queued -= 1
+        self.in_flight += 1
+
+    def release(self, tenant: str, acquired: bool, run_seconds: Optional[float] = None) -> None:
+        """Free a tenant's reservation, and its run slot if it was granted one.
+
+        Args:
+            tenant: Tenant the request was admitted for
+            acquired: Whether acquire() completed for the request
+            run_seconds: Duration of the run, if it started
+        """
+        self.tenant_load[tenant] -= 1
+        if self.tenant_load[tenant] <= 0:
+            del self.tenant_load[tenant]
+        if not acquired:
+            self.queued -= 1
+            return
+        self.in_flight -= 1
+        self._slots.release()
+        if run_seconds is not None:
+            self.completed += 1
+            self._recent_run_seconds.append(run_seconds)
+
+    def health(self) -> dict:
+        """Load snapshot for the health endpoint."""
+        return {
+            "status": "ok",
+            "queue_depth": self.queued,
+            "in_flight": self.in_flight,
+            "max_queue": self.max_queue,
+            "max_in_flight": self.max_in_flight,
+            "tenant_limit": self.tenant_limit,
+            "tenants": dict(self.tenant_load),
+            "completed": self.completed,
+            "shed": self.shed,
+            "estimated_run_seconds": round(self.estimated_run_seconds(), 1),
+        }
+
+# ===== HTTP HANDLING =====
+
+async def read_request(reader: asyncio.StreamReader) -> tuple[str, str, dict, bytes]:
+    """Read one HTTP/1.1 request.
+
+    Returns:
+        Tuple of (method, path, lower-cased headers, body)
+
+    Raises:
+        ValueError: If the request is malformed or too large
+    """
+    head = await reader.readuntil(b"\r\n\r\n")
+    request_line, *header_lines = head.decode("latin-1").split("\r\n")
+    method, target, _version = request_line.split(" ", 2)
+    headers = {}
+    for line in header_lines:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0))
+    if length > MAX_REQUEST_BYTES:
+        raise ValueError("Request body too large")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target.split("?", 1)[0], headers, body
+
+async def write_json(writer: asyncio.StreamWriter, status: int, payload: dict, headers: Optional[dict] = None) -> None:
+    """Write a complete JSON response."""
+    reasons = {200: "OK", 400: "Bad Request", 404: "Not Found", 429: "Too Many Requests", 503: "Service Unavailable"}
+    body = json.dumps(payload).encode("utf-8")
+    lines = [
+        f"HTTP/1.1 {status} {reasons.get(status, '')}",
+        "Content-Type: application/json",
+        f"Content-Length: {len(body)}",
+        "Connection: close",
+    ] + [f"{name}: {value}" for name, value in (headers or {}).items()]
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+    await writer.drain()
+
+async def write_event(writer: asyncio.StreamWriter, event: dict) -> None:
+    """Write one Server-Sent Event."""
+    writer.write(f"data: {json.dumps(event, ensure_ascii=False)}\n\n".encode("utf-8"))
+    await writer.drain()
+
+class ResearchService:
+    """HTTP front end that admits, queues and streams research runs.
+
+    Args:
+        admission: Admission controller shared by all connections
+    """
+
+    def __init__(self, admission: AdmissionController):
+        self.admission = admission
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve one request per connection."""
+        try:
+            try:
+                method, path, headers, body = await read_request(reader)
+            except (ValueError, asyncio.IncompleteReadError, asyncio.LimitOverrunError) as e:
+                await write_json(writer, 400, {"error": f"Malformed request: {e}"})
+                return
+
+            if method == "GET" and path == "/health":
+                await write_json(writer, 200, self.admission.health())
+            elif method == "POST" and path == "/research":
+                await self.handle_research(writer, headers, body)
+            else:
+                await write_json(writer, 404, {"error": f"No route for {method} {path}"})
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def handle_research(self, writer: asyncio.StreamWriter, headers: dict, body: bytes) -> None:
+        """Admit a research request, then stream its progress as SSE."""
+        try:
+            payload = json.loads(body or b"{}")
+        except json.JSONDecodeError:
+            await write_json(writer, 400, {"error": "Invalid JSON"})
+            return
+        prompt = payload.get("prompt")
+        if not isinstance(prompt, str) or not prompt.strip():
+            await write_json(writer, 400, {"error": "Missing prompt"})
+            return
+        budget_tier = payload.get("budget_tier")
+        try:
+            budget = RunBudget.for_tier(budget_tier) if budget_tier else RunBudget()
+        except ValueError as e:
+            await write_json(writer, 400, {"error": str(e)})
+            return
+        tenant = str(headers.get("x-tenant-id") or payload.get("tenant") or DEFAULT_TENANT)
+
+        try:
+            self.admission.admit(tenant)
+        except AdmissionRejected as e:
+            await write_json(
+                writer, e.status, {"error": str(e), "retry_after": e.retry_after},
+                headers={"Retry-After": str(e.retry_after)}
+            )
+            return
+
+        writer.write((
+            "HTTP/1.1 200 OK\r\n"
+            "Content-Type: text/event-stream\r\n"
+            "Cache-Control: no-cache\r\n"
+            "Connection: close\r\n\r\n"
+        ).encode("latin-1"))
+
+        acquire = None
+        run_seconds = None
+        try:
+            await write_event(writer, {
+                "type": "ack",
+                "message": f"Queued behind {self.admission.queued - 1} requests",
+                "timestamp": int(time.time() * 1000)
+            })
+            acquire = asyncio.ensure_future(self.admission.acquire())
+            await self.send_heartbeats_until(writer, acquire)
+            start = time.monotonic()
+            try:
+                await self.stream_run(writer, prompt, budget)
+            finally:
+                run_seconds = time.monotonic() - start
+        finally:
+            # The slot may have been granted while a failing ack or heartbeat write
+            # was aborting the request, so ask the acquire task rather than assume
+            acquired = acquire is not None and acquire.done() and not acquire.cancelled()
+            self.admission.release(tenant, acquired, run_seconds)
+
+    async def send_heartbeats_until(self, writer: asyncio.StreamWriter, awaitable) -> None:
+        """Await something while keeping the event stream alive with heartbeats."""
+        task = asyncio.ensure_future(awaitable)
+        try:
+            while True:
+                done, _ = await asyncio.wait({task}, timeout=HEARTBEAT_SECONDS)
+                if done:
+                    return task.result()
+                await write_event(writer, {"type": "heartbeat", "timestamp": int(time.time() * 1000)})
+        except BaseException:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            raise
+
+    async def stream_run(self, writer: asyncio.StreamWriter, prompt: str, budget: RunBudget) -> None:
+        """Run the agent and forward its progress as SSE events."""
+        config = run_budget_config(budget, {"recursion_limit": DEFAULT_RECURSION_LIMIT})
+        events = astream_research({"messages": [HumanMessage(content=prompt)]}, config=config)
+        try:
+            while True:
+                try:
+                    event = await self.send_heartbeats_until(writer, events.__anext__())
+                except StopAsyncIteration:
+                    break
+                if event["type"] == "node" and event["node"] in NODE_STEPS:
+                    await write_event(writer, {"type": "step_complete", "step": NODE_STEPS[event["node"]]})
+                elif event["type"] == "token":
+                    await write_event(writer, event)
+                elif event["type"] == "final":
+                    await write_event(writer, {
+                        "type": "complete",
+                        "report": event["state"].get("final_report", ""),
+                        "topics": get_prior_research_topics(event["state"].get("supervisor_messages", [])),
+                        "stats": budget.usage()
+                    })
+        except (ConnectionError, asyncio.CancelledError):
+            raise
+        except Exception as e:
+            await write_event(writer, {"type": "error", "message": f"{type(e).__name__}: {e}"})
+        finally:
+            await events.aclose()
+
+async def serve(host: str, port: int, admission: AdmissionController) -> None:
+    """Serve research runs until cancelled."""
+    service = ResearchService(admission)
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    logger.info("Serving research runs on http://%s:%s (in flight %s, queue %s, per tenant %s)",
+                host, port, admission.max_in_flight, admission.max_queue, admission.tenant_limit)
+    async with server:
+        await server.serve_forever()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the research agent over HTTP with SSE progress")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-in-flight", type=int, default=DEFAULT_MAX_IN_FLIGHT)
+    parser.add_argument("--max-queue", type=int, default=DEFAULT_MAX_QUEUE)
+    parser.add_argument("--tenant-limit", type=int, default=DEFAULT_TENANT_LIMIT)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    asyncio.run(serve(args.host, args.port, AdmissionController(args.max_in_flight, args.max_queue, args.tenant_limit)))
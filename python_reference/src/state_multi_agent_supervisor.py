@@ -34,6 +34,21 @@ class SupervisorState(TypedDict):
     raw_notes: Annotated[list[str], operator.add] = []
     # Draft report
     draft_report: str
+    # Change ratio and new citation count of each draft refinement
+    convergence_history: Annotated[list[dict], operator.add] = []
+
+class SupervisorInputState(TypedDict):
+    """
+    Parent state the supervisor subgraph starts from.
+
+    notes and raw_notes are left out: the subgraph returns them in full and
+    the parent adds them to its own lists, so notes the parent already holds,
+    such as those of an overlapped first research wave, would count twice.
+    """
+
+    supervisor_messages: Annotated[Sequence[BaseMessage], add_messages]
+    research_brief: str
+    draft_report: str
 
 @tool
 class ConductResearch(BaseModel):
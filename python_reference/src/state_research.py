@@ -34,10 +34,11 @@ class ResearcherOutputState(TypedDict):
 
     This represents the final output of the research process with compressed
     research findings and all raw notes from the research process.
+    The researcher's message history stays inside the researcher; raw_notes
+    already carries its tool and AI message content.
     """
     compressed_research: str
     raw_notes: Annotated[List[str], operator.add]
-    researcher_messages: Annotated[Sequence[BaseMessage], add_messages]
 
 # ===== STRUCTURED OUTPUT SCHEMAS =====
 
@@ -38,6 +38,9 @@ class AgentState(MessagesState):
     notes: Annotated[list[str], operator.add] = []
     # Draft research report
     draft_report: str
+    # ConductResearch message and findings of the first research wave, when it
+    # runs alongside draft generation
+    first_wave_messages: list[BaseMessage]
     # Final formatted research report
     final_report: str
 
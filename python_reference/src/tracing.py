@@ -0,0 +1,475 @@
+"""Span-Based Tracing for the Research Workflow.
+
+This module records where a research run spends its time:
+1. Each top-level graph invocation opens a run span, the root of its trace
+2. Graph nodes are wrapped with traced_node and produce one span per execution
+3. Every chat model call produces a span with latency, token counts and cache hits
+4. Searches and researcher runs open spans explicitly with tracer.span
+
+Spans are linked into trees through a context variable, so they nest correctly
+across asyncio tasks, LangGraph's worker threads and, through the payload's
+trace context, researcher backends in other processes. Finished spans are
+appended to a JSONL file set with DEEP_RESEARCH_TRACE_FILE. Tracing is off when
+the variable is unset.
+
+The offline report prints a flame summary and the critical path of each trace:
+
+    python -m deep_research.tracing report trace.jsonl
+"""
+
+import argparse
+import functools
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from types import CodeType
+from typing import Any, Callable, Iterator, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.tracers.context import register_configure_hook
+from langgraph.config import get_config
+
+# ===== SPANS AND EXPORT =====
+
+@dataclass
+class Span:
+    """A timed operation within a trace."""
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start: float
+    end: Optional[float] = None
+    status: str = "ok"
+    attributes: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        """Seconds between start and end, or up to now for an open span."""
+        return (self.end if self.end is not None else time.time()) - self.start
+
+class JsonlSpanExporter:
+    """Append finished spans to a JSONL file, one span per line.
+
+    Each span is written with a single append-mode write, so researchers in
+    worker processes can share the same trace file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = (json.dumps(asdict(span), ensure_ascii=False, default=str) + "\n").encode("utf-8")
+        with self._lock:
+            fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            try:
+                os.write(fd, line)
+            finally:
+                os.close(fd)
+
+# ===== TRACER =====
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("deep_research_current_span", default=None)
+
+class Tracer:
+    """Create spans and hand finished ones to an exporter."""
+
+    def __init__(self, exporter: Optional[JsonlSpanExporter] = None):
+        self.exporter = exporter
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def start_span(self, name: str, parent: Optional[Span] = None, **attributes: Any) -> Span:
+        """Open a span as a child of parent, or of the current span if none is given."""
+        parent = parent or _current_span.get()
+        return Span(
+            name=name,
+            trace_id=parent.trace_id if parent else uuid.uuid4().hex,
+            span_id=uuid.uuid4().hex[:16],
+            parent_id=parent.span_id if parent else None,
+            start=time.time(),
+            attributes=attributes,
+        )
+
+    def end_span(self, span: Span, error: Optional[BaseException] = None) -> None:
+        """Close a span and export it."""
+        span.end = time.time()
+        if error is not None:
+            span.status = "error"
+            span.attributes["error"] = f"{type(error).__name__}: {error}"
+        if self.exporter is not None:
+            self.exporter.export(span)
+
+    @contextmanager
+    def span(self, name: str, parent: Optional[Span] = None, **attributes: Any) -> Iterator[Optional[Span]]:
+        """Trace the enclosed block as a child of parent, or of the current span if none is given.
+
+        Yields None when tracing is disabled, so callers should guard attribute
+        updates with ``if span:``.
+        """
+        if not self.enabled:
+            yield None
+            return
+        span = self.start_span(name, parent, **attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            _current_span.reset(token)
+            self.end_span(span, error=e)
+            raise
+        _current_span.reset(token)
+        self.end_span(span)
+
+    def current_context(self) -> Optional[dict]:
+        """Describe the current span so another process can continue its trace."""
+        span = _current_span.get()
+        if span is None:
+            return None
+        return {"trace_id": span.trace_id, "span_id": span.span_id}
+
+    @contextmanager
+    def attach_context(self, trace_context: Optional[dict]) -> Iterator[None]:
+        """Parent spans opened in the block under a span from another process."""
+        if not trace_context:
+            yield
+            return
+        remote_parent = Span(
+            name="remote_parent",
+            trace_id=trace_context["trace_id"],
+            span_id=trace_context["span_id"],
+            parent_id=None,
+            start=time.time(),
+        )
+        token = _current_span.set(remote_parent)
+        try:
+            yield
+        finally:
+            _current_span.reset(token)
+
+def get_current_span() -> Optional[Span]:
+    """Return the innermost open span in the current context."""
+    return _current_span.get()
+
+# Code objects of traced node functions, so stack samples can be mapped to nodes
+_node_codes: dict[CodeType, str] = {}
+
+def node_name_for_code(code: CodeType) -> Optional[str]:
+    """Return the node name of a traced node function's code object, if any."""
+    return _node_codes.get(code)
+
+def traced_node(name: str) -> Callable:
+    """Wrap a graph node, sync or async, so each execution produces a span.
+
+    functools.wraps keeps the signature and return annotations that LangGraph
+    inspects when the node is added to a graph.
+
+    Args:
+        name: Span name, normally the node name used in the graph
+    """
+    def decorator(func: Callable) -> Callable:
+        _node_codes[func.__code__] = name
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with tracer.span(name, _node_parent_span(), kind="node"):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.span(name, _node_parent_span(), kind="node"):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+def _node_parent_span() -> Optional[Span]:
+    """Parent span for a node: its graph run's span, or the current span."""
+    handler = _tracing_callback.get()
+    if handler is None:
+        return None
+    try:
+        callbacks = get_config().get("callbacks")
+    except RuntimeError:
+        # Called outside a graph run
+        return None
+    return handler.parent_span(getattr(callbacks, "parent_run_id", None))
+
+# ===== RUN AND MODEL CALL SPANS =====
+
+def _usage_from_result(response) -> dict[str, int]:
+    """Pull token usage and cache hits from an LLMResult."""
+    usage = {"input_tokens": 0, "output_tokens": 0, "cache_read_tokens": 0}
+    for generations in response.generations:
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            metadata = getattr(message, "usage_metadata", None) or {}
+            usage["input_tokens"] += metadata.get("input_tokens", 0)
+            usage["output_tokens"] += metadata.get("output_tokens", 0)
+            details = metadata.get("input_token_details") or {}
+            usage["cache_read_tokens"] += details.get("cache_read", 0) or 0
+    return usage
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """Turn LangChain run and chat model callbacks into spans.
+
+    Each top-level run, such as one agent.ainvoke, gets a run span. The run
+    span is not made the current span, because a streamed run can end in
+    another task than the one it started in; instead every nested run is
+    mapped to its top-level run, and nodes and model calls look up their run
+    span through their parent run id.
+    """
+
+    run_inline = True
+
+    def __init__(self, tracer: Tracer):
+        self.tracer = tracer
+        self._spans: dict[uuid.UUID, Span] = {}
+        self._run_spans: dict[uuid.UUID, Span] = {}
+        # Top-level run of every open nested run, and the nested runs of each top-level run
+        self._root_runs: dict[uuid.UUID, uuid.UUID] = {}
+        self._nested_runs: dict[uuid.UUID, list[uuid.UUID]] = {}
+        self._lock = threading.Lock()
+
+    def parent_span(self, parent_run_id: Optional[uuid.UUID]) -> Optional[Span]:
+        """Span to parent work under, given the id of the run it belongs to.
+
+        The run span wins unless the current span is more specific, i.e. was
+        opened inside the run, like a researcher span around a subgraph.
+        """
+        current = _current_span.get()
+        with self._lock:
+            run_span = self._run_spans.get(self._root_runs.get(parent_run_id, parent_run_id))
+        if run_span is not None and (current is None or run_span.parent_id == current.span_id):
+            return run_span
+        return current
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, name=None, **kwargs):
+        with self._lock:
+            if parent_run_id is not None:
+                root = self._root_runs.get(parent_run_id, parent_run_id)
+                if root in self._run_spans:
+                    self._root_runs[run_id] = root
+                    self._nested_runs[root].append(run_id)
+                return
+        name = name or (serialized or {}).get("name", "chain")
+        span = self.tracer.start_span(f"run:{name}", kind="run")
+        with self._lock:
+            self._run_spans[run_id] = span
+            self._nested_runs[run_id] = []
+
+    def on_chain_end(self, outputs, *, run_id, parent_run_id=None, **kwargs):
+        if parent_run_id is None:
+            self._end_run_span(run_id)
+
+    def on_chain_error(self, error, *, run_id, parent_run_id=None, **kwargs):
+        if parent_run_id is None:
+            self._end_run_span(run_id, error)
+
+    def _end_run_span(self, run_id: uuid.UUID, error: Optional[BaseException] = None) -> None:
+        with self._lock:
+            span = self._run_spans.pop(run_id, None)
+            for nested in self._nested_runs.pop(run_id, []):
+                self._root_runs.pop(nested, None)
+        if span is not None:
+            self.tracer.end_span(span, error=error)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        metadata = metadata or {}
+        model = metadata.get("ls_model_name") or (serialized or {}).get("name", "chat_model")
+        span = self.tracer.start_span(
+            f"llm:{model}",
+            self.parent_span(parent_run_id),
+            kind="llm",
+            model=model,
+            input_messages=sum(len(batch) for batch in messages),
+        )
+        with self._lock:
+            self._spans[run_id] = span
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        with self._lock:
+            span = self._spans.pop(run_id, None)
+        if span is None:
+            return
+        usage = _usage_from_result(response)
+        span.attributes.update(usage)
+        span.attributes["cache_hit"] = usage["cache_read_tokens"] > 0
+        self.tracer.end_span(span)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        with self._lock:
+            span = self._spans.pop(run_id, None)
+        if span is not None:
+            self.tracer.end_span(span, error=error)
+
+# ===== CONFIGURATION =====
+
+_tracing_callback: ContextVar[Optional[TracingCallbackHandler]] = ContextVar(
+    "deep_research_tracing_callback", default=None
+)
+register_configure_hook(_tracing_callback, inheritable=True)
+
+tracer = Tracer()
+
+def configure_tracing(path: Optional[str]) -> Tracer:
+    """Send spans to a JSONL file, or disable tracing when path is None.
+
+    Args:
+        path: Trace file path
+
+    Returns:
+        The process-wide tracer
+    """
+    tracer.exporter = JsonlSpanExporter(path) if path else None
+    _tracing_callback.set(TracingCallbackHandler(tracer) if path else None)
+    return tracer
+
+configure_tracing(os.environ.get("DEEP_RESEARCH_TRACE_FILE"))
+
+# ===== OFFLINE REPORT =====
+
+def load_spans(path: str) -> list[dict]:
+    """Load exported spans from a JSONL trace file."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def _build_tree(spans: list[dict]) -> tuple[list[dict], dict[str, list[dict]]]:
+    """Index spans by parent. Spans whose parent was never exported become roots."""
+    by_id = {span["span_id"]: span for span in spans}
+    children = defaultdict(list)
+    roots = []
+    for span in spans:
+        if span["parent_id"] in by_id:
+            children[span["parent_id"]].append(span)
+        else:
+            roots.append(span)
+    return roots, children
+
+def _duration(span: dict) -> float:
+    return (span["end"] or span["start"]) - span["start"]
+
+def flame_summary(spans: list[dict]) -> list[dict]:
+    """Aggregate total and self time per span stack, as in a flame graph.
+
+    Returns:
+        Rows with the ';'-joined stack, call count, total and self seconds,
+        sorted by total time
+    """
+    roots, children = _build_tree(spans)
+    rows = defaultdict(lambda: {"count": 0, "total": 0.0, "self": 0.0})
+
+    def visit(span: dict, prefix: str) -> None:
+        stack = f"{prefix};{span['name']}" if prefix else span["name"]
+        kids = children.get(span["span_id"], [])
+        # Parallel children can overlap, so self time uses the union of their intervals
+        covered = 0.0
+        cursor = span["start"]
+        for kid in sorted(kids, key=lambda k: k["start"]):
+            kid_end = kid["end"] or kid["start"]
+            if kid_end > cursor:
+                covered += kid_end - max(cursor, kid["start"])
+                cursor = kid_end
+        row = rows[stack]
+        row["count"] += 1
+        row["total"] += _duration(span)
+        row["self"] += max(0.0, _duration(span) - covered)
+        for kid in kids:
+            visit(kid, stack)
+
+    for root in roots:
+        visit(root, "")
+
+    return sorted(
+        ({"stack": stack, **row} for stack, row in rows.items()),
+        key=lambda row: row["total"],
+        reverse=True,
+    )
+
+def _critical_chain(span: dict, children: dict[str, list[dict]], depth: int) -> list[tuple[int, dict]]:
+    """Walk back from a span's end through the children that gated it."""
+    chain = []
+    cursor = span["end"] or span["start"]
+    for kid in sorted(children.get(span["span_id"], []), key=lambda k: k["end"] or k["start"], reverse=True):
+        # 1ms slack absorbs clock jitter between a child's end and the next child's start
+        if (kid["end"] or kid["start"]) <= cursor + 1e-3:
+            chain.append(kid)
+            cursor = kid["start"]
+
+    path = [(depth, span)]
+    for kid in reversed(chain):
+        path.extend(_critical_chain(kid, children, depth + 1))
+    return path
+
+def critical_paths(spans: list[dict]) -> dict[str, list[tuple[int, dict]]]:
+    """Find the chain of spans that determined the end time of each trace.
+
+    Working back from a span's end, the path takes the child that finished
+    last, then the latest child that finished before that one started, and so
+    on. Parallel siblings that finished earlier are off the critical path.
+
+    Returns:
+        Mapping of trace_id to (depth, span) pairs in execution order
+    """
+    roots, children = _build_tree(spans)
+    paths = {}
+    for root in roots:
+        trace_id = root["trace_id"]
+        if trace_id not in paths or _duration(root) > _duration(paths[trace_id][0][1]):
+            paths[trace_id] = _critical_chain(root, children, 0)
+    return paths
+
+def format_report(spans: list[dict], top: int = 25) -> str:
+    """Render the flame summary, critical paths and token totals as text."""
+    lines = []
+    llm_spans = [span for span in spans if span["attributes"].get("kind") == "llm"]
+    lines.append(f"Spans: {len(spans)}  Traces: {len({span['trace_id'] for span in spans})}  LLM calls: {len(llm_spans)}")
+    lines.append(
+        "Tokens: input={} output={} cache_read={}".format(
+            sum(span["attributes"].get("input_tokens", 0) for span in llm_spans),
+            sum(span["attributes"].get("output_tokens", 0) for span in llm_spans),
+            sum(span["attributes"].get("cache_read_tokens", 0) for span in llm_spans),
+        )
+    )
+
+    lines.append("")
+    lines.append("=== Flame summary (seconds) ===")
+    lines.append(f"{'total':>10} {'self':>10} {'count':>6}  stack")
+    for row in flame_summary(spans)[:top]:
+        lines.append(f"{row['total']:>10.2f} {row['self']:>10.2f} {row['count']:>6}  {row['stack']}")
+
+    for trace_id, path in critical_paths(spans).items():
+        lines.append("")
+        lines.append(f"=== Critical path for trace {trace_id} ({_duration(path[0][1]):.2f}s) ===")
+        for depth, span in path:
+            lines.append(f"{'  ' * depth}{span['name']}  {_duration(span):.2f}s")
+
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize a deep research trace file")
+    parser.add_argument("command", choices=["report", "folded"])
+    parser.add_argument("trace_file")
+    parser.add_argument("--top", type=int, default=25, help="Rows to show in the flame summary")
+    args = parser.parse_args()
+
+    spans = load_spans(args.trace_file)
+    if args.command == "report":
+        sys.stdout.write(format_report(spans, args.top) + "\n")
+    else:
+        # Folded stacks in microseconds of self time, for flamegraph.pl or speedscope
+        for row in flame_summary(spans):
+            sys.stdout.write(f"{row['stack']} {int(row['self'] * 1_000_000)}\n")
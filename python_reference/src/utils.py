@@ -6,6 +6,8 @@ This module provides search and content processing utilities for the research ag
 including web search capabilities and content summarization tools.
 """
 
+import re
+from difflib import SequenceMatcher
 from pathlib import Path
 from datetime import datetime
 from typing_extensions import Annotated, List, Literal
@@ -17,6 +19,9 @@ from tavily import TavilyClient
 
 from deep_research.state_research import Summary
 from deep_research.prompts import summarize_webpage_prompt, report_generation_with_draft_insight_prompt
+from deep_research.budget import get_run_budget
+from deep_research.tracing import tracer
+from deep_research.cassette import cassette_call
 
 # ===== UTILITY FUNCTIONS =====
 
@@ -65,13 +70,18 @@ def tavily_search_multiple(
     """
 
     # Execute searches sequentially. Note: yon can use AsyncTavilyClient to parallelize this step.
+    # Results are recorded to or replayed from the active cassette, if any.
     search_docs = []
     for query in search_queries:
-        result = tavily_client.search(
-            query,
-            max_results=max_results,
-            include_raw_content=include_raw_content,
-            topic=topic
+        result = cassette_call(
+            "tavily",
+            {"query": query, "max_results": max_results, "include_raw_content": include_raw_content, "topic": topic},
+            lambda: tavily_client.search(
+                query,
+                max_results=max_results,
+                include_raw_content=include_raw_content,
+                topic=topic
+            )
         )
         search_docs.append(result)
 
@@ -177,6 +187,78 @@ def format_search_output(summarized_results: dict) -> str:
 
     return formatted_output
 
+# ===== RESEARCH TOPIC OVERLAP =====
+
+# Common words that carry no topical signal and would inflate overlap between
+# otherwise unrelated research topics
+TOPIC_STOPWORDS = frozenset("""
+a an and are as at be been by can could do does for from has have how in into
+is it its of on or should such than that the their them these they this those
+to was were what when where which who why will with within would about also
+any all more most other some research investigate analyze analyse provide
+including include specific detail details detailed information
+""".split())
+
+def topic_shingles(topic: str) -> set[str]:
+    """Build the lexical shingle set used to compare research topics.
+
+    The set holds normalized content words plus adjacent word pairs, so that
+    paraphrased topics still share most of their unigrams while topics that
+    merely reuse the same vocabulary in a different order share few bigrams.
+
+    Args:
+        topic: Research topic text
+
+    Returns:
+        Set of unigram and bigram shingles
+    """
+    words = [
+        word.rstrip("s") if len(word) > 3 else word
+        for word in re.findall(r"\w+", topic.lower())
+        if word not in TOPIC_STOPWORDS
+    ]
+    shingles = set(words)
+    shingles.update(f"{first} {second}" for first, second in zip(words, words[1:]))
+    return shingles
+
+def topic_similarity(first: set[str], second: set[str]) -> float:
+    """Compute the Jaccard similarity between two topic shingle sets.
+
+    Args:
+        first: Shingles of the first topic
+        second: Shingles of the second topic
+
+    Returns:
+        Similarity between 0.0 (disjoint) and 1.0 (identical)
+    """
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+# ===== DRAFT CONVERGENCE =====
+
+CITATION_URL_PATTERN = re.compile(r"https?://[^\s)\]>\"']+")
+
+def draft_change_ratio(previous_draft: str, current_draft: str) -> float:
+    """Measure how much a draft changed between two refinements.
+
+    Args:
+        previous_draft: Draft before refinement
+        current_draft: Draft after refinement
+
+    Returns:
+        Share of word tokens that changed, from 0.0 (identical) to 1.0 (rewritten)
+    """
+    if not previous_draft:
+        return 1.0
+    matcher = SequenceMatcher(None, previous_draft.split(), current_draft.split())
+    return 1.0 - matcher.ratio()
+
+def count_new_citations(previous_draft: str, current_draft: str) -> int:
+    """Count source URLs cited in the current draft but not the previous one."""
+    previous_urls = set(CITATION_URL_PATTERN.findall(previous_draft or ""))
+    return len(set(CITATION_URL_PATTERN.findall(current_draft)) - previous_urls)
+
 # ===== RESEARCH TOOLS =====
 
 @tool(parse_docstring=True)
@@ -195,22 +277,31 @@ def tavily_search(
     Returns:
         Formatted string of search results with summaries
     """
-    # Execute search for single query
-    search_results = tavily_search_multiple(
-        [query],  # Convert single query to list for the internal function
-        max_results=max_results,
-        topic=topic,
-        include_raw_content=True,
-    )
-
-    # Deduplicate results by URL to avoid processing duplicate content
-    unique_results = deduplicate_search_results(search_results)
-
-    # Process results with summarization
-    summarized_results = process_search_results(unique_results)
-
-    # Format output for consumption
-    return format_search_output(summarized_results)
+    with tracer.span("tavily_search", query=query, max_results=max_results, topic=topic) as span:
+        if not get_run_budget().try_charge_search():
+            if span:
+                span.attributes["budget_exhausted"] = True
+            return "Search budget for this research run is exhausted. Work with the results gathered so far."
+
+        # Execute search for single query
+        with tracer.span("tavily_api"):
+            search_results = tavily_search_multiple(
+                [query],  # Convert single query to list for the internal function
+                max_results=max_results,
+                topic=topic,
+                include_raw_content=True,
+            )
+
+        # Deduplicate results by URL to avoid processing duplicate content
+        unique_results = deduplicate_search_results(search_results)
+        if span:
+            span.attributes["results"] = len(unique_results)
+
+        # Process results with summarization
+        summarized_results = process_search_results(unique_results)
+
+        # Format output for consumption
+        return format_search_output(summarized_results)
 
 @tool(parse_docstring=True)
 def think_tool(reflection: str) -> str: